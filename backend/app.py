@@ -2,9 +2,8 @@ import asyncio
 import json
 import os
 import logging
-import websockets.client as ws_client
 from typing import Dict, Any, Set, Optional, List
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, File, UploadFile, Form
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, File, UploadFile, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
@@ -17,8 +16,20 @@ from os.path import splitext
 from services.ai_agent import BlenderAIAgent
 from services.file_importer import BlenderFileImporter
 from knowledge_kernel.search import search_blender_api
-from config import API_HOST, API_PORT, CORS_ORIGINS, BLENDER_WS_URL
-from utils.websocket_utils import connect_to_blender, send_to_blender
+from config import (
+    API_HOST, API_PORT, CORS_ORIGINS, BLENDER_WS_URL,
+    BLENDER_POOL_SIZE, BLENDER_POOL_HEALTH_INTERVAL, BLENDER_BREAKER_THRESHOLD,
+    BLENDER_RECONNECT_BASE_DELAY, BLENDER_RECONNECT_MAX_DELAY, BLENDER_WIRE_FORMATS,
+    BLENDER_WS_URLS, BLENDER_HEADLESS_WORKERS, BLENDER_EXECUTABLE, BLENDER_STARTUP_SCRIPT,
+    BLENDER_HEADLESS_BASE_PORT, BLENDER_SESSION_TTL, SCENE_CACHE_TTL,
+    BLENDER_JOB_TIMEOUT, MAX_FINISHED_JOBS, BLENDER_WORKER_MAX_JOBS,
+    BLENDER_WORKER_MAX_MEMORY_GROWTH_MB, BLENDER_WORKER_WARM_CHECK_INTERVAL, VALIDATE_CODE_DEFAULT
+)
+from utils.websocket_utils import check_blender_connection
+from utils.blender_workers import BlenderWorkerPool
+from utils.scene_cache import SceneSnapshot, SceneCache
+from utils.execution_jobs import JobManager
+from utils.single_flight import SingleFlight
 
 # Set up logging
 logging.basicConfig(
@@ -32,9 +43,43 @@ LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
-# WebSocket connection to Blender
-blender_ws = None
-blender_ws_lock = asyncio.Lock()
+# Shared pool of Blender workers, each with persistent connections
+blender_pool = BlenderWorkerPool.from_config(
+    BLENDER_WS_URLS,
+    headless_workers=BLENDER_HEADLESS_WORKERS,
+    blender_executable=BLENDER_EXECUTABLE,
+    startup_script=BLENDER_STARTUP_SCRIPT,
+    headless_base_port=BLENDER_HEADLESS_BASE_PORT,
+    session_ttl=BLENDER_SESSION_TTL,
+    max_jobs_per_worker=BLENDER_WORKER_MAX_JOBS,
+    max_memory_growth=BLENDER_WORKER_MAX_MEMORY_GROWTH_MB * 2 ** 20,
+    warm_check_interval=BLENDER_WORKER_WARM_CHECK_INTERVAL,
+    breaker_options={
+        "failure_threshold": BLENDER_BREAKER_THRESHOLD,
+        "base_delay": BLENDER_RECONNECT_BASE_DELAY,
+        "max_delay": BLENDER_RECONNECT_MAX_DELAY
+    },
+    size=BLENDER_POOL_SIZE,
+    health_check_interval=BLENDER_POOL_HEALTH_INTERVAL,
+    encodings=BLENDER_WIRE_FORMATS
+)
+
+# Cached scene of each Blender worker, updated with delta introspection
+# and invalidated by every mutation the backend sends
+scene_caches: Dict[str, SceneCache] = {
+    worker.name: SceneCache(ttl=SCENE_CACHE_TTL) for worker in blender_pool.workers
+}
+
+# Concurrent describe_function requests for the same function share one round trip
+describe_function_flights = SingleFlight()
+
+# Scripts running in Blender as jobs; a finished job may have changed the scene
+job_manager = JobManager(
+    blender_pool,
+    job_timeout=BLENDER_JOB_TIMEOUT,
+    max_finished=MAX_FINISHED_JOBS,
+    on_finish=lambda job: scene_caches[job.worker.name].invalidate()
+)
 
 # Define lifespan context manager to replace on_event
 @asynccontextmanager
@@ -42,21 +87,17 @@ async def lifespan(app: FastAPI):
     # Startup logic
     logger.info(f"Starting Blender AI Agent API on {API_HOST}:{API_PORT}")
     
-    # Try establishing direct connection with websockets library (used as backup)
-    try:
-        # This is a direct use of the websockets library for diagnostic purposes
-        ws_uri = f"ws://{BLENDER_WS_URL.split('://')[-1]}"
-        async with ws_client.connect(ws_uri, ping_timeout=1):
-            logger.info(f"Successfully verified direct WebSocket connection to {ws_uri}")
-    except Exception as e:
-        logger.warning(f"Direct websocket connection test failed: {str(e)}")
+    # Connect to Blender in the background so startup never waits on it
+    await blender_pool.start()
     
     # Yield control to FastAPI to handle requests
     yield
     
     # Shutdown logic
     logger.info("Shutting down Blender AI Agent API")
-    # Close any remaining websocket connections, etc.
+    await job_manager.close()
+    await blender_pool.close()
+    await ai_agent.close()
 
 # Initialize the FastAPI app with lifespan
 app = FastAPI(title="Blender AI Agent API", lifespan=lifespan)
@@ -78,12 +119,30 @@ file_importer = BlenderFileImporter()
 class CodeGenerationRequest(BaseModel):
     prompt: str
     include_scene_data: bool = True
+    optimize: bool = True
+    use_cache: bool = True
 
 class BlenderFunctionRequest(BaseModel):
     function_path: str
 
 class CodeExecutionRequest(BaseModel):
     code: str
+    profile: bool = False
+    validate_code: bool = VALIDATE_CODE_DEFAULT
+    # Defer undo, depsgraph handlers and redraws to the end of the script
+    batch_mode: bool = False
+
+class JobRequest(BaseModel):
+    code: str
+    validate_code: bool = VALIDATE_CODE_DEFAULT
+
+class BatchAction(BaseModel):
+    action: str
+    data: Dict[str, Any] = {}
+
+class BatchRequest(BaseModel):
+    actions: List[BatchAction]
+    stop_on_error: bool = False
 
 class FileImportRequest(BaseModel):
     file_data: str
@@ -91,6 +150,14 @@ class FileImportRequest(BaseModel):
     extrude: bool = True
     extrude_depth: float = 0.1
 
+class ParallelJob(BaseModel):
+    # execute_code ({"code"}), import_file (FileImportRequest fields) or render ({"filepath", ...})
+    action: str
+    data: Dict[str, Any] = {}
+
+class ParallelRequest(BaseModel):
+    jobs: List[ParallelJob]
+
 # Connected WebSocket clients
 websocket_clients = set()
 
@@ -98,19 +165,51 @@ websocket_clients = set()
 async def root():
     return {"message": "Blender AI Agent API is running"}
 
+@app.get("/health")
+async def health():
+    """Report API health and the state of the link to Blender"""
+    link = blender_pool.get_link_state()
+    return {
+        "status": "ok" if link["state"] == "up" else "degraded",
+        "blender_link": link
+    }
+
+@app.get("/stats")
+async def stats():
+    """Get runtime statistics of the backend"""
+    return {
+        "blender_pool": blender_pool.get_stats(),
+        "scene_cache": {name: cache.get_stats() for name, cache in scene_caches.items()},
+        "ollama": ai_agent.ollama.get_stats(),
+        "response_cache": await asyncio.to_thread(ai_agent.response_cache.get_stats),
+        "semantic_cache": ai_agent.semantic_cache.get_stats(),
+        "scene_context": ai_agent.scene_context.get_stats(),
+        "coalescing": {
+            "generate_code": ai_agent.generations.get_stats(),
+            "get_blender_scene_data": {
+                "calls": sum(cache.fetches.calls for cache in scene_caches.values()),
+                "saved_calls": sum(cache.fetches.shared for cache in scene_caches.values())
+            },
+            "describe_function": describe_function_flights.get_stats()
+        }
+    }
+
 @app.post("/generate-code")
-async def generate_code(request: CodeGenerationRequest):
+async def generate_code(request: CodeGenerationRequest, x_session_id: Optional[str] = Header(None)):
     """Generate Blender Python code based on user prompt"""
     try:
         # Get scene data if requested
         scene_data = None
         if request.include_scene_data:
-            scene_data = await get_blender_scene_data()
+            scene_data = await get_blender_scene_data(x_session_id)
         
         # Generate code
-        code = ai_agent.generate_code(request.prompt, scene_data)
+        code = await ai_agent.generate_code(request.prompt, scene_data, use_cache=request.use_cache)
+        response = {"code": code}
+        if request.optimize:
+            response = generated_code_response(code)
         
-        return {"code": code}
+        return {**response, "validation": ai_agent.validate_code(response["code"])}
     except Exception as e:
         logger.error(f"Error generating code: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -126,59 +225,105 @@ async def search_api(query: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/execute-code")
-async def execute_blender_code(request: CodeExecutionRequest):
+async def execute_blender_code(request: CodeExecutionRequest, x_session_id: Optional[str] = Header(None)):
     """Execute Python code in Blender"""
+    if request.validate_code:
+        rejection = reject_invalid_code(request.code)
+        if rejection is not None:
+            return rejection
     try:
-        result = await send_to_blender(BLENDER_WS_URL, "execute_code", {"code": request.code})
+        result = await send_scene_mutation(
+            "execute_code",
+            {"code": request.code, "profile": request.profile, "batch_mode": request.batch_mode},
+            x_session_id
+        )
         return result
     except Exception as e:
         logger.error(f"Error executing code: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/jobs")
+async def submit_job(request: JobRequest, x_session_id: Optional[str] = Header(None)):
+    """Run Python code in Blender as a job without waiting for it to finish"""
+    if request.validate_code:
+        rejection = reject_invalid_code(request.code)
+        if rejection is not None:
+            return rejection
+    job = job_manager.submit(request.code, x_session_id)
+    return job.to_dict()
+
+@app.get("/jobs")
+async def list_jobs():
+    """List running and recently finished jobs"""
+    return {"jobs": job_manager.list_jobs()}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status and output of a job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict(include_output=True)
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Ask a running job to stop at its next cancellation point"""
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return await job_manager.cancel(job_id)
+
+@app.post("/parallel")
+async def run_parallel(request: ParallelRequest):
+    """Run independent jobs (execute_code, import_file, render) in parallel on headless workers"""
+    results = await asyncio.gather(*[
+        run_independent_job(index, job.action, job.data) for index, job in enumerate(request.jobs)
+    ])
+    return {"results": results}
+
+@app.post("/batch")
+async def execute_batch(request: BatchRequest, x_session_id: Optional[str] = Header(None)):
+    """Run several Blender actions in one round trip"""
+    rejection = reject_invalid_batch([action.model_dump() for action in request.actions])
+    if rejection is not None:
+        return rejection
+    try:
+        result = await send_scene_mutation("execute_batch", {
+            "actions": [action.model_dump() for action in request.actions],
+            "stop_on_error": request.stop_on_error
+        }, x_session_id)
+        return result
+    except Exception as e:
+        logger.error(f"Error executing batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/describe-function")
-async def describe_function(request: BlenderFunctionRequest):
+async def describe_function(request: BlenderFunctionRequest, x_session_id: Optional[str] = Header(None)):
     """Get documentation for a Blender function"""
     try:
-        result = await send_to_blender(BLENDER_WS_URL, "describe_function", {"function_path": request.function_path})
+        result = await describe_function_flights.run(
+            request.function_path,
+            lambda: blender_pool.send(
+                "describe_function", {"function_path": request.function_path}, session_id=x_session_id
+            )
+        )
         return result
     except Exception as e:
         logger.error(f"Error describing function: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/import-file")
-async def import_file(request: FileImportRequest):
+async def import_file(request: FileImportRequest, x_session_id: Optional[str] = Header(None)):
     """Import a file (SVG, DXF) into Blender and optionally extrude it"""
     try:
-        # Convert base64 data to UploadFile
-        file_content = base64.b64decode(request.file_data)
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f".{request.file_format}")
-        temp_file.write(file_content)
-        temp_file.close()
-        
-        # Create an UploadFile-like object
-        upload_file = UploadFile(
-            filename=f"import.{request.file_format}",
-            file=open(temp_file.name, "rb")
+        result = await prepare_file_import(
+            request.file_data, request.file_format, request.extrude, request.extrude_depth
         )
         
-        # Set options
-        options = {
-            "extrude": request.extrude_depth if request.extrude else 0.0,
-            "scale": 1.0
-        }
-        
-        # Process the file
-        result = await file_importer.import_and_process(upload_file, options)
-        
-        # Close and remove temp file
-        upload_file.file.close()
-        os.remove(temp_file.name)
-        
         if result["status"] != "success":
             return JSONResponse(status_code=400, content={"error": result["message"]})
         
         # Execute the generated code in Blender
-        execution_result = await send_to_blender(BLENDER_WS_URL, "execute_code", {"code": result["code"]})
+        execution_result = await send_scene_mutation("execute_code", {"code": result["code"], "batch_mode": True}, x_session_id)
         
         return {
             "success": True,
@@ -193,7 +338,8 @@ async def import_file(request: FileImportRequest):
 async def upload_file(
     file: UploadFile = File(...),
     extrude: bool = Form(True),
-    extrude_depth: float = Form(0.1)
+    extrude_depth: float = Form(0.1),
+    x_session_id: Optional[str] = Header(None)
 ):
     """Upload and import a file into Blender"""
     try:
@@ -224,7 +370,7 @@ async def upload_file(
             return JSONResponse(status_code=400, content={"error": result["message"]})
         
         # Execute the generated code in Blender
-        execution_result = await send_to_blender(BLENDER_WS_URL, "execute_code", {"code": result["code"]})
+        execution_result = await send_scene_mutation("execute_code", {"code": result["code"], "batch_mode": True}, x_session_id)
         
         return {
             "success": True,
@@ -240,6 +386,11 @@ async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time communication"""
     await websocket.accept()
     websocket_clients.add(websocket)
+    # Each /ws client is a session pinned to one Blender worker unless it names its own
+    default_session_id = f"ws-{id(websocket)}"
+    
+    async def send_job_event(event: Dict[str, Any]) -> None:
+        await websocket.send_json(event)
     
     try:
         while True:
@@ -249,11 +400,15 @@ async def websocket_endpoint(websocket: WebSocket):
             
             command = data_json.get("command")
             params = data_json.get("params", {})
+            session_id = params.get("session_id", default_session_id)
             
             if command == "connect_to_blender":
-                # Connect to Blender WebSocket
+                # Check the connection to Blender
                 blender_url = params.get("url", BLENDER_WS_URL)
-                result = await connect_to_blender(blender_url)
+                if blender_url == blender_pool.ws_url:
+                    result = await blender_pool.check()
+                else:
+                    result = await check_blender_connection(blender_url)
                 await websocket.send_json({"type": "connect_result", "result": result})
             
             elif command == "get_connected_clients":
@@ -271,55 +426,107 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 scene_data = None
                 if include_scene_data:
-                    scene_data = await get_blender_scene_data()
+                    scene_data = await get_blender_scene_data(session_id)
+                
+                # Stream the code to this client as it is generated
+                async def send_code_delta(delta: str) -> None:
+                    await websocket.send_json({"type": "code_delta", "delta": delta})
                 
-                code = ai_agent.generate_code(prompt, scene_data)
-                await websocket.send_json({"type": "code_generated", "code": code})
+                code = await ai_agent.generate_code(
+                    prompt,
+                    scene_data,
+                    on_delta=send_code_delta if params.get("stream", True) else None,
+                    use_cache=params.get("use_cache", True)
+                )
+                response = generated_code_response(code) if params.get("optimize", True) else {"code": code}
+                await websocket.send_json({
+                    "type": "code_generated", **response, "validation": ai_agent.validate_code(response["code"])
+                })
             
             elif command == "execute_code":
                 # Execute code in Blender
                 code = params.get("code")
-                result = await send_to_blender(BLENDER_WS_URL, "execute_code", {"code": code})
+                result = reject_invalid_code(code) if params.get("validate_code", VALIDATE_CODE_DEFAULT) else None
+                if result is None:
+                    result = await send_scene_mutation(
+                        "execute_code",
+                        {
+                            "code": code,
+                            "profile": params.get("profile", False),
+                            "batch_mode": params.get("batch_mode", False)
+                        },
+                        session_id
+                    )
                 await websocket.send_json({"type": "code_executed", "result": result})
             
+            elif command == "submit_job":
+                # Run code as a job; its output streams to this client
+                code = params.get("code", "")
+                rejection = reject_invalid_code(code) if params.get("validate_code", VALIDATE_CODE_DEFAULT) else None
+                if rejection is not None:
+                    await websocket.send_json({"type": "job_rejected", "result": rejection})
+                else:
+                    job = job_manager.submit(code, session_id, send_job_event)
+                    await websocket.send_json({"type": "job_submitted", "job": job.to_dict()})
+            
+            elif command == "watch_job":
+                # Stream the output of a job submitted elsewhere to this client
+                job = job_manager.subscribe(params.get("job_id"), send_job_event)
+                if job is None:
+                    await websocket.send_json({"type": "error", "message": f"Unknown job: {params.get('job_id')}"})
+                else:
+                    await websocket.send_json({"type": "job_status_result", "job": job.to_dict(include_output=True)})
+            
+            elif command == "job_status":
+                job = job_manager.get(params.get("job_id"))
+                if job is None:
+                    await websocket.send_json({"type": "error", "message": f"Unknown job: {params.get('job_id')}"})
+                else:
+                    await websocket.send_json({"type": "job_status_result", "job": job.to_dict(include_output=True)})
+            
+            elif command == "cancel_job":
+                result = await job_manager.cancel(params.get("job_id"))
+                await websocket.send_json({"type": "job_cancel_result", "result": result})
+            
+            elif command == "batch":
+                # Run several Blender actions in one round trip
+                result = reject_invalid_batch(params.get("actions", []))
+                if result is None:
+                    result = await send_scene_mutation("execute_batch", {
+                        "actions": params.get("actions", []),
+                        "stop_on_error": params.get("stop_on_error", False)
+                    }, session_id)
+                await websocket.send_json({"type": "batch_result", "result": result})
+            
             elif command == "introspect_scene":
-                # Get scene data from Blender
-                scene_data = await get_blender_scene_data()
-                await websocket.send_json({"type": "scene_data", "data": scene_data})
+                # Get scene data from Blender, optionally filtered and projected
+                query = params.get("query")
+                if params.get("stream"):
+                    await stream_blender_scene(websocket, query or {}, params.get("chunk_size"), session_id)
+                elif query:
+                    scene_data = await query_blender_scene(query, session_id)
+                else:
+                    scene_data = await get_blender_scene_data(session_id)
+                if not params.get("stream"):
+                    await websocket.send_json({"type": "scene_data", "data": scene_data})
+            
+            elif command == "get_mesh_data":
+                # Stream mesh geometry from Blender to this client
+                await stream_mesh_data(websocket, params, session_id)
             
             elif command == "import_file":
                 # Import a file
-                file_data = params.get("file_data")
-                file_format = params.get("file_format")
-                extrude = params.get("extrude", True)
-                extrude_depth = params.get("extrude_depth", 0.1)
-                
-                # Create a temporary file and UploadFile object
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_format}")
-                temp_file.write(base64.b64decode(file_data))
-                temp_file.close()
-                
-                upload_file = UploadFile(
-                    filename=f"import.{file_format}",
-                    file=open(temp_file.name, "rb")
+                result = await prepare_file_import(
+                    params.get("file_data"),
+                    params.get("file_format"),
+                    params.get("extrude", True),
+                    params.get("extrude_depth", 0.1)
                 )
                 
-                options = {
-                    "extrude": extrude_depth if extrude else 0.0,
-                    "scale": 1.0,
-                    "merge": True
-                }
-                
-                result = await file_importer.import_and_process(upload_file, options)
-                
-                # Close and remove temp file
-                upload_file.file.close()
-                os.remove(temp_file.name)
-                
                 if result["status"] != "success":
                     await websocket.send_json({"type": "import_error", "error": result["message"]})
                 else:
-                    execution_result = await send_to_blender(BLENDER_WS_URL, "execute_code", {"code": result["code"]})
+                    execution_result = await send_scene_mutation("execute_code", {"code": result["code"], "batch_mode": True}, session_id)
                     await websocket.send_json({
                         "type": "file_imported", 
                         "result": {
@@ -334,17 +541,275 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
     finally:
+        job_manager.unsubscribe(send_job_event)
         websocket_clients.remove(websocket)
 
-async def get_blender_scene_data() -> Optional[Dict[str, Any]]:
-    """Get the current scene data from Blender"""
+async def get_blender_scene_data(session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Get the current scene data from the Blender worker serving the session"""
     try:
-        result = await send_to_blender(BLENDER_WS_URL, "introspect_scene", {})
-        return result.get("result", None)
+        worker = blender_pool.route(session_id)
+        
+        async def fetch(snapshot: SceneSnapshot) -> Optional[Dict[str, Any]]:
+            # Ask only for what changed since the version we hold
+            result = await blender_pool.send("introspect_scene", snapshot.request_params(), worker=worker)
+            scene_result = result.get("result")
+            if scene_result is None:
+                return None
+            
+            scene_data = snapshot.apply(scene_result)
+            if scene_data is None:
+                # The snapshot moved on while the request was in flight; fetch the full scene
+                result = await blender_pool.send("introspect_scene", {}, worker=worker)
+                scene_data = snapshot.apply(result["result"]) if "result" in result else None
+            return scene_data
+        
+        return await scene_caches[worker.name].get(fetch)
     except Exception as e:
         logger.error(f"Error getting scene data: {str(e)}")
         return None
 
+async def prepare_file_import(
+    file_data: str,
+    file_format: str,
+    extrude: bool = True,
+    extrude_depth: float = 0.1
+) -> Dict[str, Any]:
+    """
+    Save a base64-encoded file and generate the Blender code that imports it
+    
+    Args:
+        file_data (str): Base64-encoded file contents
+        file_format (str): File extension, e.g. svg or dxf
+        extrude (bool): Whether to extrude imported curves
+        extrude_depth (float): Extrusion depth
+        
+    Returns:
+        Dict[str, Any]: Result of BlenderFileImporter.import_and_process
+    """
+    # Create a temporary file and UploadFile object
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_format}")
+    temp_file.write(base64.b64decode(file_data))
+    temp_file.close()
+    
+    upload_file = UploadFile(
+        filename=f"import.{file_format}",
+        file=open(temp_file.name, "rb")
+    )
+    
+    options = {
+        "extrude": extrude_depth if extrude else 0.0,
+        "scale": 1.0,
+        "merge": True
+    }
+    
+    try:
+        return await file_importer.import_and_process(upload_file, options)
+    finally:
+        # Close and remove temp file
+        upload_file.file.close()
+        os.remove(temp_file.name)
+
+async def run_independent_job(index: int, action: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one job of a /parallel request on a headless worker
+    
+    Args:
+        index (int): Position of the job in the request
+        action (str): execute_code, import_file or render
+        data (Dict[str, Any]): Data for the action
+        
+    Returns:
+        Dict[str, Any]: Response from Blender with the job's index, action and worker
+    """
+    blender_action = action
+    try:
+        if action == "import_file":
+            result = await prepare_file_import(
+                data.get("file_data", ""),
+                data.get("file_format", ""),
+                data.get("extrude", True),
+                data.get("extrude_depth", 0.1)
+            )
+            if result["status"] != "success":
+                return {"index": index, "action": action, "error": result["message"]}
+            blender_action, data = "execute_code", {"code": result["code"], "batch_mode": True}
+        elif action not in ("execute_code", "render"):
+            return {"index": index, "action": action, "error": f"Unsupported parallel action: {action}"}
+        elif action == "execute_code" and data.get("validate_code", VALIDATE_CODE_DEFAULT):
+            rejection = reject_invalid_code(data.get("code", ""))
+            if rejection is not None:
+                return {**rejection, "index": index, "action": action}
+        
+        worker = blender_pool.pick_worker()
+        try:
+            response = await blender_pool.dispatch(blender_action, data, worker=worker)
+        finally:
+            scene_caches[worker.name].invalidate()
+        return {**response, "index": index, "action": action, "worker": worker.name}
+    except Exception as e:
+        logger.error(f"Error running parallel job {index}: {str(e)}")
+        return {"index": index, "action": action, "error": str(e)}
+
+def generated_code_response(code: str) -> Dict[str, Any]:
+    """
+    Optimize generated code and describe the rewrites made
+    
+    Args:
+        code (str): Code generated by the AI agent
+        
+    Returns:
+        Dict[str, Any]: The optimized code, the original code if anything was
+        rewritten, and the rewrites and operators kept in loops
+    """
+    optimization = ai_agent.optimize_code(code)
+    response = {
+        "code": optimization["code"],
+        "optimizations": {
+            "rewrites": optimization["rewrites"],
+            "kept": optimization["kept"],
+            "duration_ms": optimization["duration_ms"]
+        }
+    }
+    if optimization["changed"]:
+        response["original_code"] = code
+    return response
+
+def reject_invalid_code(code: str) -> Optional[Dict[str, Any]]:
+    """
+    Validate code against the Blender API catalog before it is sent to Blender
+    
+    Args:
+        code (str): Python code about to be executed
+        
+    Returns:
+        Optional[Dict[str, Any]]: An error response with the validation errors,
+        or None if the code may be executed
+    """
+    validation = ai_agent.validate_code(code or "")
+    if validation["valid"]:
+        return None
+    first = validation["errors"][0]
+    return {
+        "status": "error",
+        "error": f"Code failed validation: line {first['line']}: {first['message']}",
+        "validation": validation
+    }
+
+def reject_invalid_batch(actions: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Validate the code of every execute_code action of a batch
+    
+    Args:
+        actions (List[Dict[str, Any]]): Batch actions with their data
+        
+    Returns:
+        Optional[Dict[str, Any]]: An error response naming the first invalid action,
+        or None if the batch may be sent
+    """
+    for index, action in enumerate(actions):
+        data = action.get("data") or {}
+        if action.get("action") != "execute_code" or not data.get("validate_code", VALIDATE_CODE_DEFAULT):
+            continue
+        rejection = reject_invalid_code(data.get("code", ""))
+        if rejection is not None:
+            return {**rejection, "index": index}
+    return None
+
+async def send_scene_mutation(action: str, data: Dict[str, Any], session_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Send an action that may change the scene and invalidate the cached scene
+    
+    Args:
+        action (str): Action to perform, e.g. execute_code
+        data (Dict[str, Any]): Data to send
+        session_id (Optional[str]): Session whose Blender worker to use
+        
+    Returns:
+        Dict[str, Any]: Response from Blender
+    """
+    worker = blender_pool.route(session_id)
+    try:
+        return await blender_pool.send(action, data, worker=worker)
+    finally:
+        scene_caches[worker.name].invalidate()
+
+async def query_blender_scene(query: Dict[str, Any], session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get a filtered subset of the scene objects from Blender
+    
+    Args:
+        query (Dict[str, Any]): Field list, type/collection/name filters and limit/offset
+        session_id (Optional[str]): Session whose Blender worker to ask
+        
+    Returns:
+        Optional[Dict[str, Any]]: Scene data with the matching objects
+    """
+    try:
+        result = await blender_pool.send("introspect_scene", {"query": query}, session_id=session_id)
+        if "error" in result:
+            logger.error(f"Error querying scene: {result['error']}")
+        return result.get("result", None)
+    except Exception as e:
+        logger.error(f"Error querying scene: {str(e)}")
+        return None
+
+async def stream_blender_scene(
+    websocket: WebSocket,
+    query: Dict[str, Any],
+    chunk_size: Optional[int] = None,
+    session_id: Optional[str] = None
+) -> None:
+    """
+    Forward a chunked scene introspection from Blender to a WebSocket client
+    
+    Each chunk is sent on as a ``scene_chunk`` message as soon as it arrives;
+    the stream finishes with ``scene_end`` (scene settings and counts) or ``error``.
+    
+    Args:
+        websocket (WebSocket): Client to forward the chunks to
+        query (Dict[str, Any]): Field list, type/collection/name filters and limit/offset
+        chunk_size (Optional[int]): Objects per chunk, Blender's default if None
+        session_id (Optional[str]): Session whose Blender worker to ask
+    """
+    data = {"stream": True, "query": query}
+    if chunk_size:
+        data["chunk_size"] = chunk_size
+    
+    async for frame in blender_pool.stream("introspect_scene", data, session_id=session_id):
+        if "chunk" in frame:
+            await websocket.send_json({"type": "scene_chunk", "seq": frame["chunk"], "objects": frame.get("objects", [])})
+        elif "result" in frame:
+            await websocket.send_json({"type": "scene_end", "data": frame["result"]})
+        else:
+            message = frame.get("error") or frame.get("message", "Scene streaming failed")
+            logger.error(f"Error streaming scene: {message}")
+            await websocket.send_json({"type": "error", "message": message})
+
+async def stream_mesh_data(websocket: WebSocket, params: Dict[str, Any], session_id: Optional[str] = None) -> None:
+    """
+    Relay mesh geometry from Blender to a WebSocket client
+    
+    Mesh descriptions are sent as ``mesh_data`` messages and the geometry
+    buffers as the binary frames received from Blender, without decoding or
+    re-encoding them. The stream finishes with ``mesh_end`` or ``error``.
+    
+    Args:
+        websocket (WebSocket): Client to relay the geometry to
+        params (Dict[str, Any]): ``objects``, ``evaluated``, ``normals`` and ``uvs`` options
+        session_id (Optional[str]): Session whose Blender worker to ask
+    """
+    async for frame in blender_pool.stream("get_mesh_data", params, session_id=session_id):
+        if "buffer" in frame:
+            await websocket.send_bytes(frame["buffer"])
+        elif "chunk" in frame:
+            await websocket.send_json({"type": "mesh_data", "seq": frame["chunk"], "mesh": frame.get("mesh")})
+        elif "result" in frame:
+            await websocket.send_json({"type": "mesh_end", "data": frame["result"]})
+        else:
+            message = frame.get("error") or frame.get("message", "Mesh streaming failed")
+            logger.error(f"Error streaming mesh data: {message}")
+            await websocket.send_json({"type": "error", "message": message})
+
 async def broadcast_to_websocket_clients(message: Dict[str, Any]):
     """Broadcast a message to all connected WebSocket clients"""
     if websocket_clients:
@@ -17,12 +17,69 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
 BLENDER_WS_HOST = os.getenv("BLENDER_WS_HOST", "localhost")
 BLENDER_WS_PORT = int(os.getenv("BLENDER_WS_PORT", "9876"))
 BLENDER_WS_URL = f"ws://{BLENDER_WS_HOST}:{BLENDER_WS_PORT}"
+BLENDER_POOL_SIZE = int(os.getenv("BLENDER_POOL_SIZE", "4"))
+BLENDER_POOL_HEALTH_INTERVAL = float(os.getenv("BLENDER_POOL_HEALTH_INTERVAL", "15"))
+BLENDER_BREAKER_THRESHOLD = int(os.getenv("BLENDER_BREAKER_THRESHOLD", "3"))
+BLENDER_RECONNECT_BASE_DELAY = float(os.getenv("BLENDER_RECONNECT_BASE_DELAY", "0.5"))
+BLENDER_RECONNECT_MAX_DELAY = float(os.getenv("BLENDER_RECONNECT_MAX_DELAY", "30"))
+# Wire encodings offered to Blender, in order of preference (json is always the fallback)
+BLENDER_WIRE_FORMATS = os.getenv("BLENDER_WIRE_FORMATS", "msgpack,cbor,json").split(",")
+
+# Blender worker pool: extra running agents and headless workers launched by the backend
+BLENDER_WS_URLS = [url for url in os.getenv("BLENDER_WS_URLS", BLENDER_WS_URL).split(",") if url]
+BLENDER_HEADLESS_WORKERS = int(os.getenv("BLENDER_HEADLESS_WORKERS", "0"))
+BLENDER_EXECUTABLE = os.getenv("BLENDER_EXECUTABLE", "blender")
+BLENDER_STARTUP_SCRIPT = os.getenv(
+    "BLENDER_STARTUP_SCRIPT",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tmp", "start_blender.py")
+)
+BLENDER_HEADLESS_BASE_PORT = int(os.getenv("BLENDER_HEADLESS_BASE_PORT", "9877"))
+BLENDER_SESSION_TTL = float(os.getenv("BLENDER_SESSION_TTL", "1800"))
+# Headless workers are restarted after this many dispatched jobs or this much memory growth (0 disables)
+BLENDER_WORKER_MAX_JOBS = int(os.getenv("BLENDER_WORKER_MAX_JOBS", "200"))
+BLENDER_WORKER_MAX_MEMORY_GROWTH_MB = int(os.getenv("BLENDER_WORKER_MAX_MEMORY_GROWTH_MB", "2048"))
+BLENDER_WORKER_WARM_CHECK_INTERVAL = float(os.getenv("BLENDER_WORKER_WARM_CHECK_INTERVAL", "10"))
+# Seconds a fetched scene is reused before asking Blender again (mutations always invalidate it)
+SCENE_CACHE_TTL = float(os.getenv("SCENE_CACHE_TTL", "5"))
+# Whether scripts are checked against the API catalog before they run when a request does not say;
+# off until the catalog is trusted to cover the operators scripts use
+VALIDATE_CODE_DEFAULT = os.getenv("VALIDATE_CODE_DEFAULT", "false").lower() in ("1", "true", "yes")
+# Seconds an execution job may go without output before the backend stops waiting for it
+BLENDER_JOB_TIMEOUT = float(os.getenv("BLENDER_JOB_TIMEOUT", "3600"))
+# Number of finished execution jobs kept for status queries
+MAX_FINISHED_JOBS = int(os.getenv("MAX_FINISHED_JOBS", "100"))
 
 # Ollama AI Settings
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "localhost")
 OLLAMA_PORT = int(os.getenv("OLLAMA_PORT", "11434"))
 OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/chat")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mistral:latest")
+# Seconds to wait for a generation to be read and for a connection to Ollama
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+# Pooled keep-alive connections to Ollama
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "4"))
+
+# Cache of generated code: entries in memory and in the SQLite file, and seconds they are served (0 keeps them)
+# The SQLite file lives in the user's cache directory, outside the source tree; set the path empty to keep memory only
+RESPONSE_CACHE_PATH = os.getenv(
+    "RESPONSE_CACHE_PATH",
+    os.path.join(
+        os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "blender-ai-agent", "responses.sqlite3"
+    )
+) or None
+RESPONSE_CACHE_MEMORY_SIZE = int(os.getenv("RESPONSE_CACHE_MEMORY_SIZE", "256"))
+RESPONSE_CACHE_DISK_SIZE = int(os.getenv("RESPONSE_CACHE_DISK_SIZE", "10000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+# Reuse of generated code for reworded prompts: embedding model, minimum cosine similarity and prompts kept
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1000"))
+# Estimated tokens the scene may take in a prompt, and decimals its numbers are rounded to
+SCENE_CONTEXT_TOKEN_BUDGET = int(os.getenv("SCENE_CONTEXT_TOKEN_BUDGET", "1500"))
+SCENE_CONTEXT_PRECISION = int(os.getenv("SCENE_CONTEXT_PRECISION", "2"))
 
 # File Import Settings
 SUPPORTED_FILE_FORMATS = ["svg", "dxf"]
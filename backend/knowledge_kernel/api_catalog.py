@@ -0,0 +1,279 @@
+import os
+import re
+import json
+import logging
+from typing import List, Dict, Any, Optional, Iterable, FrozenSet
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+KERNEL_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(KERNEL_DIR, "data")
+CATALOG_PATH = os.path.join(DATA_DIR, "api_catalog.json")
+# Bumped when the catalog file format changes, so older files are indexed again
+CATALOG_FORMAT = 2
+
+# Documentation the catalog is indexed from: the search index and the raw scrape
+SOURCE_PATHS = [
+    os.path.join(DATA_DIR, "blender_api.json"),
+    os.path.join(DATA_DIR, "blender_api_scraped.json"),
+    os.path.join(KERNEL_DIR, "blender_api_scraped.json"),
+]
+
+# Attributes of bpy.data (bpy.types.BlendData), known even without scraped docs
+BLEND_DATA_ATTRIBUTES = frozenset([
+    "actions", "armatures", "brushes", "cache_files", "cameras", "collections", "curves",
+    "fonts", "grease_pencils", "grease_pencils_v3", "hair_curves", "images", "lattices",
+    "libraries", "lightprobes", "lights", "linestyles", "masks", "materials", "meshes",
+    "metaballs", "movieclips", "node_groups", "objects", "paint_curves", "palettes",
+    "particles", "pointclouds", "scenes", "screens", "shape_keys", "sounds", "speakers",
+    "texts", "textures", "volumes", "window_managers", "workspaces", "worlds",
+    "filepath", "is_dirty", "is_saved", "use_autopack", "version", "batch_remove",
+    "orphans_purge", "temp_data", "user_map", "file_path_map", "bl_rna", "rna_type",
+])
+
+OPERATOR_PATTERN = re.compile(r"bpy\.ops\.(\w+)\.(\w+)\(")
+# Reference page of one operator module, which documents all its operators
+MODULE_PAGE_PATTERN = re.compile(r"bpy\.ops\.(\w+)\.html")
+DATA_PATTERN = re.compile(r"bpy\.data\.(\w+)")
+KEYWORD_PATTERN = re.compile(r"^\s*(\w+)\s*(?:=|\(|:|$)")
+
+class ApiCatalog:
+    """
+    Index of the Blender API names that generated code may reference.
+
+    Operators map to the keyword arguments they accept, or None when the
+    documentation did not list them. bpy.data attributes are a plain set.
+
+    Operators also turn up in examples on other pages, so the catalog is
+    usually partial. ``complete_modules`` names the operator modules whose
+    reference page was indexed; only for those is a missing operator or
+    keyword known not to exist.
+    """
+    def __init__(
+        self,
+        operators: Optional[Dict[str, Optional[FrozenSet[str]]]] = None,
+        data_attributes: Iterable[str] = (),
+        complete_modules: Iterable[str] = ()
+    ):
+        """
+        Initialize the catalog
+
+        Args:
+            operators (Optional[Dict[str, Optional[FrozenSet[str]]]]): Keywords per operator, e.g. "mesh.primitive_cube_add"
+            data_attributes (Iterable[str]): Extra bpy.data attributes besides BLEND_DATA_ATTRIBUTES
+            complete_modules (Iterable[str]): Operator modules indexed from their reference page
+        """
+        self.operators: Dict[str, Optional[FrozenSet[str]]] = operators or {}
+        self.data_attributes = BLEND_DATA_ATTRIBUTES | frozenset(data_attributes)
+        self.complete_modules = frozenset(complete_modules)
+        # Operator names per module (the "mesh" of bpy.ops.mesh), for lookups and suggestions
+        self.modules: Dict[str, List[str]] = {}
+        for path in self.operators:
+            module, name = path.split(".", 1)
+            self.modules.setdefault(module, []).append(name)
+
+    def __len__(self) -> int:
+        return len(self.operators)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Dict[str, Any]]) -> "ApiCatalog":
+        """
+        Index operators and bpy.data attributes from API documentation
+
+        Accepts both the search index entries (name, parameters) and scraped
+        pages (title, content), whose text holds the operator signatures.
+
+        Args:
+            documents (Iterable[Dict[str, Any]]): Documentation entries
+
+        Returns:
+            ApiCatalog: The indexed catalog
+        """
+        operators: Dict[str, Optional[FrozenSet[str]]] = {}
+        data_attributes = set()
+        complete_modules = set()
+
+        def add_operator(path: str, keywords: Optional[Iterable[str]]) -> None:
+            known = operators.get(path)
+            if keywords is None:
+                operators.setdefault(path, None)
+            else:
+                operators[path] = frozenset(keywords) | (known or frozenset())
+
+        for doc in documents:
+            name = doc.get("name", "")
+            if name.startswith("bpy.ops.") and name.count(".") == 3:
+                parameters = doc.get("parameters")
+                add_operator(name[len("bpy.ops."):], _parameter_names(parameters) if parameters else None)
+            elif name.startswith("bpy.data.") and name.count(".") == 2:
+                data_attributes.add(name[len("bpy.data."):])
+
+            # Scraped reference pages hold every operator of their module
+            page = MODULE_PAGE_PATTERN.search(doc.get("url") or "")
+            if page is not None and doc.get("content"):
+                complete_modules.add(page.group(1))
+
+            text = doc.get("content") or doc.get("description") or ""
+            for match in OPERATOR_PATTERN.finditer(text):
+                signature = _read_arguments(text, match.end())
+                if signature is not None:
+                    add_operator(f"{match.group(1)}.{match.group(2)}", _signature_keywords(signature))
+            data_attributes.update(DATA_PATTERN.findall(text))
+
+        complete_modules &= {path.split(".", 1)[0] for path in operators}
+        return cls(operators, data_attributes, complete_modules)
+
+    @classmethod
+    def load(cls, path: str = CATALOG_PATH) -> "ApiCatalog":
+        """
+        Load a catalog written by ``save``
+
+        Args:
+            path (str): Path of the catalog file
+
+        Returns:
+            ApiCatalog: The loaded catalog
+
+        Raises:
+            ValueError: If the file was written in another catalog format
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("format") != CATALOG_FORMAT:
+            raise ValueError(f"catalog format {data.get('format')} is not {CATALOG_FORMAT}")
+        operators = {
+            path: frozenset(keywords) if keywords is not None else None
+            for path, keywords in data.get("operators", {}).items()
+        }
+        return cls(operators, data.get("data_attributes", []), data.get("complete_modules", []))
+
+    def save(self, path: str = CATALOG_PATH) -> None:
+        """
+        Write the catalog as JSON
+
+        Args:
+            path (str): Path of the catalog file
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = {
+            "format": CATALOG_FORMAT,
+            "operators": {
+                path: sorted(keywords) if keywords is not None else None
+                for path, keywords in sorted(self.operators.items())
+            },
+            "data_attributes": sorted(self.data_attributes - BLEND_DATA_ATTRIBUTES),
+            "complete_modules": sorted(self.complete_modules)
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+def _parameter_names(parameters: Any) -> List[str]:
+    """Get the keyword names from a search index entry's parameters"""
+    if isinstance(parameters, dict):
+        return list(parameters)
+    if isinstance(parameters, str):
+        return _signature_keywords(parameters)
+    names = []
+    for param in parameters:
+        if isinstance(param, dict):
+            name = param.get("name")
+        else:
+            match = KEYWORD_PATTERN.match(str(param))
+            name = match.group(1) if match else None
+        if name:
+            names.append(name)
+    return names
+
+def _read_arguments(text: str, start: int) -> Optional[str]:
+    """Read the argument list that starts after an opening parenthesis at text[start - 1]"""
+    depth = 1
+    for i in range(start, min(len(text), start + 4000)):
+        if text[i] in "([{":
+            depth += 1
+        elif text[i] in ")]}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i]
+    return None
+
+def _signature_keywords(signature: str) -> List[str]:
+    """Get the keyword names of a documented signature such as ``size=2.0, location=(0, 0, 0)``"""
+    keywords = []
+    depth = 0
+    part = ""
+    for char in signature + ",":
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        if char == "," and depth == 0:
+            match = re.match(r"\s*(\w+)\s*=", part)
+            if match:
+                keywords.append(match.group(1))
+            part = ""
+        else:
+            part += char
+    return keywords
+
+def build_catalog(source_paths: Optional[List[str]] = None) -> ApiCatalog:
+    """
+    Index the catalog from the knowledge kernel's documentation files
+
+    Args:
+        source_paths (Optional[List[str]]): Documentation files, SOURCE_PATHS by default
+
+    Returns:
+        ApiCatalog: The indexed catalog, holding only the built-in bpy.data
+        attributes if no documentation is available
+    """
+    documents: List[Dict[str, Any]] = []
+    for path in source_paths or SOURCE_PATHS:
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                documents.extend(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read API documentation {path}: {e}")
+    return ApiCatalog.from_documents(documents)
+
+_catalog: Optional[ApiCatalog] = None
+
+def get_catalog() -> ApiCatalog:
+    """
+    Get the API catalog, indexing the documentation on first use
+
+    The index is written to CATALOG_PATH and reused until one of the
+    documentation files changes.
+
+    Returns:
+        ApiCatalog: The shared catalog
+    """
+    global _catalog
+    if _catalog is not None:
+        return _catalog
+
+    sources = [path for path in SOURCE_PATHS if os.path.exists(path)]
+    newest_source = max((os.path.getmtime(path) for path in sources), default=0.0)
+    if os.path.exists(CATALOG_PATH) and os.path.getmtime(CATALOG_PATH) >= newest_source:
+        try:
+            _catalog = ApiCatalog.load()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load API catalog, rebuilding it: {e}")
+
+    if _catalog is None:
+        _catalog = build_catalog(sources)
+        if sources:
+            try:
+                _catalog.save()
+            except OSError as e:
+                logger.warning(f"Could not save API catalog: {e}")
+        logger.info(f"Indexed {len(_catalog)} operators from {len(sources)} documentation files")
+    return _catalog
+
+if __name__ == "__main__":
+    catalog = build_catalog()
+    catalog.save()
+    print(f"Indexed {len(catalog)} operators in {len(catalog.modules)} modules ({len(catalog.complete_modules)} complete)")
+    print(f"Catalog stored in: {CATALOG_PATH}")
@@ -1,6 +1,34 @@
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+# Loaded documentation and the modification time it was loaded at
+_api_docs_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+
+def _load_api_docs(api_docs_path: str) -> List[Dict[str, Any]]:
+    """Load the documentation file, reusing the parsed copy until the file changes"""
+    global _api_docs_cache
+    mtime = os.path.getmtime(api_docs_path)
+    if _api_docs_cache is None or _api_docs_cache[0] != mtime:
+        with open(api_docs_path, 'r', encoding='utf-8') as f:
+            _api_docs_cache = (mtime, json.load(f))
+    return _api_docs_cache[1]
+
+def api_docs_version() -> str:
+    """
+    Identify the current documentation file, which decides what ``search_blender_api`` returns
+    
+    Returns:
+        str: Modification time of the file, or "" if there is none
+    """
+    try:
+        return repr(os.path.getmtime(_api_docs_path()))
+    except OSError:
+        return ""
+
+def _api_docs_path() -> str:
+    """Path to the JSON file containing Blender API documentation"""
+    return os.path.join(os.path.dirname(__file__), "data", "blender_api.json")
 
 def search_blender_api(query: str, n: int = 10) -> List[Dict[str, Any]]:
     """
@@ -17,13 +45,12 @@ def search_blender_api(query: str, n: int = 10) -> List[Dict[str, Any]]:
     results = []
     
     # Path to the JSON file containing Blender API documentation
-    api_docs_path = os.path.join(os.path.dirname(__file__), "data", "blender_api.json")
+    api_docs_path = _api_docs_path()
     
     try:
         # Load API documentation
         if os.path.exists(api_docs_path):
-            with open(api_docs_path, 'r', encoding='utf-8') as f:
-                api_docs = json.load(f)
+            api_docs = _load_api_docs(api_docs_path)
         else:
             # Return empty results if no documentation file exists
             return []
@@ -1,7 +1,9 @@
 import os
 import json
-import requests
-from typing import List, Dict, Any, Optional
+import httpx
+import asyncio
+import contextlib
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
 import sys
 import logging
 
@@ -11,38 +13,302 @@ logger = logging.getLogger(__name__)
 # Add the parent directory to sys.path to import from knowledge_kernel
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 try:
-    from knowledge_kernel.search import search_blender_api
-    from config import OLLAMA_API_URL, OLLAMA_MODEL
+    from knowledge_kernel.search import search_blender_api, api_docs_version
+    from config import (
+        OLLAMA_API_URL, OLLAMA_MODEL, OLLAMA_TIMEOUT, OLLAMA_CONNECT_TIMEOUT, OLLAMA_MAX_CONNECTIONS,
+        RESPONSE_CACHE_PATH, RESPONSE_CACHE_MEMORY_SIZE, RESPONSE_CACHE_DISK_SIZE, RESPONSE_CACHE_TTL,
+        SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_MODEL, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE,
+        SCENE_CONTEXT_TOKEN_BUDGET, SCENE_CONTEXT_PRECISION
+    )
 except ImportError:
     # Create a dummy function if the module is not available
     def search_blender_api(query: str, n=3):
         return []
+    def api_docs_version():
+        return ""
     # Default config values if import fails
     OLLAMA_API_URL = "http://localhost:11434/api/chat"
     OLLAMA_MODEL = "mistral:latest"
+    OLLAMA_TIMEOUT = 120.0
+    OLLAMA_CONNECT_TIMEOUT = 5.0
+    OLLAMA_MAX_CONNECTIONS = 4
+    RESPONSE_CACHE_PATH = None
+    RESPONSE_CACHE_MEMORY_SIZE = 256
+    RESPONSE_CACHE_DISK_SIZE = 10000
+    RESPONSE_CACHE_TTL = 7 * 24 * 3600
+    SEMANTIC_CACHE_ENABLED = True
+    SEMANTIC_CACHE_MODEL = "all-MiniLM-L6-v2"
+    SEMANTIC_CACHE_THRESHOLD = 0.95
+    SEMANTIC_CACHE_SIZE = 1000
+    SCENE_CONTEXT_TOKEN_BUDGET = 1500
+    SCENE_CONTEXT_PRECISION = 2
+
+from services.code_validator import CodeValidator
+from services.code_optimizer import CodeOptimizer
+from services.scene_context import SceneContextBuilder
+from utils.ollama_client import OllamaClient
+from utils.response_cache import ResponseCache, normalize_prompt, scene_fingerprint
+from utils.semantic_cache import SemanticCache
+from utils.single_flight import SingleFlight
+
+# Receives each new piece of generated code while it is streamed
+CodeDeltaListener = Callable[[str], Awaitable[None]]
+
+SYSTEM_PROMPT = "You are an expert Blender Python API assistant. Your task is to generate executable Python code for Blender based on the user's request."
+
+class CodeFenceExtractor:
+    """
+    Incremental version of ``BlenderAIAgent._extract_code`` for streamed replies.
+
+    Text is fed as it arrives. ``feed`` returns the part of the first
+    ```python block that has become certain, holding back trailing
+    backticks that may start the closing fence, and ``done`` is set once
+    that fence has closed.
+    """
+    OPENING_FENCE = "```python"
+    CLOSING_FENCE = "```"
+
+    def __init__(self):
+        """Initialize the extractor before any text has arrived"""
+        self.response = ""
+        self.found = False
+        self.done = False
+        self._code_start = 0
+        self._emitted = 0
+        self._search_from = 0
+
+    @property
+    def code(self) -> str:
+        """The code extracted so far, stripped like ``_extract_code`` does"""
+        return self.response[self._code_start:self._emitted].strip() if self.found else ""
+
+    def feed(self, text: str) -> str:
+        """
+        Add streamed text
+
+        Args:
+            text (str): Next piece of the reply
+
+        Returns:
+            str: Code that became certain with this piece, possibly empty
+        """
+        if self.done:
+            return ""
+        self.response += text
+
+        if not self.found:
+            fence = self.response.find(self.OPENING_FENCE, self._search_from)
+            if fence == -1:
+                self._search_from = max(0, len(self.response) - len(self.OPENING_FENCE) + 1)
+                return ""
+            # The code starts on the line after the fence
+            line_end = self.response.find("\n", fence)
+            if line_end == -1:
+                self._search_from = fence
+                return ""
+            self.found = True
+            self._code_start = self._emitted = line_end + 1
+
+        closing = self.response.find(self.CLOSING_FENCE, self._emitted)
+        if closing != -1:
+            end = closing
+            self.done = True
+        else:
+            end = len(self.response)
+            while end > self._emitted and self.response[end - 1] == "`":
+                end -= 1
+        delta = self.response[self._emitted:end]
+        self._emitted = end
+        return delta
+
+class CodeStream:
+    """
+    Streamed code of one generation, passed on to every caller waiting for it.
+
+    Callers that join while the code is being streamed get what was sent
+    so far together with the next piece. A listener that fails is dropped
+    without stopping the generation for the others.
+    """
+    def __init__(self):
+        """Initialize a stream before any code was sent"""
+        self.sent = ""
+        self.finished = False
+        # Listener -> code it has not been sent yet
+        self._backlogs: Dict[CodeDeltaListener, str] = {}
+
+    def subscribe(self, listener: CodeDeltaListener) -> None:
+        """Pass the code to a listener, starting with what was sent so far"""
+        self._backlogs[listener] = self.sent
+
+    def unsubscribe(self, listener: CodeDeltaListener) -> None:
+        """Stop passing code to a listener"""
+        self._backlogs.pop(listener, None)
+
+    async def send(self, delta: str) -> None:
+        """Pass a new piece of code to every listener"""
+        self.sent += delta
+        for listener in list(self._backlogs):
+            text = self._backlogs.get(listener, "") + delta
+            self._backlogs[listener] = ""
+            await self._deliver(listener, text)
+
+    async def finish(self, code: str) -> None:
+        """Send listeners what they have not received yet; the whole code if nothing was streamed"""
+        self.finished = True
+        for listener, backlog in list(self._backlogs.items()):
+            text = backlog if self.sent else code
+            if text:
+                await self._deliver(listener, text)
+        self._backlogs.clear()
+
+    async def _deliver(self, listener: CodeDeltaListener, text: str) -> None:
+        """Call a listener, dropping it if it fails"""
+        try:
+            await listener(text)
+        except Exception as e:
+            logger.warning(f"Dropped code stream listener: {str(e)}")
+            self.unsubscribe(listener)
 
 class BlenderAIAgent:
-    def __init__(self, ollama_api_url: str = OLLAMA_API_URL):
+    def __init__(
+        self,
+        ollama_api_url: str = OLLAMA_API_URL,
+        response_cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None
+    ):
         """
         Initialize the Blender AI Agent
         
         Args:
             ollama_api_url (str): URL for the Ollama API
+            response_cache (Optional[ResponseCache]): Cache of generated code, configured from config by default
+            semantic_cache (Optional[SemanticCache]): Cache of generated code for reworded prompts,
+                configured from config by default
         """
         self.ollama_api_url = ollama_api_url
+        # Pooled async client, so waiting for Ollama never blocks the event loop
+        self.ollama = OllamaClient(
+            ollama_api_url,
+            timeout=OLLAMA_TIMEOUT,
+            connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+            max_connections=OLLAMA_MAX_CONNECTIONS
+        )
         self.model = OLLAMA_MODEL  # Use configured model
         self.history: List[Dict[str, Any]] = []  # Store conversation history
         self.logger = logging.getLogger(__name__)
+        self.validator = CodeValidator()
+        self.optimizer = CodeOptimizer()
+        self.scene_context = SceneContextBuilder(
+            token_budget=SCENE_CONTEXT_TOKEN_BUDGET, precision=SCENE_CONTEXT_PRECISION
+        )
+        # Generated code by prompt, model, documents and scene, kept across restarts
+        self.response_cache = response_cache or ResponseCache(
+            RESPONSE_CACHE_PATH,
+            max_memory_entries=RESPONSE_CACHE_MEMORY_SIZE,
+            max_disk_entries=RESPONSE_CACHE_DISK_SIZE,
+            ttl=RESPONSE_CACHE_TTL
+        )
+        # Generated code by prompt meaning, for prompts the exact cache does not know
+        self.semantic_cache = semantic_cache or SemanticCache(
+            SEMANTIC_CACHE_MODEL,
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            max_entries=SEMANTIC_CACHE_SIZE,
+            enabled=SEMANTIC_CACHE_ENABLED
+        )
+        # Identical generations in flight, and the code they are streaming
+        self.generations = SingleFlight()
+        self._code_streams: Dict[Tuple, CodeStream] = {}
     
     def set_model(self, model_name: str):
         """Change the LLM model"""
         self.model = model_name
     
-    def generate_code(self, prompt: str, scene_data: Optional[Dict[str, Any]] = None) -> str:
-        """Generate Blender Python code based on user prompt and optional scene data"""
+    async def generate_code(
+        self,
+        prompt: str,
+        scene_data: Optional[Dict[str, Any]] = None,
+        on_delta: Optional[CodeDeltaListener] = None,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Generate Blender Python code based on user prompt and optional scene data
+        
+        Args:
+            prompt (str): What the code should do
+            scene_data (Optional[Dict[str, Any]]): Current scene, added to the prompt
+            on_delta (Optional[CodeDeltaListener]): Stream the reply and pass each new
+                piece of code to this coroutine function; generation stops as soon as
+                the code block closes
+            use_cache (bool): Serve and store the code in the response cache
+            
+        Returns:
+            str: The generated code
+        """
+        # Hashed once per call: the content identifies the scene, a dict may be updated in place
+        fingerprint = await asyncio.to_thread(scene_fingerprint, scene_data)
+        
+        # Callers asking for the same code at the same time share one generation
+        key = (normalize_prompt(prompt), self.model, fingerprint, use_cache)
+        stream = self._code_streams.get(key)
+        if stream is None or stream.finished:
+            stream = CodeStream()
+            self._code_streams[key] = stream
+        streaming = on_delta is not None
+        
+        async def generate() -> str:
+            try:
+                code = await self._generate_code(
+                    prompt, scene_data, fingerprint, stream.send if streaming else None, use_cache
+                )
+                await stream.finish(code)
+                return code
+            finally:
+                stream.finished = True
+                if self._code_streams.get(key) is stream:
+                    del self._code_streams[key]
+        
+        if on_delta is not None:
+            stream.subscribe(on_delta)
+        try:
+            return await self.generations.run(key, generate)
+        finally:
+            if on_delta is not None:
+                stream.unsubscribe(on_delta)
+    
+    async def _generate_code(
+        self,
+        prompt: str,
+        scene_data: Optional[Dict[str, Any]],
+        fingerprint: str,
+        on_delta: Optional[CodeDeltaListener],
+        use_cache: bool
+    ) -> str:
+        """Generate code for ``generate_code``, which shares it between identical calls"""
         try:
+            # The same prompt, model, documentation and scene give the same code; the
+            # documents found depend only on the prompt, so check before searching
+            cache_key = None
+            if use_cache:
+                cache_key = self.response_cache.make_key(prompt, self.model, api_docs_version(), fingerprint)
+                cached_code = await asyncio.to_thread(self.response_cache.get, cache_key)
+                
+                # A reworded prompt for the same model and scene gives the same code
+                if cached_code is None:
+                    match = await self.semantic_cache.lookup(normalize_prompt(prompt), self.model, fingerprint)
+                    if match is not None:
+                        self.logger.info(
+                            f"Reusing code generated for '{match['prompt']}' (similarity {match['similarity']})"
+                        )
+                        cached_code = match["code"]
+                        await asyncio.to_thread(self.response_cache.put, cache_key, cached_code)
+                
+                if cached_code is not None:
+                    if on_delta is not None:
+                        await on_delta(cached_code)
+                    return cached_code
+            
             # Search for relevant API documentation
-            api_results = search_blender_api(prompt, n=2)
+            api_results = await asyncio.to_thread(search_blender_api, prompt, n=2)
             
             # Format API docs as context
             knowledge_block = ""
@@ -52,10 +318,15 @@ class BlenderAIAgent:
                 knowledge_block += f"Description: {doc.get('description', 'No description')}\n"
                 knowledge_block += f"Parameters: {doc.get('parameters', 'No parameters')}\n\n"
             
-            # Add scene data if available
+            # Add scene data if available, compacted to the token budget
             scene_context = ""
             if scene_data:
-                scene_context = f"[SCENE DATA]:\n{json.dumps(scene_data, indent=2)}\n\n"
+                context = await asyncio.to_thread(self.scene_context.build, scene_data, prompt)
+                self.logger.info(
+                    f"Scene context: {context['listed']} objects listed, {context['summarized']} summarized, "
+                    f"~{context['tokens_before']} -> ~{context['tokens_after']} tokens"
+                )
+                scene_context = f"[SCENE DATA]:\n{context['text']}\n\n"
             
             # Build the full prompt
             full_prompt = f"""[KNOWLEDGE]:
@@ -67,11 +338,19 @@ class BlenderAIAgent:
 [UITVOERBARE CODE]:
 """
             
-            # Roep Ollama API aan met de volledige prompt
-            generated_code = self._call_ollama(full_prompt)
+            if on_delta is not None:
+                cleaned_code, succeeded = await self._stream_ollama(full_prompt, on_delta)
+            else:
+                # Roep Ollama API aan met de volledige prompt
+                generated_code, succeeded = await self._call_ollama(full_prompt)
+                
+                # Extraheer de code uit het antwoord
+                cleaned_code = self._extract_code(generated_code)
             
-            # Extraheer de code uit het antwoord
-            cleaned_code = self._extract_code(generated_code)
+            # Failed calls return an error description, which is never cached
+            if cache_key is not None and succeeded and cleaned_code.strip():
+                await asyncio.to_thread(self.response_cache.put, cache_key, cleaned_code)
+                await self.semantic_cache.add(normalize_prompt(prompt), self.model, fingerprint, cleaned_code)
             
             return cleaned_code
             
@@ -79,41 +358,110 @@ class BlenderAIAgent:
             self.logger.error(f"Error generating code: {str(e)}")
             raise
     
-    def _call_ollama(self, prompt: str) -> str:
-        """Call the Ollama API and get the response"""
-        payload = {
-            "model": self.model,
-            "messages": [
-                {"role": "system", "content": "You are an expert Blender Python API assistant. Your task is to generate executable Python code for Blender based on the user's request."},
-                {"role": "user", "content": prompt}
-            ]
-        }
+    def validate_code(self, code: str) -> Dict[str, Any]:
+        """
+        Check code against the Blender API catalog before it is executed
+        
+        Args:
+            code (str): Python code to check
+            
+        Returns:
+            Dict[str, Any]: Whether the code is valid, the errors found and the warnings
+        """
+        validation = self.validator.validate(code)
+        if not validation["valid"]:
+            self.logger.info(f"Code failed validation with {len(validation['errors'])} errors")
+        return validation
+    
+    def optimize_code(self, code: str) -> Dict[str, Any]:
+        """
+        Rewrite slow bpy.ops calls in generated code to data API calls
+        
+        Args:
+            code (str): Python code to optimize
+            
+        Returns:
+            Dict[str, Any]: The optimized code and a report of the rewrites
+        """
+        return self.optimizer.optimize(code)
+    
+    async def close(self) -> None:
+        """Close the connections to Ollama and the response cache"""
+        await self.ollama.close()
+        self.response_cache.close()
+    
+    async def _call_ollama(self, prompt: str) -> Tuple[str, bool]:
+        """Call the Ollama API and get the response and whether the call succeeded"""
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
         
         try:
-            response = requests.post(self.ollama_api_url, json=payload)
-            response.raise_for_status()
-            return response.json()["message"]["content"]
-        except requests.ConnectionError as e:
+            return await self.ollama.chat(self.model, messages), True
+        except Exception as e:
+            return self._ollama_error(e), False
+    
+    async def _stream_ollama(self, prompt: str, on_delta: CodeDeltaListener) -> Tuple[str, bool]:
+        """
+        Stream the Ollama reply, passing on code as it arrives, and stop at the closing fence
+        
+        Returns:
+            Tuple[str, bool]: The code and whether the reply was received completely
+        """
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        extractor = CodeFenceExtractor()
+        succeeded = True
+        
+        try:
+            async with contextlib.aclosing(self.ollama.stream_chat(self.model, messages)) as pieces:
+                async for piece in pieces:
+                    delta = extractor.feed(piece)
+                    if delta:
+                        await on_delta(delta)
+                    if extractor.done:
+                        # Leaving the loop closes the response, which stops the generation
+                        self.logger.info("Code block closed, stopped generation early")
+                        break
+        except Exception as e:
+            if not extractor.found:
+                return self._ollama_error(e), False
+            self.logger.warning(f"Streaming from Ollama ended early: {str(e)}")
+            succeeded = False
+        
+        if extractor.found:
+            return extractor.code, succeeded and extractor.done
+        # Without a code block the whole reply is the code, as in _extract_code
+        if extractor.response:
+            await on_delta(extractor.response)
+        return extractor.response, succeeded
+    
+    def _ollama_error(self, e: Exception) -> str:
+        """Record a failed Ollama call and describe it"""
+        if isinstance(e, httpx.ConnectError):
             error_msg = f"Connection error when calling Ollama API: {e}"
             print(error_msg)
             self.history.append({"type": "error", "message": error_msg})
             return f"Connection Error: Could not connect to Ollama API. Is the service running?"
-        except requests.Timeout as e:
+        elif isinstance(e, httpx.TimeoutException):
             error_msg = f"Timeout error when calling Ollama API: {e}"
             print(error_msg)
             self.history.append({"type": "error", "message": error_msg})
             return f"Timeout Error: The request to Ollama API timed out."
-        except requests.HTTPError as e:
+        elif isinstance(e, httpx.HTTPStatusError):
             error_msg = f"HTTP error when calling Ollama API: {e}"
             print(error_msg)
             self.history.append({"type": "error", "message": error_msg})
-            return f"HTTP Error: {e.response.status_code} - {e.response.reason}"
-        except (KeyError, json.JSONDecodeError) as e:
+            return f"HTTP Error: {e.response.status_code} - {e.response.reason_phrase}"
+        elif isinstance(e, (KeyError, json.JSONDecodeError)):
             error_msg = f"Error parsing Ollama API response: {e}"
             print(error_msg)
             self.history.append({"type": "error", "message": error_msg})
             return f"Error: Received invalid response from Ollama API."
-        except Exception as e:
+        else:
             error_msg = f"Unexpected error when calling Ollama API: {e}"
             print(error_msg)
             self.history.append({"type": "error", "message": error_msg})
@@ -141,7 +489,13 @@ class BlenderAIAgent:
 
 # Example usage
 if __name__ == "__main__":
-    agent = BlenderAIAgent()
-    code = agent.generate_code("Create a red cube at the origin")
-    print("Generated code:")
-    print(code) 
\ No newline at end of file
+    async def main():
+        agent = BlenderAIAgent()
+        try:
+            code = await agent.generate_code("Create a red cube at the origin")
+            print("Generated code:")
+            print(code)
+        finally:
+            await agent.close()
+    
+    asyncio.run(main()) 
\ No newline at end of file
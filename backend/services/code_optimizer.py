@@ -0,0 +1,338 @@
+"""
+Rewrites of slow bpy.ops calls in generated Blender code to direct data API calls.
+"""
+import ast
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet
+
+from services.code_validator import collect_bpy_aliases, resolve_bpy_path
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Helpers the rewritten calls use, added once to the top of optimized code.
+# They import what they need themselves, since execute_code runs code with
+# separate globals and locals. _opt_apply_transforms falls back to the
+# operator, scoped to one object, where the data API has no exact equivalent.
+OPTIMIZER_HELPERS = '''
+def _opt_apply_transforms(location=True, rotation=True, scale=True, properties=True, objects=None, **options):
+    """Data API version of bpy.ops.object.transform_apply"""
+    import bpy
+    from mathutils import Matrix, Vector
+    if objects is None:
+        objects = bpy.context.selected_editable_objects
+    for ob in objects:
+        data = ob.data
+        # The operator applies a rotation kept apart from a non-uniform scale as is, distorting the object
+        skewed = rotation and not scale and max(ob.scale) - min(ob.scale) > 1e-6
+        if (options or skewed or ob.type not in ("MESH", "CURVE") or data.users > 1 or ob.children
+                or any(ob.delta_location) or any(ob.delta_rotation_euler) or tuple(ob.delta_scale) != (1.0, 1.0, 1.0)):
+            with bpy.context.temp_override(object=ob, active_object=ob, selected_editable_objects=[ob]):
+                bpy.ops.object.transform_apply(
+                    location=location, rotation=rotation, scale=scale, properties=properties, **options
+                )
+            continue
+        basis = ob.matrix_basis.copy()
+        loc, rot, sca = basis.decompose()
+        kept = Matrix.LocRotScale(None if location else loc, None if rotation else rot, None if scale else sca)
+        applied = kept.inverted_safe() @ basis
+        data.transform(applied, shape_keys=True)
+        if ob.type == "CURVE" and properties:
+            factor = (applied.to_3x3() @ Vector((1.0, 1.0, 1.0)).normalized()).length
+            data.extrude *= factor
+            data.bevel_depth *= factor
+        ob.matrix_basis = kept
+
+def _opt_select_all(action="TOGGLE"):
+    """Data API version of bpy.ops.object.select_all"""
+    import bpy
+    context = bpy.context
+    if action == "TOGGLE":
+        action = "DESELECT" if context.selected_objects else "SELECT"
+    if action == "DESELECT":
+        for ob in context.selected_objects:
+            ob.select_set(False)
+    elif action == "SELECT":
+        for ob in context.selectable_objects:
+            ob.select_set(True)
+    elif action == "INVERT":
+        for ob in context.selectable_objects:
+            ob.select_set(not ob.select_get())
+'''
+
+SELECT_ACTIONS = ("TOGGLE", "SELECT", "DESELECT", "INVERT")
+
+# The selected objects as far as the code proves them: the source of each
+# selected object expression, or None when the selection is not known
+Selection = Optional[FrozenSet[str]]
+
+class _OptimizationPass:
+    """One walk over the statements of a script, following the selection and collecting rewrites"""
+    def __init__(self, code: str, tree: ast.Module):
+        """
+        Prepare the walk
+
+        Args:
+            code (str): Source of the script
+            tree (ast.Module): The parsed script
+        """
+        self._code = code
+        self._aliases = collect_bpy_aliases(tree)
+        # Offset of the start of each line, to turn AST positions into string offsets
+        self.offsets = [0]
+        for line in code.splitlines(keepends=True):
+            self.offsets.append(self.offsets[-1] + len(line))
+
+    def _segment(self, node: ast.AST) -> str:
+        """Get the source of a node"""
+        offsets = self.offsets
+        return self._code[offsets[node.lineno - 1] + node.col_offset:offsets[node.end_lineno - 1] + node.end_col_offset]
+
+    def visit_body(self, body: List[ast.stmt], selection: Selection, loop_depth: int, found) -> Selection:
+        """Rewrite the calls of a statement list; returns the selection after it"""
+        for stmt in body:
+            selection = self._visit(stmt, selection, loop_depth, found)
+        return selection
+
+    def _visit(self, stmt: ast.stmt, selection: Selection, loop_depth: int, found) -> Selection:
+        """Rewrite the calls of one statement; returns the selection after it"""
+        edits, rewrites, kept = found
+
+        # Function bodies cannot see the helpers, which execute_code binds as locals
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            return selection if not stmt.decorator_list else None
+
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+            call = stmt.value
+            path = resolve_bpy_path(call.func, self._aliases)
+            if path is not None and len(path) == 4 and path[1] == "ops":
+                operator = f"{path[2]}.{path[3]}"
+                replacement = self._rewrite(operator, call, selection)
+                if replacement is not None:
+                    edits.append((
+                        self.offsets[call.lineno - 1] + call.col_offset,
+                        self.offsets[call.end_lineno - 1] + call.end_col_offset,
+                        replacement
+                    ))
+                    rewrites.append({"line": call.lineno, "operator": f"bpy.ops.{operator}", "replacement": replacement})
+                elif loop_depth:
+                    kept.append({"line": call.lineno, "operator": f"bpy.ops.{operator}"})
+                return self._selection_after_operator(operator, call, selection)
+            return self._selection_after_select_set(call, selection)
+
+        if isinstance(stmt, (ast.For, ast.While)):
+            return self._visit_loop(stmt, selection, loop_depth, found)
+
+        if isinstance(stmt, ast.If):
+            if self._has_call(stmt.test):
+                selection = None
+            after_body = self.visit_body(stmt.body, selection, loop_depth, found)
+            after_else = self.visit_body(stmt.orelse, selection, loop_depth, found)
+            return after_body if after_body == after_else else None
+
+        if isinstance(stmt, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            return self._selection_after_assignment(stmt, selection)
+
+        if isinstance(stmt, ast.Pass) or (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant)):
+            return selection
+
+        # with, try and the rest: rewrite inside, not knowing the selection
+        for field in ("body", "orelse", "finalbody"):
+            child = getattr(stmt, field, None)
+            if isinstance(child, list) and child and isinstance(child[0], ast.stmt):
+                self.visit_body(child, None, loop_depth, found)
+        for handler in getattr(stmt, "handlers", []):
+            self.visit_body(handler.body, None, loop_depth, found)
+        return None
+
+    def _visit_loop(self, loop, selection: Selection, loop_depth: int, found) -> Selection:
+        """Rewrite the calls of a loop; the selection is only known if every iteration keeps it"""
+        header = loop.iter if isinstance(loop, ast.For) else loop.test
+        jumps = any(isinstance(node, (ast.Break, ast.Continue)) for stmt in loop.body for node in ast.walk(stmt))
+        if self._has_call(header) or jumps:
+            selection = None
+        if isinstance(loop, ast.For) and selection:
+            # The loop variable names another object in every iteration
+            targets = {node.id for node in ast.walk(loop.target) if isinstance(node, ast.Name)}
+            if any(self._root(expression) in targets for expression in selection):
+                selection = None
+
+        trial = ([], [], [])
+        after = self.visit_body(loop.body, selection, loop_depth + 1, trial)
+        if after != selection:
+            # The next iteration starts with another selection than this one assumed
+            selection = None
+            trial = ([], [], [])
+            self.visit_body(loop.body, None, loop_depth + 1, trial)
+        for collected, into in zip(trial, found):
+            into.extend(collected)
+        return self.visit_body(loop.orelse, selection, loop_depth, found)
+
+    def _selection_after_operator(self, operator: str, call: ast.Call, selection: Selection) -> Selection:
+        """Get the selection after an operator call"""
+        if operator == "object.transform_apply":
+            return selection
+        if operator == "object.select_all" and self._select_action(call) == "DESELECT":
+            return frozenset()
+        return None
+
+    def _selection_after_select_set(self, call: ast.Call, selection: Selection) -> Selection:
+        """Get the selection after a call statement, which is only known for ``obj.select_set(bool)``"""
+        func = call.func
+        if selection is None or not isinstance(func, ast.Attribute) or func.attr != "select_set":
+            return None
+        arguments = list(call.args) + [keyword.value for keyword in call.keywords if keyword.arg == "state"]
+        if len(arguments) != 1 or len(call.args) + len(call.keywords) != 1:
+            return None
+        state = arguments[0]
+        if not isinstance(state, ast.Constant) or not isinstance(state.value, bool):
+            return None
+        obj = self._plain_expression(func.value)
+        if obj is None:
+            return None
+        return selection | {obj} if state.value else selection - {obj}
+
+    def _selection_after_assignment(self, stmt: ast.stmt, selection: Selection) -> Selection:
+        """Get the selection after an assignment, which calls and hiding objects may change"""
+        if selection is None or self._has_call(stmt):
+            return None
+        targets = stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]
+        for target in targets:
+            for node in ast.walk(target):
+                # Hidden objects drop out of the objects operators act on
+                if isinstance(node, ast.Attribute) and node.attr.startswith("hide"):
+                    return None
+                if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                    if any(self._root(expression) == node.id for expression in selection):
+                        return None
+        return selection
+
+    def _plain_expression(self, node: ast.expr) -> Optional[str]:
+        """Get the source of a name or attribute chain, which can be evaluated again without side effects"""
+        value = node
+        while isinstance(value, ast.Attribute):
+            value = value.value
+        return self._segment(node) if isinstance(value, ast.Name) else None
+
+    def _root(self, expression: str) -> str:
+        """Get the name an attribute chain starts at"""
+        return expression.split(".", 1)[0].strip()
+
+    def _has_call(self, node: ast.AST) -> bool:
+        """Whether an expression or statement calls anything"""
+        return any(isinstance(child, ast.Call) for child in ast.walk(node))
+
+    def _select_action(self, call: ast.Call) -> Optional[str]:
+        """Get the action of a select_all call, or None if it is not a constant"""
+        if call.args:
+            return None
+        action = "TOGGLE"
+        for keyword in call.keywords:
+            if keyword.arg != "action" or not isinstance(keyword.value, ast.Constant):
+                return None
+            action = keyword.value.value
+        return action if action in SELECT_ACTIONS else None
+
+    def _rewrite(self, operator: str, call: ast.Call, selection: Selection) -> Optional[str]:
+        """Get the data API replacement of one operator call, or None if it is kept"""
+        # Positional arguments are the execution context and undo flag, which the rewrite cannot honour
+        if call.args or any(keyword.arg is None for keyword in call.keywords):
+            return None
+
+        if operator == "object.transform_apply":
+            # Only where the objects the operator would act on are known
+            if selection is None or len(selection) != 1:
+                return None
+            arguments = [f"{keyword.arg}={self._segment(keyword.value)}" for keyword in call.keywords]
+            arguments.append(f"objects=[{next(iter(selection))}]")
+            return f"_opt_apply_transforms({', '.join(arguments)})"
+
+        if operator == "object.select_all":
+            action = self._select_action(call)
+            return f"_opt_select_all({action!r})" if action is not None else None
+
+        return None
+
+class CodeOptimizer:
+    """
+    Rewrites bpy.ops calls in generated code to direct data API calls.
+
+    Every operator call pushes an undo step, runs its poll and re-evaluates
+    the depsgraph, which makes per-object operator loops quadratic in large
+    scenes. The optimizer recognizes:
+
+    - ``bpy.ops.object.transform_apply(...)``: the transform is baked into the
+      object data with a matrix. The operator acts on every selected object,
+      so the call is only rewritten where the code provably selected exactly
+      one object, e.g. ``select_all(action='DESELECT')`` followed by
+      ``obj.select_set(True)``.
+    - ``bpy.ops.object.select_all(action=...)``: selection is set per object.
+
+    The selection is followed statement by statement. Assignments without
+    calls leave it alone; any other call makes it unknown, and so does a
+    loop whose body does not end with the selection it started with. Only
+    calls used as statements outside function and class bodies, with
+    keywords the rewrite understands, are rewritten. Source outside the
+    rewritten calls, including comments, is left as it is. Other operators
+    called in loops are reported but kept.
+    """
+    def optimize(self, code: str) -> Dict[str, Any]:
+        """
+        Rewrite the operator calls in code that have a data API equivalent
+
+        Args:
+            code (str): Python code to optimize
+
+        Returns:
+            Dict[str, Any]: The optimized ``code``, whether it ``changed``, the
+            ``rewrites`` made, the operators ``kept`` in loops and the time taken
+        """
+        start = time.perf_counter()
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            # Invalid code is left for the validator to report
+            return {"code": code, "changed": False, "rewrites": [], "kept": [], "duration_ms": 0.0}
+
+        rewriter = _OptimizationPass(code, tree)
+        edits: List[Tuple[int, int, str]] = []
+        rewrites: List[Dict[str, Any]] = []
+        kept: List[Dict[str, Any]] = []
+        # The selection of the scene the code runs in is not known
+        rewriter.visit_body(tree.body, None, 0, (edits, rewrites, kept))
+
+        if not edits:
+            return {
+                "code": code, "changed": False, "rewrites": [], "kept": kept,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3)
+            }
+
+        optimized = code
+        for begin, end, replacement in sorted(edits, reverse=True):
+            optimized = optimized[:begin] + replacement + optimized[end:]
+        optimized = self._insert_helpers(optimized, tree, rewriter.offsets)
+
+        logger.info(f"Rewrote {len(rewrites)} operator calls to data API calls")
+        return {
+            "code": optimized,
+            "changed": True,
+            "rewrites": sorted(rewrites, key=lambda rewrite: rewrite["line"]),
+            "kept": kept,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+
+    def _insert_helpers(self, code: str, tree: ast.Module, offsets: List[int]) -> str:
+        """Add the helper definitions after the leading docstring and imports"""
+        position = 0
+        for stmt in tree.body:
+            is_docstring = isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str)
+            is_future = isinstance(stmt, ast.ImportFrom) and stmt.module == "__future__"
+            if not (is_docstring or is_future or isinstance(stmt, (ast.Import, ast.ImportFrom))):
+                break
+            position = offsets[stmt.end_lineno]
+        # Edits only change text after the leading imports, so their offsets still hold
+        prefix = code[:position]
+        if prefix and not prefix.endswith("\n"):
+            prefix += "\n"
+        return prefix + OPTIMIZER_HELPERS + code[position:]
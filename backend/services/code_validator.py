@@ -0,0 +1,200 @@
+"""
+Static checks of generated Blender code before it is sent to Blender.
+"""
+import ast
+import time
+import difflib
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from knowledge_kernel.api_catalog import ApiCatalog, get_catalog
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def collect_bpy_aliases(tree: ast.AST) -> Dict[str, Tuple[str, ...]]:
+    """
+    Map the names code binds to bpy, bpy.ops, bpy.data and their members to their paths
+
+    Args:
+        tree (ast.AST): Parsed code
+
+    Returns:
+        Dict[str, Tuple[str, ...]]: Dotted path per name, e.g. ``{"D": ("bpy", "data")}``
+    """
+    aliases: Dict[str, Tuple[str, ...]] = {}
+    # Imports first, so assignments such as ``D = bpy.data`` resolve through them
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name == "bpy" or alias.name.startswith("bpy."):
+                    if alias.asname:
+                        aliases[alias.asname] = tuple(alias.name.split("."))
+                    else:
+                        aliases["bpy"] = ("bpy",)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            if node.module == "bpy" or node.module.startswith("bpy."):
+                for alias in node.names:
+                    aliases[alias.asname or alias.name] = tuple(node.module.split(".")) + (alias.name,)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            path = resolve_bpy_path(node.value, aliases)
+            if path is not None and len(path) <= 3 and path[1:2] in ((), ("ops",), ("data",)):
+                aliases[node.targets[0].id] = path
+    return aliases
+
+def resolve_bpy_path(node: ast.AST, aliases: Dict[str, Tuple[str, ...]]) -> Optional[Tuple[str, ...]]:
+    """
+    Get the dotted bpy path of an attribute chain
+
+    Args:
+        node (ast.AST): Expression such as ``bpy.ops.object.join``
+        aliases (Dict[str, Tuple[str, ...]]): Names bound to bpy paths, from ``collect_bpy_aliases``
+
+    Returns:
+        Optional[Tuple[str, ...]]: The path, or None if the chain does not start at bpy
+    """
+    parts: List[str] = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name) or node.id not in aliases:
+        return None
+    return aliases[node.id] + tuple(reversed(parts))
+
+class CodeValidator:
+    """
+    Checks bpy.ops and bpy.data references in code against the API catalog.
+
+    The code is parsed with ``ast`` and never run. Every ``bpy.data.<attribute>``
+    must exist. A ``bpy.ops.<module>.<name>`` call is only rejected when the
+    catalog indexed the reference page of its whole module and the operator,
+    or a keyword passed to it, is not on it. The catalog is otherwise partial,
+    so unknown operators of other modules are reported as warnings and never
+    make the code invalid.
+    """
+    def __init__(self, catalog: Optional[ApiCatalog] = None):
+        """
+        Initialize the validator
+
+        Args:
+            catalog (Optional[ApiCatalog]): Catalog to check against, the knowledge kernel's by default
+        """
+        self._catalog = catalog
+
+    @property
+    def catalog(self) -> ApiCatalog:
+        """The catalog, indexed on first use"""
+        if self._catalog is None:
+            self._catalog = get_catalog()
+        return self._catalog
+
+    def validate(self, code: str) -> Dict[str, Any]:
+        """
+        Check code without running it
+
+        Args:
+            code (str): Python code to check
+
+        Returns:
+            Dict[str, Any]: ``valid``, the list of ``errors`` (each with line, column,
+            kind, name, message and an optional suggestion), the non-blocking
+            ``warnings`` in the same shape, the number of API references checked
+            and the time taken
+        """
+        start = time.perf_counter()
+        errors: List[Dict[str, Any]] = []
+        warnings: List[Dict[str, Any]] = []
+        checked = 0
+        try:
+            tree = ast.parse(code)
+        except SyntaxError as e:
+            errors.append(self._error(
+                e.lineno or 0, (e.offset or 1) - 1, "syntax_error", None, e.msg or "Invalid syntax"
+            ))
+        else:
+            aliases = collect_bpy_aliases(tree)
+            calls = {id(node.func): node for node in ast.walk(tree) if isinstance(node, ast.Call)}
+            for node in ast.walk(tree):
+                if not isinstance(node, ast.Attribute):
+                    continue
+                path = resolve_bpy_path(node, aliases)
+                if path is None or len(path) < 3:
+                    continue
+                if path[1] == "ops" and len(path) == 4:
+                    checked += 1
+                    issues = self._check_operator(node, path, calls.get(id(node)))
+                    (errors if path[2] in self.catalog.complete_modules else warnings).extend(issues)
+                elif path[1] == "data" and len(path) == 3:
+                    checked += 1
+                    errors.extend(self._check_data(node, path[2]))
+
+        return {
+            "valid": not errors,
+            "errors": errors,
+            "warnings": warnings,
+            "checked": checked,
+            "catalog_operators": len(self.catalog),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+
+    def _check_operator(self, node: ast.Attribute, path: Tuple[str, ...], call: Optional[ast.Call]) -> List[Dict[str, Any]]:
+        """Check one bpy.ops.<module>.<name> reference and the keywords of its call against the catalog"""
+        catalog = self.catalog
+        if not catalog.operators:
+            return []
+
+        module, name = path[2], path[3]
+        operator = f"{module}.{name}"
+        if module not in catalog.modules:
+            return [self._error(
+                node.lineno, node.col_offset, "unknown_operator_module", f"bpy.ops.{module}",
+                f"bpy.ops has no operator module '{module}'",
+                self._suggest(module, catalog.modules, "bpy.ops.")
+            )]
+        if operator not in catalog.operators:
+            return [self._error(
+                node.lineno, node.col_offset, "unknown_operator", f"bpy.ops.{operator}",
+                f"bpy.ops.{module} has no operator '{name}'",
+                self._suggest(name, catalog.modules[module], f"bpy.ops.{module}.")
+            )]
+
+        keywords = catalog.operators[operator]
+        if call is None or keywords is None:
+            return []
+        errors = []
+        for keyword in call.keywords:
+            # ``**options`` cannot be checked statically
+            if keyword.arg is None or keyword.arg in keywords:
+                continue
+            errors.append(self._error(
+                keyword.value.lineno, keyword.value.col_offset, "unknown_keyword", f"bpy.ops.{operator}",
+                f"bpy.ops.{operator} has no keyword argument '{keyword.arg}'",
+                self._suggest(keyword.arg, keywords, "")
+            ))
+        return errors
+
+    def _check_data(self, node: ast.Attribute, attribute: str) -> List[Dict[str, Any]]:
+        """Check one bpy.data.<attribute> reference"""
+        if attribute in self.catalog.data_attributes:
+            return []
+        return [self._error(
+            node.lineno, node.col_offset, "unknown_data_attribute", f"bpy.data.{attribute}",
+            f"bpy.data has no attribute '{attribute}'",
+            self._suggest(attribute, self.catalog.data_attributes, "bpy.data.")
+        )]
+
+    def _suggest(self, name: str, candidates, prefix: str) -> Optional[str]:
+        """Get the closest known name, if any is close"""
+        matches = difflib.get_close_matches(name, list(candidates), n=1)
+        return f"{prefix}{matches[0]}" if matches else None
+
+    def _error(
+        self, line: int, column: int, kind: str, name: Optional[str], message: str, suggestion: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build a structured validation error"""
+        error = {"line": line, "column": column, "kind": kind, "name": name, "message": message}
+        if suggestion:
+            error["suggestion"] = suggestion
+            error["message"] += f" (did you mean {suggestion}?)"
+        return error
@@ -5,6 +5,8 @@ from typing import Dict, List, Optional, Any
 from fastapi import UploadFile
 import logging
 
+from services.code_optimizer import CodeOptimizer
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +24,9 @@ class BlenderFileImporter:
         # Store a list of imported files for cleanup
         self.imported_files: List[str] = []
         
+        # Rewrites the per-object operator calls of the import code to data API calls
+        self.optimizer = CodeOptimizer()
+        
     async def import_and_process(self, file: UploadFile, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Import a file and process it in Blender
@@ -57,11 +62,13 @@ class BlenderFileImporter:
                 options = {}
             
             import_code = self._generate_import_code(temp_file_path, file_extension, options)
+            optimization = self.optimizer.optimize(import_code)
             
             return {
                 "status": "success",
                 "message": f"File {file.filename} imported successfully",
-                "code": import_code,
+                "code": optimization["code"],
+                "optimizations": optimization["rewrites"],
                 "file_path": temp_file_path,
                 "file_size": len(file_content),
                 "file_type": file_extension
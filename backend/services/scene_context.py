@@ -0,0 +1,260 @@
+"""
+Compact, token-budgeted scene descriptions for LLM prompts.
+"""
+import re
+import json
+import time
+import logging
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Scene keys that describe the transfer, not the scene
+SKIPPED_SCENE_KEYS = ("objects", "version", "instance", "since_version", "delta")
+
+# Words in prompts that refer to object types
+TYPE_WORDS = {
+    "MESH": ("mesh", "meshes", "cube", "cubes", "sphere", "spheres", "plane", "planes", "cylinder", "cone", "torus", "monkey"),
+    "CURVE": ("curve", "curves", "bezier", "path"),
+    "SURFACE": ("surface", "surfaces", "nurbs"),
+    "META": ("metaball", "metaballs"),
+    "FONT": ("text", "texts", "font"),
+    "ARMATURE": ("armature", "armatures", "rig", "bone", "bones", "skeleton"),
+    "LATTICE": ("lattice", "lattices"),
+    "EMPTY": ("empty", "empties"),
+    "GPENCIL": ("grease", "gpencil", "stroke", "strokes"),
+    "CAMERA": ("camera", "cameras"),
+    "LIGHT": ("light", "lights", "lamp", "lamps", "sun", "spot"),
+    "LIGHT_PROBE": ("probe", "probes"),
+    "SPEAKER": ("speaker", "speakers", "sound"),
+}
+
+# Word pieces, single digits and punctuation, roughly how LLM tokenizers split text
+TOKEN_PATTERN = re.compile(r"[A-Za-z]{1,4}|\d|[^\sA-Za-z\d]")
+# Trailing ".001"-style numbers Blender adds to duplicate names
+NAME_SUFFIX_PATTERN = re.compile(r"[.\-_ ]?\d+$")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many tokens an LLM tokenizer makes of a text
+
+    Letters count one token per four, digits and punctuation one each,
+    which is close to the Llama and Mistral tokenizers on scene data.
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        int: Estimated number of tokens
+    """
+    return len(TOKEN_PATTERN.findall(text))
+
+class SceneContextBuilder:
+    """
+    Turns scene data into the scene part of a code generation prompt.
+
+    Instead of indented JSON, objects become rows of a ``|``-separated table
+    with rounded numbers. Objects the prompt mentions by name or type come
+    first; the rows stop at the token budget and the objects left out are
+    summarized by type and name, with the area they occupy.
+    """
+    def __init__(self, token_budget: int = 1500, precision: int = 2, max_summary_groups: int = 10):
+        """
+        Initialize the builder
+
+        Args:
+            token_budget (int): Estimated tokens the scene context may take
+            precision (int): Decimals numbers are rounded to
+            max_summary_groups (int): Name groups listed in the summary of left out objects
+        """
+        self.token_budget = token_budget
+        self.precision = precision
+        self.max_summary_groups = max_summary_groups
+        self.builds = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.build_time = 0.0
+        self.last: Dict[str, Any] = {}
+
+    def build(self, scene_data: Dict[str, Any], prompt: str = "") -> Dict[str, Any]:
+        """
+        Describe a scene for a prompt within the token budget
+
+        Args:
+            scene_data (Dict[str, Any]): Scene data as returned by introspect_scene
+            prompt (str): Request the code is generated for, to pick relevant objects
+
+        Returns:
+            Dict[str, Any]: The ``text`` to add to the prompt, the objects ``listed``
+            and ``summarized``, the estimated ``tokens_before`` (indented JSON) and
+            ``tokens_after``, and the time taken
+        """
+        start = time.perf_counter()
+        objects = [info for info in scene_data.get("objects") or [] if isinstance(info, dict)]
+        header = self._header(scene_data, len(objects))
+        columns = self._columns(objects)
+        table_header = "|".join(columns)
+
+        ordered, relevant, named = self._order(objects, prompt)
+        # The summary of every object is about as long as any summary, so keep room for it
+        reserve = estimate_tokens(self._summary(objects)) if objects else 0
+        used = estimate_tokens(header) + estimate_tokens(table_header) + 2 + reserve
+        rows: List[str] = []
+        listed = 0
+        for info in ordered:
+            row = "|".join(self._cell(info.get(column)) for column in columns)
+            cost = estimate_tokens(row) + 1
+            # Objects the prompt names are listed even beyond the budget
+            if used + cost > self.token_budget and listed >= named:
+                break
+            rows.append(row)
+            used += cost
+            listed += 1
+
+        lines = [header]
+        if rows:
+            lines.append(f"Objects ({listed} of {len(objects)}):")
+            lines.append(table_header)
+            lines.extend(rows)
+        if listed < len(objects):
+            lines.append(self._summary(ordered[listed:]))
+        text = "\n".join(lines)
+
+        # Measured on every build: a scene dict can be updated in place, and versions
+        # of different Blender instances overlap, so neither identifies the content.
+        # Whitespace is not counted, so compact JSON counts the same as indented JSON
+        tokens_before = estimate_tokens(json.dumps(scene_data, separators=(",", ":"), default=str))
+        result = {
+            "text": text,
+            "listed": listed,
+            "relevant": relevant,
+            "summarized": len(objects) - listed,
+            "tokens_before": tokens_before,
+            "tokens_after": estimate_tokens(text),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+        self.builds += 1
+        self.tokens_before += result["tokens_before"]
+        self.tokens_after += result["tokens_after"]
+        self.build_time += time.perf_counter() - start
+        self.last = {key: value for key, value in result.items() if key != "text"}
+        return result
+
+    def _header(self, scene_data: Dict[str, Any], object_count: int) -> str:
+        """Describe the scene settings on one line"""
+        settings = [
+            f"{key}={self._cell(value)}" for key, value in scene_data.items()
+            if key not in SKIPPED_SCENE_KEYS and key != "name"
+        ]
+        name = scene_data.get("name", "Scene")
+        if "objects_count" not in scene_data:
+            settings.append(f"objects_count={object_count}")
+        return f"Scene {name}: {', '.join(settings)}"
+
+    def _columns(self, objects: List[Dict[str, Any]]) -> List[str]:
+        """Get the fields of the objects, in the order they first appear"""
+        columns: Dict[str, None] = {}
+        for info in objects:
+            for key in info:
+                columns.setdefault(key, None)
+        return list(columns)
+
+    def _cell(self, value: Any) -> str:
+        """Format a value for the table: rounded numbers, lists joined without spaces"""
+        if value is None:
+            return "-"
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, float):
+            rounded = round(value, self.precision)
+            return str(int(rounded)) if rounded.is_integer() else f"{rounded:.{self.precision}f}".rstrip("0")
+        if isinstance(value, (list, tuple)):
+            separator = ";" if any(isinstance(item, (list, tuple)) for item in value) else ","
+            return separator.join(self._cell(item) for item in value)
+        if isinstance(value, dict):
+            return ",".join(f"{key}:{self._cell(item)}" for key, item in value.items())
+        return str(value).replace("|", "/").replace("\n", " ")
+
+    def _order(self, objects: List[Dict[str, Any]], prompt: str) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Sort the objects the prompt refers to first
+
+        Objects named in full come first, then those sharing a word of their
+        name with the prompt (rarer words first), then those of a type the
+        prompt mentions.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], int, int]: The objects in order, how many
+            the prompt refers to and how many it names in full
+        """
+        lowered = prompt.lower()
+        words = set(re.findall(r"[a-z0-9]+", lowered))
+        types = {object_type for object_type, type_words in TYPE_WORDS.items() if words.intersection(type_words)}
+        types.update(word.upper() for word in words if word.upper() in TYPE_WORDS)
+
+        name_words = [
+            {word for word in re.findall(r"[a-z0-9]+", str(info.get("name", "")).lower()) if not word.isdigit()}
+            for info in objects
+        ]
+        # A prompt word shared by many names ("cube" for Cube.0001...) says little about any one of them
+        frequency = Counter(word for shared in name_words for word in shared.intersection(words))
+
+        scored: List[Tuple[int, float, int, Dict[str, Any]]] = []
+        for index, info in enumerate(objects):
+            name = str(info.get("name", "")).lower()
+            shared = name_words[index].intersection(words)
+            if shared and re.search(r"(?<!\w)" + re.escape(name) + r"(?!\w)", lowered):
+                tier = 3
+            elif shared:
+                tier = 2
+            elif info.get("type") in types:
+                tier = 1
+            else:
+                tier = 0
+            weight = sum(1.0 / frequency[word] for word in shared)
+            scored.append((-tier, -weight, index, info))
+        scored.sort(key=lambda item: item[:3])
+
+        relevant = sum(1 for tier, _, _, _ in scored if tier < 0)
+        named = sum(1 for tier, _, _, _ in scored if tier == -3)
+        return [info for _, _, _, info in scored], relevant, named
+
+    def _summary(self, objects: List[Dict[str, Any]]) -> str:
+        """Summarize objects that are not listed by type, name and location"""
+        types = Counter(str(info.get("type", "?")) for info in objects)
+        groups = Counter(NAME_SUFFIX_PATTERN.sub("", str(info.get("name", ""))) or "?" for info in objects)
+        parts = [f"Not listed: {len(objects)} objects"]
+        parts.append("types " + ", ".join(f"{object_type} {count}" for object_type, count in types.most_common()))
+        shown = groups.most_common(self.max_summary_groups)
+        names = ", ".join(f"{name}* {count}" if count > 1 else name for name, count in shown)
+        if len(groups) > len(shown):
+            names += f", {len(groups) - len(shown)} more names"
+        parts.append(f"names {names}")
+
+        locations = [info["location"] for info in objects if isinstance(info.get("location"), (list, tuple))]
+        if locations and all(len(location) == 3 for location in locations):
+            bounds = [
+                f"{axis} {self._cell(min(location[i] for location in locations))}..{self._cell(max(location[i] for location in locations))}"
+                for i, axis in enumerate("xyz")
+            ]
+            parts.append("locations " + " ".join(bounds))
+        return "; ".join(parts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get builder statistics
+
+        Returns:
+            Dict[str, Any]: Budget, number of builds, mean estimated tokens before
+            and after compaction, mean build time and the figures of the last build
+        """
+        return {
+            "token_budget": self.token_budget,
+            "builds": self.builds,
+            "avg_tokens_before": round(self.tokens_before / self.builds) if self.builds else 0,
+            "avg_tokens_after": round(self.tokens_after / self.builds) if self.builds else 0,
+            "avg_build_ms": round(self.build_time / self.builds * 1000, 3) if self.builds else 0.0,
+            "last": self.last
+        }
@@ -0,0 +1,403 @@
+"""
+Connection pool for the backend to Blender WebSocket link.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, AsyncIterator
+from websockets.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from utils.websocket_utils import BlenderConnection, BlenderConnectionLost, ConnectionResult
+from utils.circuit_breaker import CircuitBreaker, CLOSED, OPEN
+from utils import wire_format
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class BlenderConnectionPool:
+    """
+    Pool of persistent, health-checked WebSocket connections to the Blender agent.
+
+    Each connection is a multiplexed ``BlenderConnection``, so requests are
+    pipelined over the least busy open socket. A new socket is only opened
+    when every existing one already has requests in flight, up to ``size``.
+
+    A background supervisor owns link health: it connects, pings idle
+    connections and reconnects with exponential backoff. While the link is
+    down the circuit breaker is open and requests fail immediately instead
+    of waiting on connection attempts.
+    """
+    def __init__(
+        self,
+        ws_url: str,
+        size: int = 4,
+        health_check_interval: float = 15.0,
+        connect_timeout: float = 5.0,
+        request_timeout: float = 120.0,
+        breaker: Optional[CircuitBreaker] = None,
+        encodings: Optional[List[str]] = None
+    ):
+        """
+        Initialize the connection pool
+
+        Args:
+            ws_url (str): WebSocket URL of the Blender agent
+            size (int): Maximum number of open connections
+            health_check_interval (float): Seconds between pings of idle connections
+            connect_timeout (float): Seconds to wait for a new connection
+            request_timeout (float): Seconds to wait for Blender to answer a request
+            breaker (Optional[CircuitBreaker]): Circuit breaker guarding the link
+            encodings (Optional[List[str]]): Wire encodings to offer Blender, in order of preference
+        """
+        self.ws_url = ws_url
+        self.size = max(1, size)
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.encodings = encodings or wire_format.available_encodings()
+
+        self._connections: Set[BlenderConnection] = set()
+        self._connect_lock = asyncio.Lock()
+        self._supervisor_task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.breaker = breaker or CircuitBreaker()
+
+        # Statistics
+        self._requests = 0
+        self._reused = 0
+        self._created = 0
+        self._reconnects = 0
+        self._health_check_failures = 0
+
+    async def start(self) -> None:
+        """Start the background supervisor, which connects to Blender without blocking"""
+        if self._supervisor_task is None:
+            self._supervisor_task = asyncio.create_task(self._supervise())
+
+    async def close(self) -> None:
+        """Stop the supervisor and close every pooled connection"""
+        if self._supervisor_task is not None:
+            self._supervisor_task.cancel()
+            try:
+                await self._supervisor_task
+            except asyncio.CancelledError:
+                pass
+            self._supervisor_task = None
+
+        for conn in list(self._connections):
+            await self._discard(conn)
+        logger.info("Blender connection pool closed")
+
+    async def send(self, action: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send an action to Blender over a pooled connection
+
+        A pooled socket that turns out to be stale is replaced transparently.
+        A request is never retried once it has been written to the socket, so
+        non-idempotent actions such as ``execute_code`` run at most once.
+
+        Args:
+            action (str): Action to perform
+            data (Dict[str, Any]): Data to send
+
+        Returns:
+            Dict[str, Any]: Response from Blender
+        """
+        if not self.breaker.allow_request():
+            return {
+                "status": "error",
+                "message": "Blender link is down, retrying in "
+                           f"{self.breaker.seconds_until_retry():.1f}s"
+            }
+
+        message = {"action": action, "data": data}
+        self._requests += 1
+
+        for attempt in range(2):
+            try:
+                conn = await self._get_connection()
+            except Exception as e:
+                logger.error(f"Error connecting to Blender WebSocket: {str(e)}")
+                self._link_failed(str(e))
+                return {"status": "error", "message": "Could not connect to Blender"}
+
+            if conn.uses:
+                self._reused += 1
+            try:
+                response = await conn.request(message, timeout=self.request_timeout)
+                self.breaker.record_success()
+                return response
+            except ConnectionClosed:
+                # Raised by send(), so Blender never saw this request
+                await self._discard(conn)
+                if attempt == 0:
+                    self._reconnects += 1
+                    logger.info("Pooled Blender connection was stale, reconnecting")
+                    continue
+                logger.error("WebSocket connection closed while communicating with Blender")
+                return {"status": "error", "message": "WebSocket connection closed"}
+            except BlenderConnectionLost:
+                await self._discard(conn)
+                self._link_failed("WebSocket connection closed")
+                logger.error("WebSocket connection closed while communicating with Blender")
+                return {"status": "error", "message": "WebSocket connection closed"}
+            except asyncio.TimeoutError:
+                logger.error(f"Timed out waiting for Blender to answer '{action}'")
+                return {"status": "error", "message": "Timed out waiting for Blender"}
+            except Exception as e:
+                logger.error(f"Error communicating with Blender: {str(e)}")
+                return {"status": "error", "message": str(e)}
+
+        return {"status": "error", "message": "Could not connect to Blender"}
+
+    async def stream(
+        self,
+        action: str,
+        data: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send an action to Blender and yield its response frames as they arrive
+
+        Like ``send``, a stale pooled socket is replaced before the request is
+        written. Failures are yielded as a final error frame.
+
+        Args:
+            action (str): Action to perform
+            data (Dict[str, Any]): Data to send
+            timeout (Optional[float]): Seconds to wait for each frame, request_timeout by default
+
+        Yields:
+            Dict[str, Any]: Chunk frames, then the end marker or an error
+        """
+        if not self.breaker.allow_request():
+            yield {
+                "status": "error",
+                "message": "Blender link is down, retrying in "
+                           f"{self.breaker.seconds_until_retry():.1f}s"
+            }
+            return
+
+        message = {"action": action, "data": data}
+        self._requests += 1
+
+        for attempt in range(2):
+            try:
+                conn = await self._get_connection()
+            except Exception as e:
+                logger.error(f"Error connecting to Blender WebSocket: {str(e)}")
+                self._link_failed(str(e))
+                yield {"status": "error", "message": "Could not connect to Blender"}
+                return
+
+            if conn.uses:
+                self._reused += 1
+            try:
+                async for frame in conn.stream(message, timeout=timeout or self.request_timeout):
+                    yield frame
+                self.breaker.record_success()
+                return
+            except ConnectionClosed:
+                # Raised by send(), so Blender never saw this request
+                await self._discard(conn)
+                if attempt == 0:
+                    self._reconnects += 1
+                    logger.info("Pooled Blender connection was stale, reconnecting")
+                    continue
+                logger.error("WebSocket connection closed while communicating with Blender")
+                yield {"status": "error", "message": "WebSocket connection closed"}
+                return
+            except BlenderConnectionLost:
+                await self._discard(conn)
+                self._link_failed("WebSocket connection closed")
+                logger.error("WebSocket connection closed while streaming from Blender")
+                yield {"status": "error", "message": "WebSocket connection closed"}
+                return
+            except asyncio.TimeoutError:
+                logger.error(f"Timed out waiting for Blender to stream '{action}'")
+                yield {"status": "error", "message": "Timed out waiting for Blender"}
+                return
+            except Exception as e:
+                logger.error(f"Error streaming from Blender: {str(e)}")
+                yield {"status": "error", "message": str(e)}
+                return
+
+    async def check(self) -> ConnectionResult:
+        """
+        Check that Blender is reachable through the pool
+
+        Returns:
+            ConnectionResult: Result of the connection check
+        """
+        if self.breaker.state != CLOSED:
+            return {
+                "success": False,
+                "error": f"Blender link at {self.ws_url} is down: {self.breaker.last_error}",
+                "timestamp": datetime.now().isoformat()
+            }
+
+        try:
+            await self._get_connection()
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error connecting to {self.ws_url}: {str(e)}",
+                "timestamp": datetime.now().isoformat()
+            }
+
+        return {
+            "success": True,
+            "message": f"Successfully connected to {self.ws_url}",
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage statistics
+
+        Returns:
+            Dict[str, Any]: Pool size, connection counts and reuse rate
+        """
+        busy = sum(1 for conn in self._connections if conn.in_flight)
+        return {
+            "url": self.ws_url,
+            "pool_size": self.size,
+            "open_connections": len(self._connections),
+            "idle_connections": len(self._connections) - busy,
+            "in_use_connections": busy,
+            "in_flight": sum(conn.in_flight for conn in self._connections),
+            "encodings": sorted({conn.encoding for conn in self._connections}),
+            "requests": self._requests,
+            "connections_created": self._created,
+            "reused": self._reused,
+            "reuse_rate": self._reused / self._requests if self._requests else 0.0,
+            "reconnects": self._reconnects,
+            "health_check_failures": self._health_check_failures,
+            "link": self.get_link_state()
+        }
+
+    def get_link_state(self) -> Dict[str, Any]:
+        """
+        Get the health of the link to Blender
+
+        Returns:
+            Dict[str, Any]: Link state (up, connecting, down or probing) and breaker details
+        """
+        if self.breaker.state == CLOSED:
+            state = "up" if any(not c.closed for c in self._connections) else "connecting"
+        elif self.breaker.state == OPEN:
+            state = "down"
+        else:
+            state = "probing"
+        return {
+            "url": self.ws_url,
+            "state": state,
+            "breaker": self.breaker.get_stats()
+        }
+
+    async def _open(self) -> BlenderConnection:
+        """Open a new connection to Blender"""
+        websocket = await asyncio.wait_for(
+            connect(self.ws_url, ping_timeout=10, max_size=None),
+            self.connect_timeout
+        )
+        conn = BlenderConnection(websocket)
+        if self.encodings != [wire_format.JSON]:
+            try:
+                await conn.negotiate(self.encodings, timeout=self.connect_timeout)
+            except Exception as e:
+                await conn.close()
+                raise ConnectionError(f"Wire format negotiation failed: {str(e)}")
+        self._connections.add(conn)
+        self._created += 1
+        logger.info(
+            f"Opened pooled connection to Blender ({len(self._connections)}/{self.size}, "
+            f"{conn.encoding})"
+        )
+        return conn
+
+    def _pick(self) -> Optional[BlenderConnection]:
+        """Return the least busy open connection if it should take the next request"""
+        for conn in [c for c in self._connections if c.closed]:
+            self._connections.discard(conn)
+
+        if not self._connections:
+            return None
+        conn = min(self._connections, key=lambda c: c.in_flight)
+        if conn.in_flight == 0 or len(self._connections) >= self.size:
+            return conn
+        return None
+
+    async def _get_connection(self) -> BlenderConnection:
+        """Pick an open connection for a request or open a new one"""
+        conn = self._pick()
+        if conn is None:
+            async with self._connect_lock:
+                conn = self._pick()
+                if conn is None:
+                    return await self._open()
+        return conn
+
+    async def _discard(self, conn: BlenderConnection) -> None:
+        """Close a connection and forget about it"""
+        self._connections.discard(conn)
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+    def _link_failed(self, error: str) -> None:
+        """Record a link failure and let the supervisor take over"""
+        self.breaker.record_failure(error)
+        self._wakeup.set()
+
+    async def _probe(self) -> None:
+        """Try to bring up a connection and update the breaker with the outcome"""
+        was_down = self.breaker.state != CLOSED
+        try:
+            await self._get_connection()
+        except Exception as e:
+            if not was_down:
+                logger.warning(f"Blender link at {self.ws_url} is down: {str(e)}")
+            self.breaker.trip(str(e))
+            logger.info(f"Retrying Blender link in {self.breaker.retry_delay:.1f}s")
+            return
+
+        if was_down:
+            logger.info(f"Blender link at {self.ws_url} restored")
+        self.breaker.record_success()
+
+    async def _ping_idle(self) -> None:
+        """Ping idle connections and drop the ones that do not answer"""
+        if any(c.in_flight for c in self._connections):
+            # Blender is busy with a request; a headless agent running a long job
+            # cannot answer pings until it is done, which says nothing about the link
+            return
+        for conn in list(self._connections):
+            try:
+                pong = await conn.websocket.ping()
+                await asyncio.wait_for(pong, self.connect_timeout)
+            except Exception as e:
+                self._health_check_failures += 1
+                logger.warning(f"Dropping unhealthy Blender connection: {str(e)}")
+                await self._discard(conn)
+
+    async def _supervise(self) -> None:
+        """Keep the link to Blender up, reconnecting with exponential backoff"""
+        while True:
+            if self.breaker.state != CLOSED:
+                await asyncio.sleep(self.breaker.seconds_until_retry())
+                self.breaker.begin_probe()
+                await self._probe()
+                continue
+
+            if not any(not c.closed for c in self._connections):
+                await self._probe()
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.health_check_interval)
+            except asyncio.TimeoutError:
+                await self._ping_idle()
+            self._wakeup.clear()
@@ -0,0 +1,557 @@
+"""
+Routing of requests across several Blender agent instances.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple, AsyncIterator
+
+from utils.blender_pool import BlenderConnectionPool
+from utils.circuit_breaker import CircuitBreaker, CLOSED
+from utils.websocket_utils import ConnectionResult
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Session shared by requests that do not carry a session id
+DEFAULT_SESSION = "default"
+
+class HeadlessBlenderProcess:
+    """
+    A ``blender -b`` process running the agent's WebSocket server
+    """
+    def __init__(self, executable: str, startup_script: str, port: int, host: str = "localhost"):
+        """
+        Describe a headless Blender worker process
+
+        Args:
+            executable (str): Path to the Blender executable
+            startup_script (str): Script that starts the agent server (tmp/start_blender.py)
+            port (int): Port the agent server listens on
+            host (str): Host the agent server binds to
+        """
+        self.executable = executable
+        self.startup_script = startup_script
+        self.host = host
+        self.port = port
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.started_at: Optional[datetime] = None
+        # Jobs run and resident memory after the first job since the last (re)start
+        self.jobs_run = 0
+        self.baseline_rss: Optional[int] = None
+        self.restarts = 0
+
+    @property
+    def ws_url(self) -> str:
+        """WebSocket URL of the agent server in this process"""
+        return f"ws://{self.host}:{self.port}"
+
+    @property
+    def alive(self) -> bool:
+        """Whether the process is running"""
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        """Launch Blender in background mode with the agent server preloaded"""
+        env = dict(os.environ, BLENDER_WS_HOST=self.host, BLENDER_WS_PORT=str(self.port))
+        self.process = await asyncio.create_subprocess_exec(
+            self.executable, "-b", "--python", self.startup_script,
+            env=env,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        self.started_at = datetime.now()
+        self.jobs_run = 0
+        self.baseline_rss = None
+        logger.info(f"Launched headless Blender (pid {self.process.pid}) on {self.ws_url}")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Terminate the process, killing it if it does not exit in time
+
+        Args:
+            timeout (float): Seconds to wait after terminating before killing
+        """
+        if not self.alive:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        logger.info(f"Stopped headless Blender on {self.ws_url}")
+
+    def rss_bytes(self) -> Optional[int]:
+        """
+        Get the resident memory of the process
+
+        Returns:
+            Optional[int]: Resident set size in bytes, or None if it cannot be read
+            (the process is not running, or /proc is not available)
+        """
+        if not self.alive:
+            return None
+        try:
+            with open(f"/proc/{self.process.pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError, AttributeError):
+            return None
+
+class BlenderWorker:
+    """
+    One Blender agent endpoint with its connection pool and load metrics
+    """
+    def __init__(self, name: str, pool: BlenderConnectionPool, process: Optional[HeadlessBlenderProcess] = None):
+        """
+        Initialize the worker
+
+        Args:
+            name (str): Name used in logs and metrics
+            pool (BlenderConnectionPool): Connection pool to the endpoint
+            process (Optional[HeadlessBlenderProcess]): Process to manage, if the backend launched it
+        """
+        self.name = name
+        self.pool = pool
+        self.process = process
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        # Set while a managed process is being recycled
+        self.draining = False
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the link to this worker is accepting requests"""
+        return self.pool.breaker.state == CLOSED and not self.draining
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get load metrics for this worker
+
+        Returns:
+            Dict[str, Any]: Queue depth, request counts and latency
+        """
+        rss = self.process.rss_bytes() if self.process else None
+        return {
+            "name": self.name,
+            "url": self.pool.ws_url,
+            "managed_process": self.process is not None,
+            "pid": self.process.process.pid if self.process and self.process.alive else None,
+            "draining": self.draining,
+            "jobs_since_start": self.process.jobs_run if self.process else None,
+            "restarts": self.process.restarts if self.process else None,
+            "rss_mb": round(rss / 2 ** 20, 1) if rss is not None else None,
+            "link": self.pool.get_link_state()["state"],
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.total_time / self.requests * 1000, 2) if self.requests else 0.0
+        }
+
+class BlenderWorkerPool:
+    """
+    Routes requests across several Blender agent instances.
+
+    A request that carries a session id is pinned to the worker that served
+    the session before, so stateful scene edits stay on one Blender; a new
+    session goes to the healthy worker with the fewest queued requests.
+    Requests without a session id share a default session that starts on
+    the primary (first) worker. Sessions only go to managed headless
+    workers when there is no other endpoint.
+
+    Independent jobs sent with ``dispatch`` go to the least busy headless
+    worker instead. Headless processes are kept running, and recycled after
+    ``max_jobs_per_worker`` jobs or once their memory has grown by more
+    than ``max_memory_growth`` bytes since their first job, as soon as no
+    job is in flight on them and no session is pinned to them.
+    """
+    def __init__(
+        self,
+        workers: List[BlenderWorker],
+        session_ttl: float = 1800.0,
+        max_jobs_per_worker: int = 0,
+        max_memory_growth: int = 0,
+        warm_check_interval: float = 10.0
+    ):
+        """
+        Initialize the worker pool
+
+        Args:
+            workers (List[BlenderWorker]): Workers to route between
+            session_ttl (float): Seconds of inactivity after which a session affinity expires
+            max_jobs_per_worker (int): Dispatched jobs after which a headless worker is restarted, 0 for no limit
+            max_memory_growth (int): Memory growth in bytes after which a headless worker is restarted, 0 for no limit
+            warm_check_interval (float): Seconds between checks that headless processes are still running
+        """
+        if not workers:
+            raise ValueError("BlenderWorkerPool needs at least one worker")
+        self.workers = workers
+        self.session_ttl = session_ttl
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_memory_growth = max_memory_growth
+        self.warm_check_interval = warm_check_interval
+        self._sessions: Dict[str, Tuple[BlenderWorker, float]] = {}
+        self._keep_warm_task: Optional[asyncio.Task] = None
+        self._recycle_tasks: Set[asyncio.Task] = set()
+        self.recycled = 0
+
+    @classmethod
+    def from_config(
+        cls,
+        ws_urls: List[str],
+        headless_workers: int = 0,
+        blender_executable: str = "blender",
+        startup_script: str = "",
+        headless_base_port: int = 9877,
+        session_ttl: float = 1800.0,
+        max_jobs_per_worker: int = 0,
+        max_memory_growth: int = 0,
+        warm_check_interval: float = 10.0,
+        breaker_options: Optional[Dict[str, Any]] = None,
+        **pool_options: Any
+    ) -> "BlenderWorkerPool":
+        """
+        Build a worker pool from configured endpoints and headless workers to launch
+
+        Args:
+            ws_urls (List[str]): WebSocket URLs of already running Blender agents
+            headless_workers (int): Number of ``blender -b`` workers to launch
+            blender_executable (str): Path to the Blender executable
+            startup_script (str): Script that starts the agent server in Blender
+            headless_base_port (int): Port of the first headless worker
+            session_ttl (float): Seconds of inactivity after which a session affinity expires
+            max_jobs_per_worker (int): Dispatched jobs after which a headless worker is restarted, 0 for no limit
+            max_memory_growth (int): Memory growth in bytes after which a headless worker is restarted, 0 for no limit
+            warm_check_interval (float): Seconds between checks that headless processes are still running
+            breaker_options (Optional[Dict[str, Any]]): Options for each worker's CircuitBreaker
+            **pool_options: Options for each worker's BlenderConnectionPool
+
+        Returns:
+            BlenderWorkerPool: The configured pool
+        """
+        breaker_options = breaker_options or {}
+        workers = []
+        for i, url in enumerate(ws_urls):
+            pool = BlenderConnectionPool(url, breaker=CircuitBreaker(**breaker_options), **pool_options)
+            workers.append(BlenderWorker(f"blender-{i}", pool))
+        for i in range(headless_workers):
+            process = HeadlessBlenderProcess(blender_executable, startup_script, headless_base_port + i)
+            pool = BlenderConnectionPool(process.ws_url, breaker=CircuitBreaker(**breaker_options), **pool_options)
+            workers.append(BlenderWorker(f"headless-{i}", pool, process))
+        return cls(
+            workers,
+            session_ttl=session_ttl,
+            max_jobs_per_worker=max_jobs_per_worker,
+            max_memory_growth=max_memory_growth,
+            warm_check_interval=warm_check_interval
+        )
+
+    @property
+    def ws_url(self) -> str:
+        """WebSocket URL of the primary worker"""
+        return self.workers[0].pool.ws_url
+
+    async def start(self) -> None:
+        """Launch managed processes and start supervising every worker's link"""
+        for worker in self.workers:
+            if worker.process is not None:
+                try:
+                    await worker.process.start()
+                except Exception as e:
+                    logger.error(f"Could not launch headless Blender for {worker.name}: {str(e)}")
+            await worker.pool.start()
+        if any(worker.process is not None for worker in self.workers):
+            self._keep_warm_task = asyncio.create_task(self._keep_warm())
+
+    async def close(self) -> None:
+        """Close every worker's connections and stop managed processes"""
+        for task in [self._keep_warm_task, *self._recycle_tasks]:
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._keep_warm_task = None
+        for worker in self.workers:
+            await worker.pool.close()
+            if worker.process is not None:
+                await worker.process.stop()
+
+    async def send(
+        self,
+        action: str,
+        data: Dict[str, Any],
+        session_id: Optional[str] = None,
+        worker: Optional[BlenderWorker] = None
+    ) -> Dict[str, Any]:
+        """
+        Send an action to the best worker
+
+        Args:
+            action (str): Action to perform
+            data (Dict[str, Any]): Data to send
+            session_id (Optional[str]): Session to keep on one worker
+            worker (Optional[BlenderWorker]): Worker picked beforehand with ``route``
+
+        Returns:
+            Dict[str, Any]: Response from Blender
+        """
+        if worker is None:
+            worker = self.route(session_id)
+        worker.queue_depth += 1
+        worker.max_queue_depth = max(worker.max_queue_depth, worker.queue_depth)
+        start = time.perf_counter()
+        try:
+            response = await worker.pool.send(action, data)
+        finally:
+            worker.queue_depth -= 1
+            worker.requests += 1
+            worker.total_time += time.perf_counter() - start
+
+        if "error" in response or response.get("status") == "error":
+            worker.errors += 1
+        return response
+
+    async def stream(
+        self,
+        action: str,
+        data: Dict[str, Any],
+        session_id: Optional[str] = None,
+        worker: Optional[BlenderWorker] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send an action to the best worker and yield its response frames
+
+        Args:
+            action (str): Action to perform
+            data (Dict[str, Any]): Data to send
+            session_id (Optional[str]): Session to keep on one worker
+            worker (Optional[BlenderWorker]): Worker picked beforehand with ``route``
+            timeout (Optional[float]): Seconds to wait for each frame, the pool's request timeout by default
+
+        Yields:
+            Dict[str, Any]: Chunk frames, then the end marker or an error
+        """
+        if worker is None:
+            worker = self.route(session_id)
+        worker.queue_depth += 1
+        worker.max_queue_depth = max(worker.max_queue_depth, worker.queue_depth)
+        start = time.perf_counter()
+        try:
+            async for frame in worker.pool.stream(action, data, timeout=timeout):
+                if "error" in frame or frame.get("status") == "error":
+                    worker.errors += 1
+                yield frame
+        finally:
+            worker.queue_depth -= 1
+            worker.requests += 1
+            worker.total_time += time.perf_counter() - start
+
+    def pick_worker(self) -> BlenderWorker:
+        """
+        Pick the worker for an independent job: the least busy headless worker
+        whose link is up, falling back to the least loaded worker without headless workers
+
+        Returns:
+            BlenderWorker: The worker that should run the job
+        """
+        headless = [w for w in self.workers if w.process is not None]
+        if not headless:
+            return self._least_loaded()
+        candidates = (
+            [w for w in headless if w.healthy and w.pool.get_link_state()["state"] == "up"]
+            or [w for w in headless if w.healthy]
+            or headless
+        )
+        return min(candidates, key=lambda w: (w.queue_depth, w.requests))
+
+    async def dispatch(
+        self,
+        action: str,
+        data: Dict[str, Any],
+        worker: Optional[BlenderWorker] = None
+    ) -> Dict[str, Any]:
+        """
+        Run an independent job (no session state) on a headless worker
+
+        Args:
+            action (str): Action to perform, e.g. execute_code or render
+            data (Dict[str, Any]): Data to send
+            worker (Optional[BlenderWorker]): Worker picked beforehand with ``pick_worker``
+
+        Returns:
+            Dict[str, Any]: Response from Blender
+        """
+        if worker is None:
+            worker = self.pick_worker()
+        response = await self.send(action, data, worker=worker)
+        if worker.process is not None:
+            self._job_finished(worker)
+        return response
+
+    async def recycle(self, worker: BlenderWorker, reason: str) -> None:
+        """
+        Restart a headless worker's process once its queued requests are done
+
+        Args:
+            worker (BlenderWorker): Worker to restart
+            reason (str): Why the worker is recycled, for the log
+        """
+        if worker.process is None or worker.draining:
+            return
+        worker.draining = True
+        logger.info(f"Recycling {worker.name}: {reason}")
+        try:
+            while worker.queue_depth:
+                await asyncio.sleep(0.1)
+            await worker.pool.close()
+            await worker.process.stop()
+            await worker.process.start()
+            worker.process.restarts += 1
+            self.recycled += 1
+            await worker.pool.start()
+        except Exception as e:
+            logger.error(f"Could not restart headless Blender for {worker.name}: {str(e)}")
+        finally:
+            worker.draining = False
+
+    def _job_finished(self, worker: BlenderWorker) -> None:
+        """Count a dispatched job and recycle the worker if it reached a limit"""
+        process = worker.process
+        process.jobs_run += 1
+        rss = process.rss_bytes()
+        if process.baseline_rss is None:
+            process.baseline_rss = rss
+
+        reason = None
+        if self.max_jobs_per_worker and process.jobs_run >= self.max_jobs_per_worker:
+            reason = f"ran {process.jobs_run} jobs"
+        elif (
+            self.max_memory_growth and rss is not None and process.baseline_rss is not None
+            and rss - process.baseline_rss > self.max_memory_growth
+        ):
+            reason = f"memory grew by {(rss - process.baseline_rss) / 2 ** 20:.0f} MB"
+        # Only a worker with no other job in flight and no pinned session is recycled;
+        # otherwise a later job finds the limit still reached
+        if (
+            reason is not None and not worker.draining and not worker.queue_depth
+            and not self._has_sessions(worker)
+        ):
+            task = asyncio.create_task(self.recycle(worker, reason))
+            self._recycle_tasks.add(task)
+            task.add_done_callback(self._recycle_tasks.discard)
+
+    async def _keep_warm(self) -> None:
+        """Restart headless processes that have exited"""
+        while True:
+            await asyncio.sleep(self.warm_check_interval)
+            for worker in self.workers:
+                # Requests still in flight fail on their own first; the next check restarts the process
+                if worker.queue_depth:
+                    continue
+                if worker.process is not None and not worker.draining and not worker.process.alive:
+                    logger.warning(f"Headless Blender for {worker.name} exited")
+                    await self.recycle(worker, "process exited")
+
+    async def check(self) -> ConnectionResult:
+        """
+        Check that at least one worker is reachable
+
+        Returns:
+            ConnectionResult: Result of the connection check
+        """
+        results = [await worker.pool.check() for worker in self.workers]
+        for result in results:
+            if result.get("success"):
+                return result
+        return results[0]
+
+    def get_link_state(self) -> Dict[str, Any]:
+        """
+        Get the combined link health of all workers
+
+        Returns:
+            Dict[str, Any]: Overall state plus the state of each worker
+        """
+        links = {worker.name: worker.pool.get_link_state() for worker in self.workers}
+        states = {link["state"] for link in links.values()}
+        if states == {"up"}:
+            state = "up"
+        elif "up" in states:
+            state = "degraded"
+        elif "connecting" in states or "probing" in states:
+            state = "connecting"
+        else:
+            state = "down"
+        return {"state": state, "workers": links}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get routing statistics and per-worker metrics
+
+        Returns:
+            Dict[str, Any]: Worker metrics, connection pool stats and session count
+        """
+        self._expire_sessions()
+        return {
+            "workers": [
+                {**worker.get_stats(), "pool": worker.pool.get_stats()}
+                for worker in self.workers
+            ],
+            "sessions": len(self._sessions),
+            "recycled": self.recycled
+        }
+
+    def route(self, session_id: Optional[str] = None) -> BlenderWorker:
+        """
+        Pick the worker for a request, honouring session affinity
+
+        Args:
+            session_id (Optional[str]): Session to keep on one worker, None for the default session
+
+        Returns:
+            BlenderWorker: The worker that should serve the request
+        """
+        now = time.monotonic()
+        if session_id is None:
+            # Sessionless calls that read and then change the scene must reach the same Blender
+            session_id = DEFAULT_SESSION
+        entry = self._sessions.get(session_id)
+        if entry is not None and entry[0].healthy and now - entry[1] < self.session_ttl:
+            self._sessions[session_id] = (entry[0], now)
+            return entry[0]
+
+        # Managed headless workers are recycled, which would wipe a session's scene
+        candidates = [w for w in self.workers if w.process is None] or self.workers
+        if session_id == DEFAULT_SESSION and candidates[0].healthy:
+            worker = candidates[0]
+        else:
+            worker = self._least_loaded(candidates)
+        self._expire_sessions()
+        self._sessions[session_id] = (worker, now)
+        return worker
+
+    def _least_loaded(self, workers: Optional[List[BlenderWorker]] = None) -> BlenderWorker:
+        """Get the healthy worker with the fewest queued requests, out of ``workers`` or all of them"""
+        workers = workers or self.workers
+        candidates = [w for w in workers if w.healthy] or workers
+        return min(candidates, key=lambda w: (w.queue_depth, w.requests))
+
+    def _has_sessions(self, worker: BlenderWorker) -> bool:
+        """Whether a session that has not expired is pinned to a worker"""
+        self._expire_sessions()
+        return any(pinned is worker for pinned, _ in self._sessions.values())
+
+    def _expire_sessions(self) -> None:
+        """Forget session affinities that have been idle for longer than the TTL"""
+        now = time.monotonic()
+        for session_id in [s for s, (_, seen) in self._sessions.items() if now - seen >= self.session_ttl]:
+            del self._sessions[session_id]
@@ -0,0 +1,124 @@
+"""
+Circuit breaker with exponential backoff for links to external services.
+"""
+import time
+from typing import Dict, Any, Optional
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures of a link and stops traffic while it is down.
+
+    The breaker opens after ``failure_threshold`` consecutive failures. While
+    open, callers fail fast; after the backoff delay one probe may run in the
+    half-open state. A failed probe reopens the breaker with a doubled delay,
+    capped at ``max_delay``; a success closes it and resets the delay.
+    """
+    def __init__(self, failure_threshold: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            failure_threshold (int): Consecutive failures before the breaker opens
+            base_delay (float): Seconds to wait before the first probe
+            max_delay (float): Upper bound for the backoff delay in seconds
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.rejected = 0
+
+    @property
+    def retry_delay(self) -> float:
+        """Backoff delay for the current open period"""
+        return min(self.base_delay * (2 ** max(0, self.trips - 1)), self.max_delay)
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may go through, counting rejections
+
+        Returns:
+            bool: True if the breaker is closed
+        """
+        if self.state == CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def seconds_until_retry(self) -> float:
+        """
+        Get the remaining backoff time before the next probe
+
+        Returns:
+            float: Seconds until a probe is due, 0 if one may run now
+        """
+        if self.state != OPEN or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.retry_delay - time.monotonic())
+
+    def begin_probe(self) -> None:
+        """Move an open breaker to half-open while a probe runs"""
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call"""
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self.last_error = None
+
+    def trip(self, error: Optional[str] = None) -> None:
+        """
+        Open the breaker immediately, regardless of the failure count
+
+        Args:
+            error (Optional[str]): Description of the failure
+        """
+        self.failures += 1
+        self.last_error = error
+        self.state = OPEN
+        self.trips += 1
+        self.opened_at = time.monotonic()
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        """
+        Count a failed call and open the breaker if needed
+
+        Args:
+            error (Optional[str]): Description of the failure
+        """
+        self.failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.trips += 1
+            self.opened_at = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the breaker state
+
+        Returns:
+            Dict[str, Any]: State, failure counts and backoff information
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "retry_delay": self.retry_delay if self.state != CLOSED else 0.0,
+            "seconds_until_retry": round(self.seconds_until_retry(), 3),
+            "rejected_requests": self.rejected,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,248 @@
+"""
+Asynchronous execution jobs run by the Blender agent.
+"""
+import uuid
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Set
+
+from utils.blender_workers import BlenderWorkerPool, BlenderWorker
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Receives job events: job_status, job_output and job_finished messages
+JobListener = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class ExecutionJob:
+    """
+    Backend record of a script running in Blender as a job
+    """
+    def __init__(self, code: str, worker: BlenderWorker, session_id: Optional[str] = None):
+        """
+        Initialize a submitted job
+
+        Args:
+            code (str): Python code to execute
+            worker (BlenderWorker): Worker the job runs on
+            session_id (Optional[str]): Session that submitted the job
+        """
+        self.job_id = uuid.uuid4().hex
+        self.code = code
+        self.worker = worker
+        self.session_id = session_id
+        self.status = "submitted"
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.stdout: List[str] = []
+        self.stderr: List[str] = []
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.listeners: Set[JobListener] = set()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the job has finished, failed or been cancelled"""
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self, include_output: bool = False) -> Dict[str, Any]:
+        """
+        Describe the job
+
+        Args:
+            include_output (bool): Include everything written to stdout and stderr
+
+        Returns:
+            Dict[str, Any]: Id, status, worker, timestamps and result
+        """
+        info = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "worker": self.worker.name,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "result": self.result,
+            "error": self.error
+        }
+        if include_output:
+            info["stdout"] = "".join(self.stdout)
+            info["stderr"] = "".join(self.stderr)
+        return info
+
+class JobManager:
+    """
+    Submits scripts to Blender as jobs and tracks them.
+
+    Each job's progress stream from Blender is consumed by a background
+    task, which records output and status and forwards them to the job's
+    listeners, so the caller that submitted the job does not wait for it.
+    """
+    def __init__(
+        self,
+        pool: BlenderWorkerPool,
+        job_timeout: float = 3600.0,
+        max_finished: int = 100,
+        on_finish: Optional[Callable[[ExecutionJob], None]] = None
+    ):
+        """
+        Initialize the job manager
+
+        Args:
+            pool (BlenderWorkerPool): Workers to run jobs on
+            job_timeout (float): Seconds a job may go without output before it is given up on
+            max_finished (int): Number of finished jobs kept for status queries
+            on_finish (Optional[Callable[[ExecutionJob], None]]): Called when a job ends
+        """
+        self.pool = pool
+        self.job_timeout = job_timeout
+        self.max_finished = max_finished
+        self.on_finish = on_finish
+        self.jobs: Dict[str, ExecutionJob] = {}
+
+    def submit(self, code: str, session_id: Optional[str] = None, listener: Optional[JobListener] = None) -> ExecutionJob:
+        """
+        Start a job without waiting for it
+
+        Args:
+            code (str): Python code to execute
+            session_id (Optional[str]): Session whose Blender worker runs the job
+            listener (Optional[JobListener]): Receives the job's events
+
+        Returns:
+            ExecutionJob: The submitted job
+        """
+        job = ExecutionJob(code, self.pool.route(session_id), session_id)
+        if listener is not None:
+            job.listeners.add(listener)
+        self.jobs[job.job_id] = job
+        self._prune()
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[ExecutionJob]:
+        """
+        Look up a job
+
+        Args:
+            job_id (str): Id of the job
+
+        Returns:
+            Optional[ExecutionJob]: The job, or None if it is unknown
+        """
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """
+        Describe all known jobs, oldest first
+
+        Returns:
+            List[Dict[str, Any]]: Job descriptions without output
+        """
+        return [job.to_dict() for job in self.jobs.values()]
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        Ask Blender to stop a job at its next cancellation point
+
+        Args:
+            job_id (str): Id of the job
+
+        Returns:
+            Dict[str, Any]: Response from Blender, or an error for unknown or finished jobs
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"error": f"Unknown job: {job_id}"}
+        if job.done:
+            return {"error": f"Job {job_id} has already {job.status}"}
+        return await self.pool.send("cancel_job", {"job_id": job_id}, worker=job.worker)
+
+    def subscribe(self, job_id: str, listener: JobListener) -> Optional[ExecutionJob]:
+        """
+        Forward a job's future events to a listener
+
+        Args:
+            job_id (str): Id of the job
+            listener (JobListener): Receives the job's events
+
+        Returns:
+            Optional[ExecutionJob]: The job, or None if it is unknown
+        """
+        job = self.jobs.get(job_id)
+        if job is not None and not job.done:
+            job.listeners.add(listener)
+        return job
+
+    def unsubscribe(self, listener: JobListener) -> None:
+        """
+        Stop forwarding events of any job to a listener
+
+        Args:
+            listener (JobListener): Listener to remove
+        """
+        for job in self.jobs.values():
+            job.listeners.discard(listener)
+
+    async def close(self) -> None:
+        """Stop following running jobs"""
+        for job in self.jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+
+    async def _run(self, job: ExecutionJob) -> None:
+        """Consume a job's progress stream from Blender"""
+        data = {"job_id": job.job_id, "code": job.code}
+        try:
+            async for frame in self.pool.stream("run_job", data, worker=job.worker, timeout=self.job_timeout):
+                if "stream" in frame:
+                    text = frame.get("data", "")
+                    (job.stdout if frame["stream"] == "stdout" else job.stderr).append(text)
+                    await self._notify(job, {
+                        "type": "job_output", "job_id": job.job_id, "stream": frame["stream"], "data": text
+                    })
+                elif "status" in frame and "chunk" in frame:
+                    job.status = frame["status"]
+                    await self._notify(job, {"type": "job_status", "job_id": job.job_id, "status": job.status})
+                elif "job" in frame:
+                    job.status = frame["job"].get("status", job.status)
+                elif "result" in frame:
+                    job.status = frame["result"].get("status", job.status)
+                    job.result = frame["result"].get("result")
+                    job.error = frame["result"].get("error")
+                else:
+                    job.status = "failed"
+                    job.error = frame.get("error") or frame.get("message", "Job failed")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error following job {job.job_id}: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+
+        if not job.done:
+            # The stream ended without a final status
+            job.status = "failed"
+            job.error = job.error or "Lost track of the job"
+        job.finished_at = datetime.now()
+        logger.info(f"Job {job.job_id} {job.status} on {job.worker.name}")
+        if self.on_finish is not None:
+            self.on_finish(job)
+        await self._notify(job, {"type": "job_finished", "job": job.to_dict()})
+        job.listeners.clear()
+
+    async def _notify(self, job: ExecutionJob, event: Dict[str, Any]) -> None:
+        """Send an event to every listener of a job, dropping listeners that fail"""
+        for listener in list(job.listeners):
+            try:
+                await listener(event)
+            except Exception as e:
+                logger.warning(f"Dropping listener of job {job.job_id}: {str(e)}")
+                job.listeners.discard(listener)
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond max_finished"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
@@ -0,0 +1,179 @@
+"""
+Asynchronous client for the Ollama chat API.
+"""
+import json
+import time
+import logging
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+import httpx
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class OllamaClient:
+    """
+    Pooled asyncio HTTP client for Ollama.
+
+    One ``httpx.AsyncClient`` is shared by all requests, so connections to
+    Ollama are kept alive and reused, and waiting for a generation never
+    blocks the event loop. The client is created on first use, inside the
+    running loop, and closed with ``close``.
+
+    ``stream_chat`` yields the reply as Ollama generates it. Closing its
+    generator early closes the HTTP response, which makes Ollama stop
+    generating.
+    """
+    def __init__(
+        self,
+        api_url: str,
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 4,
+        keepalive_expiry: float = 60.0
+    ):
+        """
+        Initialize the client
+
+        Args:
+            api_url (str): URL of the Ollama chat endpoint
+            timeout (float): Seconds to wait for a response to be read
+            connect_timeout (float): Seconds to wait for a connection to Ollama
+            max_connections (int): Maximum number of open connections
+            keepalive_expiry (float): Seconds an idle connection is kept open
+        """
+        self.api_url = api_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.total_time = 0.0
+        self.streams = 0
+        self.aborted_streams = 0
+        self.first_tokens = 0
+        self.first_token_time = 0.0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared HTTP client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def chat(self, model: str, messages: List[Dict[str, str]], timeout: Optional[float] = None) -> str:
+        """
+        Ask Ollama for a chat completion
+
+        Args:
+            model (str): Name of the model
+            messages (List[Dict[str, str]]): Chat messages with role and content
+            timeout (Optional[float]): Read timeout for this request instead of the default
+
+        Returns:
+            str: Content of the reply
+
+        Raises:
+            httpx.HTTPError: If Ollama cannot be reached, times out or answers with an error
+            KeyError: If the response has no message content
+        """
+        payload = {"model": model, "messages": messages, "stream": False}
+        request_timeout = self.timeout if timeout is None else httpx.Timeout(timeout, connect=self.timeout.connect)
+        self.requests += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(self.api_url, json=payload, timeout=request_timeout)
+            response.raise_for_status()
+            return response.json()["message"]["content"]
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_time += time.perf_counter() - start
+
+    async def stream_chat(
+        self, model: str, messages: List[Dict[str, str]], timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Ask Ollama for a chat completion and yield it piece by piece
+
+        Args:
+            model (str): Name of the model
+            messages (List[Dict[str, str]]): Chat messages with role and content
+            timeout (Optional[float]): Read timeout between pieces instead of the default
+
+        Yields:
+            str: Content of the reply as it is generated
+
+        Raises:
+            httpx.HTTPError: If Ollama cannot be reached, times out or answers with an error
+            RuntimeError: If Ollama reports an error during generation
+        """
+        payload = {"model": model, "messages": messages, "stream": True}
+        request_timeout = self.timeout if timeout is None else httpx.Timeout(timeout, connect=self.timeout.connect)
+        self.requests += 1
+        self.streams += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        first_token = True
+        try:
+            async with self.client.stream("POST", self.api_url, json=payload, timeout=request_timeout) as response:
+                response.raise_for_status()
+                # Ollama streams one JSON object per line
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(f"Ollama error: {chunk['error']}")
+                    content = chunk.get("message", {}).get("content", "")
+                    if content:
+                        if first_token:
+                            self.first_tokens += 1
+                            self.first_token_time += time.perf_counter() - start
+                            first_token = False
+                        yield content
+                    if chunk.get("done"):
+                        break
+        except GeneratorExit:
+            # The caller stopped reading; leaving the block above closed the response
+            self.aborted_streams += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_time += time.perf_counter() - start
+
+    async def close(self) -> None:
+        """Close the pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get client statistics
+
+        Returns:
+            Dict[str, Any]: Request, failure and in-flight counts, the mean request
+            time, and for streamed requests the mean time to the first token and
+            the number stopped early
+        """
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "avg_request_ms": round(self.total_time / self.requests * 1000, 3) if self.requests else 0.0,
+            "streams": self.streams,
+            "aborted_streams": self.aborted_streams,
+            "avg_first_token_ms": round(self.first_token_time / self.first_tokens * 1000, 3) if self.first_tokens else 0.0
+        }
@@ -0,0 +1,280 @@
+"""
+Two-tier cache of generated code, kept in memory and on disk.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Scene keys that change without the scene itself changing
+VOLATILE_SCENE_KEYS = ("version", "instance", "since_version")
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Reduce a prompt to the form used in cache keys
+
+    Case, surrounding and repeated whitespace and trailing punctuation do
+    not change what is asked for.
+
+    Args:
+        prompt (str): Prompt as the user wrote it
+
+    Returns:
+        str: The normalized prompt
+    """
+    return re.sub(r"\s+", " ", prompt or "").strip().rstrip(".!?").strip().lower()
+
+def scene_fingerprint(scene_data: Optional[Dict[str, Any]]) -> str:
+    """
+    Hash the content of a scene
+
+    Args:
+        scene_data (Optional[Dict[str, Any]]): Scene data as sent to the AI agent
+
+    Returns:
+        str: Hex digest of the scene, or "" without scene data
+    """
+    if not scene_data:
+        return ""
+    content = {key: value for key, value in scene_data.items() if key not in VOLATILE_SCENE_KEYS}
+    if isinstance(content.get("objects"), list):
+        content["objects"] = sorted(content["objects"], key=lambda info: str(info.get("name", "")))
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+class ResponseCache:
+    """
+    LRU cache of generated code in memory in front of a SQLite file.
+
+    Lookups check the in-memory tier first and fall back to disk, which
+    survives restarts; disk hits are promoted to memory. Calls block on
+    SQLite, so async code runs them in a worker thread. Entries expire
+    ``ttl`` seconds after they were stored, and each tier evicts its least
+    recently used entries beyond its size limit.
+    """
+    def __init__(
+        self,
+        path: Optional[str],
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10000,
+        ttl: float = 7 * 24 * 3600
+    ):
+        """
+        Initialize the cache, creating the SQLite file if needed
+
+        Args:
+            path (Optional[str]): SQLite file of the disk tier, None for memory only
+            max_memory_entries (int): Entries kept in memory
+            max_disk_entries (int): Entries kept on disk
+            ttl (float): Seconds an entry is served after it was stored (0 keeps entries forever)
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.hit_time = 0.0
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Response cache at {path} unavailable, caching in memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(prompt: str, model: str, docs_version: str, fingerprint: str) -> str:
+        """
+        Build the key of a generation
+
+        Args:
+            prompt (str): Prompt as the user wrote it
+            model (str): Name of the LLM
+            docs_version (str): Version of the API documentation the prompt's documents are searched in
+            fingerprint (str): Scene fingerprint from ``scene_fingerprint``
+
+        Returns:
+            str: Hex digest identifying the generation
+        """
+        parts = [normalize_prompt(prompt), model, docs_version, fingerprint]
+        return hashlib.blake2b("\x1e".join(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        """Whether an entry stored at ``created`` has outlived the TTL"""
+        return self.ttl > 0 and now - created > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key (str): Key from ``make_key``
+
+        Returns:
+            Optional[str]: The cached code, or None on a miss
+        """
+        start = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created, now):
+                    self.memory.move_to_end(key)
+                    self.memory_hits += 1
+                    self.hit_time += time.perf_counter() - start
+                    return value
+                del self.memory[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        value, created = row
+                        if not self._expired(created, now):
+                            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                            self._remember(key, value, created)
+                            self.disk_hits += 1
+                            self.hit_time += time.perf_counter() - start
+                            return value
+                        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                        self.expirations += 1
+                except sqlite3.Error as e:
+                    logger.warning(f"Response cache read failed: {e}")
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Store a response in both tiers
+
+        Args:
+            key (str): Key from ``make_key``
+            value (str): Generated code
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self.stores += 1
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                # Evict the least recently used entries beyond the disk limit
+                cursor = self._db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+                self.evictions += max(0, cursor.rowcount)
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+    def _remember(self, key: str, value: str, created: float) -> None:
+        """Put an entry in the memory tier, evicting the least recently used beyond its limit"""
+        self.memory[key] = (value, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+    def purge_expired(self) -> int:
+        """
+        Remove expired entries from both tiers
+
+        Returns:
+            int: Number of entries removed
+        """
+        if self.ttl <= 0:
+            return 0
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for key in [key for key, (_, created) in self.memory.items() if self._expired(created, now)]:
+                del self.memory[key]
+                removed += 1
+            if self._db is not None:
+                try:
+                    cursor = self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+                    removed += max(0, cursor.rowcount)
+                except sqlite3.Error as e:
+                    logger.warning(f"Response cache purge failed: {e}")
+            self.expirations += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self.memory.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM responses")
+                except sqlite3.Error as e:
+                    logger.warning(f"Response cache clear failed: {e}")
+
+    def close(self) -> None:
+        """Close the SQLite file"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict[str, Any]: Entry counts per tier, hits per tier, misses, hit rate,
+            evictions, expirations and the mean time of a hit
+        """
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        disk_entries = None
+        if self._db is not None:
+            with self._lock:
+                try:
+                    disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+        return {
+            "memory_entries": len(self.memory),
+            "disk_entries": disk_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "avg_hit_ms": round(self.hit_time / hits * 1000, 4) if hits else 0.0
+        }
@@ -0,0 +1,189 @@
+"""
+Backend copies of Blender scene data.
+"""
+import time
+import logging
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from utils.single_flight import SingleFlight
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class SceneSnapshot:
+    """
+    Mirror of one Blender instance's scene, kept current with delta responses.
+
+    Blender versions its scene. Requests built with ``request_params`` name
+    the version held here, and ``apply`` merges the added, removed and
+    changed objects Blender sends back instead of the full object list.
+    """
+    def __init__(self):
+        """Initialize an empty snapshot"""
+        self.instance: Optional[str] = None
+        self.version: Optional[int] = None
+        self.meta: Dict[str, Any] = {}
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.full_updates = 0
+        self.delta_updates = 0
+
+    def request_params(self) -> Dict[str, Any]:
+        """
+        Get the introspect_scene parameters that ask for a delta
+
+        Returns:
+            Dict[str, Any]: The version and instance held here, empty if nothing is held
+        """
+        if self.version is None:
+            return {}
+        return {"since_version": self.version, "instance": self.instance}
+
+    def apply(self, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Merge an introspect_scene result into the snapshot
+
+        Args:
+            result (Dict[str, Any]): The ``result`` of an introspect_scene response
+
+        Returns:
+            Optional[Dict[str, Any]]: The merged scene data, or None if the result
+            is a delta against a version this snapshot no longer holds
+        """
+        delta = result.get("delta")
+        if delta is not None:
+            if result.get("instance") != self.instance or result.get("since_version") != self.version:
+                return None
+            for name in delta.get("removed", []):
+                self.objects.pop(name, None)
+            for info in delta.get("added", []) + delta.get("changed", []):
+                self.objects[info["name"]] = info
+            self.delta_updates += 1
+        else:
+            self.objects = {info["name"]: info for info in result.get("objects", [])}
+            self.full_updates += 1
+
+        self.instance = result.get("instance")
+        self.version = result.get("version")
+        self.meta = {
+            key: value for key, value in result.items()
+            if key not in ("objects", "delta", "since_version", "instance")
+        }
+        return self.to_scene_data()
+
+    def to_scene_data(self) -> Dict[str, Any]:
+        """
+        Get the scene in the shape of a full introspect_scene result
+
+        Returns:
+            Dict[str, Any]: Scene settings and the list of objects
+        """
+        return {**self.meta, "objects": list(self.objects.values())}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get snapshot statistics
+
+        Returns:
+            Dict[str, Any]: Held version, object count and update counts
+        """
+        return {
+            "version": self.version,
+            "objects": len(self.objects),
+            "full_updates": self.full_updates,
+            "delta_updates": self.delta_updates
+        }
+
+class SceneCache:
+    """
+    Time-limited cache of one Blender instance's scene in front of its SceneSnapshot.
+
+    Reads within ``ttl`` seconds of the last fetch are served from memory.
+    ``invalidate`` drops the cached scene whenever the backend sends Blender
+    a mutation, and concurrent readers of a stale scene share one fetch.
+    """
+    def __init__(self, ttl: float = 5.0):
+        """
+        Initialize an empty cache
+
+        Args:
+            ttl (float): Seconds a fetched scene is served without asking Blender
+        """
+        self.ttl = ttl
+        self.snapshot = SceneSnapshot()
+        self.scene_data: Optional[Dict[str, Any]] = None
+        self.fetched_at: Optional[float] = None
+        # Bumped by every invalidation, so fetches that straddle a mutation are not cached
+        self.generation = 0
+        # Fetches in flight by generation; readers of the same generation share one
+        self.fetches = SingleFlight()
+        self.hits = 0
+        self.invalidations = 0
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the cached scene may be served without asking Blender"""
+        return (
+            self.scene_data is not None
+            and self.fetched_at is not None
+            and time.monotonic() - self.fetched_at < self.ttl
+        )
+
+    async def get(
+        self,
+        fetch: Callable[[SceneSnapshot], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get the scene, fetching it from Blender if the cached copy is stale
+
+        The returned dict is shared between callers and must not be modified.
+
+        Args:
+            fetch (Callable): Coroutine function that updates the snapshot from
+                Blender and returns the merged scene data
+
+        Returns:
+            Optional[Dict[str, Any]]: Scene data, or None if Blender could not be asked
+        """
+        if self.fresh:
+            self.hits += 1
+            return self.scene_data
+
+        generation = self.generation
+
+        async def fetch_and_store() -> Optional[Dict[str, Any]]:
+            scene_data = await fetch(self.snapshot)
+            if scene_data is not None and generation == self.generation:
+                self.scene_data = scene_data
+                self.fetched_at = time.monotonic()
+            return scene_data
+
+        return await self.fetches.run(generation, fetch_and_store)
+
+    def invalidate(self) -> None:
+        """Drop the cached scene after a mutation was sent to Blender"""
+        self.generation += 1
+        self.scene_data = None
+        self.fetched_at = None
+        self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict[str, Any]: Version tag, age, hit/miss counts and snapshot update counts
+        """
+        misses = self.fetches.calls
+        shared_fetches = self.fetches.shared
+        lookups = self.hits + misses + shared_fetches
+        return {
+            **self.snapshot.get_stats(),
+            "ttl": self.ttl,
+            "fresh": self.fresh,
+            "age": round(time.monotonic() - self.fetched_at, 3) if self.fetched_at is not None else None,
+            "hits": self.hits,
+            "misses": misses,
+            "shared_fetches": shared_fetches,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.hits + shared_fetches) / lookups, 3) if lookups else 0.0
+        }
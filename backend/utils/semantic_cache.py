@@ -0,0 +1,219 @@
+"""
+Cache of generated code that also answers paraphrased prompts.
+"""
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """
+    Bounded cache of generated code looked up by prompt meaning.
+
+    Prompts are embedded with a sentence-transformers model (the one the
+    knowledge kernel indexes the API docs with) and kept as unit vectors in
+    one preallocated NumPy matrix, so a lookup is a single matrix-vector
+    product. A cached prompt answers a new one when their cosine similarity
+    reaches ``threshold`` and both were made for the same model and scene
+    fingerprint. When the cache is full the least recently used entry is
+    replaced.
+
+    The cache disables itself if NumPy or sentence-transformers is not
+    installed or the model cannot be loaded.
+    """
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        threshold: float = 0.95,
+        max_entries: int = 1000,
+        enabled: bool = True
+    ):
+        """
+        Initialize an empty cache; the embedding model is loaded on first use
+
+        Args:
+            model_name (str): sentence-transformers model used to embed prompts
+            threshold (float): Minimum cosine similarity of a hit
+            max_entries (int): Number of prompts kept
+            enabled (bool): Whether to use the cache at all
+        """
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.enabled = enabled and np is not None and SentenceTransformer is not None
+        if enabled and not self.enabled:
+            logger.info("Semantic cache disabled: numpy and sentence-transformers are required")
+        self._model = None
+        self._model_lock = asyncio.Lock()
+        # Unit prompt embeddings, one row per slot, allocated with the first entry
+        self.vectors = None
+        # Per slot: id of the (model, scene fingerprint) context, last use and the cached code
+        self.contexts = None
+        self.last_used = None
+        self.codes: List[Optional[str]] = []
+        self.prompts: List[Optional[str]] = []
+        self._context_ids: Dict[Tuple[str, str], int] = {}
+        self.count = 0
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.hit_similarity = 0.0
+        self.embed_time = 0.0
+        self.embeds = 0
+
+    async def _load_model(self):
+        """Load the embedding model in a worker thread, once"""
+        async with self._model_lock:
+            if self._model is None and self.enabled:
+                try:
+                    self._model = await asyncio.to_thread(SentenceTransformer, self.model_name)
+                except Exception as e:
+                    logger.warning(f"Semantic cache disabled, could not load {self.model_name}: {e}")
+                    self.enabled = False
+        return self._model
+
+    async def _embed(self, prompt: str):
+        """Embed a prompt as a unit vector, or return None if the cache is disabled"""
+        model = await self._load_model()
+        if model is None:
+            return None
+        start = time.perf_counter()
+        vector = await asyncio.to_thread(
+            model.encode, prompt, convert_to_numpy=True, normalize_embeddings=True
+        )
+        self.embed_time += time.perf_counter() - start
+        self.embeds += 1
+        return np.asarray(vector, dtype=np.float32)
+
+    def _context_id(self, model: str, fingerprint: str) -> int:
+        """Get the id of a (model, scene fingerprint) context, numbering new ones"""
+        key = (model, fingerprint)
+        if key not in self._context_ids and len(self._context_ids) >= 2 * self.max_entries:
+            # Scenes change all the time; forget contexts no cached prompt belongs to any more
+            live = set(self.contexts[:self.count].tolist())
+            self._context_ids = {context: i for context, i in self._context_ids.items() if i in live}
+        if key not in self._context_ids:
+            self._context_ids[key] = max(self._context_ids.values(), default=-1) + 1
+        return self._context_ids[key]
+
+    def _best_match(self, vector, context_id: int) -> Tuple[int, float]:
+        """Find the most similar cached prompt of a context; returns slot -1 if there is none"""
+        if self.count == 0:
+            return -1, 0.0
+        similarities = self.vectors[:self.count] @ vector
+        similarities[self.contexts[:self.count] != context_id] = -np.inf
+        slot = int(np.argmax(similarities))
+        similarity = float(similarities[slot])
+        if similarity == -np.inf:
+            return -1, 0.0
+        return slot, similarity
+
+    async def lookup(self, prompt: str, model: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Find cached code for a prompt that means the same as this one
+
+        Args:
+            prompt (str): Normalized prompt
+            model (str): Name of the LLM
+            fingerprint (str): Fingerprint of the scene the code is for
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached ``code``, the cached ``prompt`` and
+            their ``similarity``, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        self.lookups += 1
+        if self.count == 0 or (model, fingerprint) not in self._context_ids:
+            return None
+        vector = await self._embed(prompt)
+        if vector is None:
+            return None
+        slot, similarity = self._best_match(vector, self._context_ids[(model, fingerprint)])
+        if slot < 0 or similarity < self.threshold:
+            return None
+        self.last_used[slot] = time.monotonic()
+        self.hits += 1
+        self.hit_similarity += similarity
+        return {"code": self.codes[slot], "prompt": self.prompts[slot], "similarity": round(similarity, 4)}
+
+    async def add(self, prompt: str, model: str, fingerprint: str, code: str) -> None:
+        """
+        Cache the code generated for a prompt
+
+        A prompt within the threshold of a cached one of the same context
+        replaces it instead of taking another slot.
+
+        Args:
+            prompt (str): Normalized prompt
+            model (str): Name of the LLM
+            fingerprint (str): Fingerprint of the scene the code is for
+            code (str): Generated code
+        """
+        if not self.enabled:
+            return
+        vector = await self._embed(prompt)
+        if vector is None:
+            return
+        if self.vectors is None:
+            self.vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            self.contexts = np.full(self.max_entries, -1, dtype=np.int64)
+            self.last_used = np.zeros(self.max_entries, dtype=np.float64)
+            self.codes = [None] * self.max_entries
+            self.prompts = [None] * self.max_entries
+
+        context_id = self._context_id(model, fingerprint)
+        slot, similarity = self._best_match(vector, context_id)
+        if slot < 0 or similarity < self.threshold:
+            if self.count < self.max_entries:
+                slot = self.count
+                self.count += 1
+            else:
+                slot = int(np.argmin(self.last_used[:self.count]))
+                self.evictions += 1
+
+        self.vectors[slot] = vector
+        self.contexts[slot] = context_id
+        self.last_used[slot] = time.monotonic()
+        self.codes[slot] = code
+        self.prompts[slot] = prompt
+
+    def clear(self) -> None:
+        """Forget every cached prompt"""
+        self.count = 0
+        self._context_ids.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict[str, Any]: Whether the cache is on, entries, lookups, hits, hit rate,
+            mean similarity of hits, evictions and the mean embedding time
+        """
+        return {
+            "enabled": self.enabled,
+            "model": self.model_name,
+            "threshold": self.threshold,
+            "entries": self.count,
+            "max_entries": self.max_entries,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+            "avg_hit_similarity": round(self.hit_similarity / self.hits, 4) if self.hits else 0.0,
+            "evictions": self.evictions,
+            "avg_embed_ms": round(self.embed_time / self.embeds * 1000, 3) if self.embeds else 0.0
+        }
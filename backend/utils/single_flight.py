@@ -0,0 +1,70 @@
+"""
+Coalescing of identical concurrent calls.
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, Hashable, TypeVar
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time and shares its result.
+
+    A call made while another with the same key is in flight does not
+    start its own: it waits for the pending one and gets the same result or
+    exception. The pending call is shielded, so a caller that is cancelled
+    does not cancel it for the others.
+    """
+    def __init__(self):
+        """Initialize with nothing in flight"""
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a call, or join the one in flight with the same key
+
+        Args:
+            key (Hashable): Identifies calls that give the same result
+            call (Callable[[], Awaitable[T]]): Coroutine function started if nothing is in flight
+
+        Returns:
+            T: Result of the call
+        """
+        task = self._calls.get(key)
+        if task is None or task.done():
+            self.calls += 1
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        """Drop a finished call, retrieving its exception so it is not reported as unhandled"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics
+
+        Returns:
+            Dict[str, Any]: Calls started, calls saved by joining one in flight,
+            calls running and the share of calls saved
+        """
+        total = self.calls + self.shared
+        return {
+            "calls": self.calls,
+            "saved_calls": self.shared,
+            "in_flight": sum(1 for task in self._calls.values() if not task.done()),
+            "saved_rate": round(self.shared / total, 3) if total else 0.0
+        }
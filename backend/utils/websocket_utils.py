@@ -3,12 +3,16 @@ Utility functions for WebSocket operations.
 """
 import json
 import asyncio
+import itertools
+from collections import OrderedDict
 from websockets.client import connect, WebSocketClientProtocol
-from typing import Dict, Any, Optional, TypedDict, Set, List
+from typing import Dict, Any, Optional, TypedDict, Set, List, AsyncIterator
 import logging
 from datetime import datetime
 from websockets.exceptions import ConnectionClosed, InvalidStatusCode
 
+from utils import wire_format
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,180 @@ class WebSocketResponse(TypedDict, total=False):
     result: Any
     timestamp: str
 
+class BlenderConnectionLost(Exception):
+    """Raised for requests still pending when a Blender connection goes away"""
+
+class BlenderConnection:
+    """
+    Multiplexed request channel over a single WebSocket connection to Blender.
+
+    Every outgoing frame carries an ``id`` that Blender echoes back. A reader
+    task owns ``recv()`` and resolves the future registered for that id, so
+    many requests can be in flight on one socket without stealing each
+    other's replies. Frames are JSON until ``negotiate`` agrees on a binary
+    encoding with Blender. Requests sent with ``stream`` may be answered
+    with several frames, which are queued for that request in order.
+    """
+    def __init__(self, websocket: WebSocketClientProtocol):
+        """
+        Start demultiplexing replies on an open WebSocket connection
+
+        Args:
+            websocket (WebSocketClientProtocol): Open connection to Blender
+        """
+        self.websocket = websocket
+        self.created_at = datetime.now()
+        self.uses = 0
+        self.encoding = wire_format.JSON
+        self._ids = itertools.count(1)
+        self._pending: "OrderedDict[int, asyncio.Future]" = OrderedDict()
+        self._streams: Dict[int, asyncio.Queue] = {}
+        self._reader = asyncio.create_task(self._read_loop())
+
+    @property
+    def closed(self) -> bool:
+        """Whether the connection can no longer carry requests"""
+        return self.websocket.closed or self._reader.done()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests waiting for a reply"""
+        return len(self._pending) + len(self._streams)
+
+    async def request(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Send a message and wait for the reply carrying the same id
+
+        Args:
+            message (Dict[str, Any]): Message to send
+            timeout (Optional[float]): Seconds to wait for the reply
+
+        Returns:
+            Dict[str, Any]: Reply from Blender, without the correlation id
+
+        Raises:
+            ConnectionClosed: If the socket was already closed before sending
+            BlenderConnectionLost: If the socket closed before the reply arrived
+            asyncio.TimeoutError: If no reply arrived within ``timeout``
+        """
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self.websocket.send(wire_format.encode({**message, "id": request_id}, self.encoding))
+            self.uses += 1
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def stream(self, message: Dict[str, Any], timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send a message and yield every frame Blender answers it with
+
+        Frames carrying a ``chunk`` sequence number are partial results; the
+        first frame without one (the end marker or an error) is yielded last.
+        Raw buffer frames are yielded as ``{"chunk": seq, "buffer": bytes}``.
+
+        Args:
+            message (Dict[str, Any]): Message to send
+            timeout (Optional[float]): Seconds to wait for each frame
+
+        Yields:
+            Dict[str, Any]: Frames from Blender, without the correlation id
+
+        Raises:
+            ConnectionClosed: If the socket was already closed before sending
+            BlenderConnectionLost: If the socket closed before the stream ended
+            asyncio.TimeoutError: If the next frame did not arrive within ``timeout``
+        """
+        request_id = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._streams[request_id] = queue
+        try:
+            await self.websocket.send(wire_format.encode({**message, "id": request_id}, self.encoding))
+            self.uses += 1
+            while True:
+                frame = await asyncio.wait_for(queue.get(), timeout)
+                if isinstance(frame, Exception):
+                    raise frame
+                yield frame
+                if "chunk" not in frame:
+                    return
+        finally:
+            self._streams.pop(request_id, None)
+
+    async def negotiate(self, encodings: List[str], timeout: Optional[float] = None) -> str:
+        """
+        Agree on a wire encoding with Blender
+
+        Must run before the connection carries other requests. Servers that
+        do not know the ``hello`` action keep the connection on JSON.
+
+        Args:
+            encodings (List[str]): Encodings to offer, in order of preference
+            timeout (Optional[float]): Seconds to wait for the answer
+
+        Returns:
+            str: The encoding used from now on
+        """
+        offered = [e for e in encodings if e in wire_format.available_encodings()]
+        response = await self.request({"action": "hello", "data": {"encodings": offered}}, timeout)
+        chosen = (response.get("result") or {}).get("encoding", wire_format.JSON)
+        self.encoding = chosen if chosen in offered else wire_format.JSON
+        return self.encoding
+
+    async def close(self) -> None:
+        """Close the connection and fail any pending requests"""
+        await self.websocket.close()
+        self._reader.cancel()
+
+    async def _read_loop(self) -> None:
+        """Read replies and hand each one to the request that is waiting for it"""
+        try:
+            async for raw in self.websocket:
+                buffer_header = wire_format.parse_buffer_header(raw)
+                if buffer_header is not None:
+                    # Raw buffers are handed on undecoded, header included
+                    request_id, seq = buffer_header
+                    queue = self._streams.get(request_id)
+                    if queue is None:
+                        logger.warning(f"Dropping buffer frame for unknown request id {request_id}")
+                    else:
+                        queue.put_nowait({"chunk": seq, "buffer": raw})
+                    continue
+
+                try:
+                    response = wire_format.decode(raw, self.encoding)
+                except ValueError:
+                    logger.error("Invalid response frame from Blender")
+                    continue
+
+                request_id = response.pop("id", None) if isinstance(response, dict) else None
+                if request_id in self._streams:
+                    self._streams[request_id].put_nowait(response)
+                    continue
+                if request_id is not None:
+                    future = self._pending.get(request_id)
+                else:
+                    # Servers that do not echo ids answer in order; answered requests
+                    # stay pending until their caller resumes, so skip those
+                    future = next((f for f in self._pending.values() if not f.done()), None)
+
+                if future is None:
+                    logger.warning(f"Dropping reply for unknown request id {request_id}")
+                elif not future.done():
+                    future.set_result(response)
+        except ConnectionClosed:
+            pass
+        except Exception as e:
+            logger.error(f"Error reading from Blender WebSocket: {str(e)}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(BlenderConnectionLost("WebSocket connection closed"))
+            for queue in self._streams.values():
+                queue.put_nowait(BlenderConnectionLost("WebSocket connection closed"))
+
 class WebSocketManager:
     """
     Manager for handling WebSocket connections and messaging
@@ -34,6 +212,7 @@ class WebSocketManager:
         """Initialize the WebSocket manager"""
         self.active_connections: Set[WebSocketClientProtocol] = set()
         self.connection_timestamps: Dict[WebSocketClientProtocol, datetime] = {}
+        self.channels: Dict[WebSocketClientProtocol, BlenderConnection] = {}
         
     async def connect(self, ws_url: str) -> ConnectionResult:
         """
@@ -50,6 +229,7 @@ class WebSocketManager:
             if connection:
                 self.active_connections.add(connection)
                 self.connection_timestamps[connection] = datetime.now()
+                self.channels[connection] = BlenderConnection(connection)
                 return {
                     "success": True,
                     "message": f"Successfully connected to {ws_url}",
@@ -76,7 +256,11 @@ class WebSocketManager:
             connection (WebSocketClientProtocol): Connection to close
         """
         if connection in self.active_connections:
-            await connection.close()
+            channel = self.channels.pop(connection, None)
+            if channel is not None:
+                await channel.close()
+            else:
+                await connection.close()
             self.active_connections.remove(connection)
             if connection in self.connection_timestamps:
                 del self.connection_timestamps[connection]
@@ -88,7 +272,10 @@ class WebSocketManager:
     
     async def send(self, connection: WebSocketClientProtocol, message: Dict[str, Any]) -> WebSocketResponse:
         """
-        Send a message to a WebSocket server
+        Send a message to a WebSocket server and wait for its reply
+
+        Replies are matched to requests by id, so concurrent callers can
+        share one connection.
         
         Args:
             connection (WebSocketClientProtocol): Connection to send to
@@ -98,9 +285,10 @@ class WebSocketManager:
             WebSocketResponse: Response from the server
         """
         try:
-            await connection.send(json.dumps(message))
-            response = await connection.recv()
-            return json.loads(response)
+            channel = self.channels.get(connection)
+            if channel is None:
+                channel = self.channels[connection] = BlenderConnection(connection)
+            return await channel.request(message)
         except Exception as e:
             logger.error(f"Error sending message: {str(e)}")
             return {"error": str(e), "timestamp": datetime.now().isoformat()}
@@ -168,10 +356,38 @@ async def connect_to_blender(ws_url: str) -> Optional[WebSocketClientProtocol]:
     logger.error("Failed to connect to Blender WebSocket after all retries")
     return None
 
+async def check_blender_connection(ws_url: str) -> ConnectionResult:
+    """
+    Check once whether a Blender WebSocket server is reachable
+
+    Args:
+        ws_url (str): WebSocket URL to check
+
+    Returns:
+        ConnectionResult: Result of the connection attempt
+    """
+    try:
+        websocket = await connect(ws_url, ping_timeout=10)
+        await websocket.close()
+        return {
+            "success": True,
+            "message": f"Successfully connected to {ws_url}",
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Error connecting to {ws_url}: {str(e)}",
+            "timestamp": datetime.now().isoformat()
+        }
+
 async def send_to_blender(ws_url: str, action: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Send a message to Blender via WebSocket
-    
+    Send a message to Blender via a one-off WebSocket connection
+
+    Request traffic from the API goes through the shared
+    ``BlenderConnectionPool`` instead, which keeps its connections open.
+
     Args:
         ws_url (str): WebSocket URL to connect to
         action (str): Action to perform
@@ -0,0 +1,125 @@
+"""
+Wire formats for messages exchanged with the Blender agent.
+
+JSON travels in text frames and is always available. MessagePack and CBOR
+travel in binary frames and are used when both sides have the codec
+installed and agree on it during the ``hello`` handshake.
+
+Raw geometry buffers (``get_mesh_data``) travel in binary frames of their
+own, marked by a fixed header, and are never decoded.
+"""
+import json
+import struct
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+JSON = "json"
+MSGPACK = "msgpack"
+CBOR = "cbor"
+
+# Header of raw buffer frames: magic, request id, sequence number
+BUFFER_MAGIC = b"BUF1"
+BUFFER_HEADER = struct.Struct("<4sII")
+
+def available_encodings() -> List[str]:
+    """
+    Get the encodings this process can speak, most compact first
+
+    Returns:
+        List[str]: Names of the available encodings
+    """
+    encodings = []
+    if msgpack is not None:
+        encodings.append(MSGPACK)
+    if cbor2 is not None:
+        encodings.append(CBOR)
+    encodings.append(JSON)
+    return encodings
+
+def choose_encoding(offered: List[str], preferred: List[str]) -> str:
+    """
+    Pick the first preferred encoding that the other side also offers
+
+    Args:
+        offered (List[str]): Encodings offered by the peer
+        preferred (List[str]): Encodings we support, in order of preference
+
+    Returns:
+        str: The chosen encoding, JSON if there is no better match
+    """
+    for encoding in preferred:
+        if encoding in offered:
+            return encoding
+    return JSON
+
+def encode(message: Dict[str, Any], encoding: str = JSON) -> Union[str, bytes]:
+    """
+    Encode a message for sending
+
+    Args:
+        message (Dict[str, Any]): Message to encode
+        encoding (str): Encoding negotiated for the connection
+
+    Returns:
+        Union[str, bytes]: A str for a text frame or bytes for a binary frame
+    """
+    if encoding == MSGPACK and msgpack is not None:
+        return msgpack.packb(message, use_bin_type=True)
+    if encoding == CBOR and cbor2 is not None:
+        return cbor2.dumps(message)
+    return json.dumps(message)
+
+def decode(frame: Union[str, bytes], encoding: str = JSON) -> Any:
+    """
+    Decode a received frame
+
+    Text frames are always JSON; binary frames use the negotiated encoding.
+
+    Args:
+        frame (Union[str, bytes]): The received frame
+        encoding (str): Encoding negotiated for the connection
+
+    Returns:
+        Any: The decoded message
+
+    Raises:
+        ValueError: If the frame cannot be decoded
+    """
+    if isinstance(frame, str):
+        return json.loads(frame)
+    if encoding == MSGPACK and msgpack is not None:
+        return msgpack.unpackb(frame, raw=False)
+    if encoding == CBOR and cbor2 is not None:
+        return cbor2.loads(frame)
+    return json.loads(frame)
+
+def parse_buffer_header(frame: Union[str, bytes]) -> Optional[Tuple[int, int]]:
+    """
+    Read the header of a raw buffer frame
+
+    Encoded messages are always maps, so they never start with BUFFER_MAGIC.
+
+    Args:
+        frame (Union[str, bytes]): The received frame
+
+    Returns:
+        Optional[Tuple[int, int]]: Request id and sequence number, or None if
+        the frame is not a raw buffer frame
+    """
+    if not isinstance(frame, bytes) or len(frame) < BUFFER_HEADER.size or not frame.startswith(BUFFER_MAGIC):
+        return None
+    _, request_id, seq = BUFFER_HEADER.unpack_from(frame)
+    return request_id, seq
@@ -1,12 +1,28 @@
 import asyncio
 import json
+import time
+import queue
+import types
+import pstats
+import cProfile
+import builtins
+import sys
+import threading
 import bpy
+import numpy as np
 import websockets
 import inspect
 from typing import Dict, Any, List, Optional
 import os
 import logging
 import traceback
+import uuid
+import array
+import struct
+import hashlib
+import fnmatch
+import itertools
+from collections import OrderedDict
 from datetime import datetime
 
 # Configure logging
@@ -18,9 +34,471 @@ logger = logging.getLogger("BlenderWebSocket")
 DEFAULT_WS_HOST = "localhost"
 DEFAULT_WS_PORT = 9876
 
+# Number of past scene versions kept for delta introspection
+MAX_SCENE_SNAPSHOTS = 16
+
+# Object fields introspect_scene can return; each is only computed when requested
+OBJECT_FIELDS = {
+    "name": lambda obj: obj.name,
+    "type": lambda obj: obj.type,
+    "location": lambda obj: [obj.location.x, obj.location.y, obj.location.z],
+    "rotation": lambda obj: [obj.rotation_euler.x, obj.rotation_euler.y, obj.rotation_euler.z],
+    "scale": lambda obj: [obj.scale.x, obj.scale.y, obj.scale.z],
+    "dimensions": lambda obj: [obj.dimensions.x, obj.dimensions.y, obj.dimensions.z],
+    "matrix_world": lambda obj: [list(row) for row in obj.matrix_world],
+    "visible": lambda obj: obj.visible_get(),
+    "parent": lambda obj: obj.parent.name if obj.parent else None,
+    "collections": lambda obj: [collection.name for collection in obj.users_collection],
+    "data": lambda obj: obj.data.name if obj.data else None,
+}
+DEFAULT_OBJECT_FIELDS = ("name", "type", "location", "visible")
+
+# Objects per frame when introspect_scene streams its result
+SCENE_CHUNK_SIZE = 1000
+
+# Raw geometry buffers travel in binary frames that start with this header:
+# magic, request id and sequence number. The 12-byte header keeps the
+# payload 4-byte aligned for Float32Array/Uint32Array views on the client.
+BUFFER_MAGIC = b"BUF1"
+BUFFER_HEADER = struct.Struct("<4sII")
+
+# Main-thread job queue: seconds of work per timer tick and seconds between ticks
+MAIN_THREAD_TIME_BUDGET = 0.02
+MAIN_THREAD_TICK_INTERVAL = 0.01
+
+# Commands that do not touch bpy and are answered on the server loop
+LOOP_COMMANDS = {"ping", "get_stats", "job_status", "cancel_job"}
+
+# Number of finished execution jobs kept for status queries
+MAX_FINISHED_JOBS = 100
+
+# File name scripts are compiled under, which tells their frames apart from bpy's
+SCRIPT_FILENAME = "<execute_code>"
+
+# Builtins available to code run by execute_code
+SANDBOX_BUILTIN_NAMES = (
+    'abs', 'all', 'any', 'bool', 'dict', 'dir', 'enumerate',
+    'filter', 'float', 'format', 'frozenset', 'getattr', 'hasattr',
+    'hash', 'id', 'int', 'isinstance', 'issubclass', 'iter', 'len',
+    'list', 'map', 'max', 'min', 'next', 'object', 'pow', 'print',
+    'property', 'range', 'repr', 'reversed', 'round', 'set', 'slice',
+    'sorted', 'str', 'sum', 'tuple', 'type', 'zip'
+)
+# Modules code run by execute_code may import
+SANDBOX_MODULES = frozenset({"bpy", "bmesh", "mathutils", "math"})
+# Number of compiled execute_code sources kept for reuse
+CODE_CACHE_SIZE = 256
+
+# Number of hot functions execute_code reports when profiling
+PROFILE_TOP_N = 20
+
+# Undo step pushed after an execute_code run in batch mode
+BATCH_UNDO_MESSAGE = "Run AI agent script"
+
 # Reference to the websocket server instance
 _server_instance = None
 
+# Optional binary wire formats, negotiated per connection with the "hello" action
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+def _available_encodings() -> List[str]:
+    """Get the wire encodings this Blender can speak, most compact first"""
+    encodings = []
+    if msgpack is not None:
+        encodings.append("msgpack")
+    if cbor2 is not None:
+        encodings.append("cbor")
+    encodings.append("json")
+    return encodings
+
+def _encode_frame(message: Dict[str, Any], encoding: str = "json"):
+    """Encode a message as a text frame (JSON) or a binary frame (MessagePack/CBOR)"""
+    if encoding == "msgpack" and msgpack is not None:
+        return msgpack.packb(message, use_bin_type=True)
+    if encoding == "cbor" and cbor2 is not None:
+        return cbor2.dumps(message)
+    return json.dumps(message)
+
+def _decode_frame(frame, encoding: str = "json") -> Any:
+    """Decode a frame; text frames are always JSON, binary frames use the negotiated encoding"""
+    if isinstance(frame, str):
+        return json.loads(frame)
+    if encoding == "msgpack" and msgpack is not None:
+        return msgpack.unpackb(frame, raw=False)
+    if encoding == "cbor" and cbor2 is not None:
+        return cbor2.loads(frame)
+    return json.loads(frame)
+
+def _sandbox_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """__import__ for sandboxed code that only allows SANDBOX_MODULES"""
+    if level != 0 or name.partition(".")[0] not in SANDBOX_MODULES:
+        raise ImportError(f"Import of '{name}' is not allowed")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+def _build_sandbox_globals() -> types.MappingProxyType:
+    """Build the read-only base namespace that execute_code copies for every call"""
+    sandbox_builtins = {name: getattr(builtins, name) for name in SANDBOX_BUILTIN_NAMES}
+    sandbox_builtins['__import__'] = _sandbox_import
+    return types.MappingProxyType({
+        'bpy': bpy,
+        'mathutils': __import__('mathutils'),
+        # Read-only, so scripts cannot leak changes into later calls
+        '__builtins__': types.MappingProxyType(sandbox_builtins)
+    })
+
+class CodeCache:
+    """
+    LRU cache of compiled execute_code sources, keyed by a hash of the source
+    """
+    def __init__(self, max_size: int = CODE_CACHE_SIZE):
+        """
+        Initialize the cache
+        
+        Args:
+            max_size (int): Number of code objects to keep
+        """
+        self.max_size = max_size
+        self._codes: "OrderedDict[bytes, types.CodeType]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, source: str) -> types.CodeType:
+        """
+        Get the compiled code for a source, compiling it on a miss
+        
+        Args:
+            source (str): Python source
+        
+        Returns:
+            types.CodeType: The compiled code
+        
+        Raises:
+            SyntaxError: If the source does not compile
+        """
+        key = hashlib.blake2b(source.encode("utf-8"), digest_size=16).digest()
+        code = self._codes.get(key)
+        if code is not None:
+            self._codes.move_to_end(key)
+            self.hits += 1
+            return code
+        
+        self.misses += 1
+        code = compile(source, SCRIPT_FILENAME, "exec")
+        self._codes[key] = code
+        if len(self._codes) > self.max_size:
+            self._codes.popitem(last=False)
+        return code
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dict[str, Any]: Size, hit and miss counts and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._codes),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+def _resolve_future(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Complete a future unless its waiter has given up on it"""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+class MainThreadQueue:
+    """
+    Runs bpy work on Blender's main thread for the asyncio server thread.
+    
+    Jobs submitted with ``run`` go into a thread-safe queue that a
+    ``bpy.app.timers`` callback drains on the main thread. Each tick runs
+    queued jobs until ``time_budget`` seconds are used up, then hands control
+    back to the UI. Results are passed back to the waiting coroutine on the
+    server loop. Background mode has no UI loop to run timers, so there the
+    main thread drains the queue with ``serve`` while the server runs in a
+    thread. Until ``start`` is called, jobs run inline.
+    """
+    def __init__(self, time_budget: float = MAIN_THREAD_TIME_BUDGET, interval: float = MAIN_THREAD_TICK_INTERVAL):
+        """
+        Initialize the queue
+        
+        Args:
+            time_budget (float): Seconds of jobs to run per tick (at least one job always runs)
+            interval (float): Seconds between ticks
+        """
+        self.time_budget = time_budget
+        self.interval = interval
+        self.jobs: "queue.Queue" = queue.Queue()
+        self.inline = True
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.busy_ticks = 0
+        self.last_tick_ms = 0.0
+        self.max_tick_ms = 0.0
+        self.total_tick_time = 0.0
+        self.total_wait_time = 0.0
+    
+    def start(self) -> None:
+        """
+        Queue jobs for the main thread from now on; must be called on the main thread
+        
+        Registers the timer that drains the queue. In background mode the
+        caller drains it with ``serve`` instead.
+        """
+        if not bpy.app.background and not bpy.app.timers.is_registered(self._tick):
+            bpy.app.timers.register(self._tick, first_interval=0.0, persistent=True)
+        self.inline = False
+    
+    def serve(self, stopped: threading.Event) -> None:
+        """
+        Drain the queue on the main thread until ``stopped`` is set (background mode)
+        
+        Args:
+            stopped (threading.Event): Set when the server thread has finished
+        """
+        while not stopped.is_set():
+            try:
+                first = self.jobs.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            self._tick(first)
+    
+    def stop(self) -> None:
+        """Unregister the timer; must be called on the main thread"""
+        if bpy.app.timers.is_registered(self._tick):
+            bpy.app.timers.unregister(self._tick)
+        self.inline = True
+    
+    async def run(self, func, *args) -> Any:
+        """
+        Run a function on the main thread and wait for its result
+        
+        Args:
+            func: Function to call
+            *args: Arguments for the function
+        
+        Returns:
+            Any: What the function returned; its exceptions are re-raised here
+        """
+        self.submitted += 1
+        if self.inline:
+            return func(*args)
+        future = asyncio.get_running_loop().create_future()
+        self.jobs.put((func, args, future, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, self.jobs.qsize())
+        return await future
+    
+    def _tick(self, first: Optional[tuple] = None) -> float:
+        """
+        Timer callback: run queued jobs within the time budget
+        
+        Args:
+            first (Optional[tuple]): Job already taken from the queue, run first
+        """
+        start = time.perf_counter()
+        ran = 0
+        while ran == 0 or time.perf_counter() - start < self.time_budget:
+            if first is not None:
+                func, args, future, queued_at = first
+                first = None
+            else:
+                try:
+                    func, args, future, queued_at = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+            self.total_wait_time += time.perf_counter() - queued_at
+            ran += 1
+            try:
+                result, error = func(*args), None
+                self.completed += 1
+            except Exception as e:
+                result, error = None, e
+                self.failed += 1
+            try:
+                future.get_loop().call_soon_threadsafe(_resolve_future, future, result, error)
+            except RuntimeError:
+                # The server loop has already shut down
+                pass
+        
+        if ran:
+            elapsed = time.perf_counter() - start
+            self.busy_ticks += 1
+            self.last_tick_ms = elapsed * 1000
+            self.max_tick_ms = max(self.max_tick_ms, self.last_tick_ms)
+            self.total_tick_time += elapsed
+        return self.interval
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth and per-tick timing
+        
+        Returns:
+            Dict[str, Any]: Queue and tick statistics
+        """
+        done = self.completed + self.failed
+        return {
+            "mode": "inline" if self.inline else "timer",
+            "time_budget_ms": self.time_budget * 1000,
+            "interval_ms": self.interval * 1000,
+            "queue_depth": self.jobs.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_ticks": self.busy_ticks,
+            "last_tick_ms": round(self.last_tick_ms, 3),
+            "max_tick_ms": round(self.max_tick_ms, 3),
+            "avg_tick_ms": round(self.total_tick_time / self.busy_ticks * 1000, 3) if self.busy_ticks else 0.0,
+            "avg_jobs_per_tick": round(done / self.busy_ticks, 2) if self.busy_ticks else 0.0,
+            "avg_wait_ms": round(self.total_wait_time / done * 1000, 3) if done and not self.inline else 0.0
+        }
+
+class JobCancelled(BaseException):
+    """Raised inside a job's script at a cancellation point after cancel_job"""
+
+class ExecutionJob:
+    """
+    A script submitted with run_job, executed on the main thread while its
+    output streams back to the client.
+    
+    Every line of the script, ``print`` and the ``check_cancelled()`` helper
+    are cancellation points: after ``cancel`` they raise JobCancelled, which
+    sandboxed code cannot catch with ``except Exception``.
+    """
+    def __init__(self, job_id: str, code: str, loop: asyncio.AbstractEventLoop):
+        """
+        Initialize a queued job
+        
+        Args:
+            job_id (str): Id chosen by the client
+            code (str): Python code to execute
+            loop (asyncio.AbstractEventLoop): Server loop that receives the job's events
+        """
+        self.job_id = job_id
+        self.code = code
+        self.loop = loop
+        self.status = "queued"
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.stdout: List[str] = []
+        self.stderr: List[str] = []
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.events: "asyncio.Queue" = asyncio.Queue()
+        self._cancel = threading.Event()
+    
+    @property
+    def done(self) -> bool:
+        """Whether the job has finished, failed or been cancelled"""
+        return self.status in ("succeeded", "failed", "cancelled")
+    
+    def cancel(self) -> None:
+        """Ask the job to stop at its next cancellation point"""
+        self._cancel.set()
+    
+    def check_cancelled(self) -> None:
+        """Cancellation point for scripts; raises JobCancelled once cancel was requested"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+    
+    def trace(self, frame, event: str, arg: Any):
+        """sys.settrace hook that makes every line of the script a cancellation point"""
+        # Only the script's own frames are traced, never bpy or the standard library
+        if frame.f_code.co_filename != SCRIPT_FILENAME:
+            return None
+        return self._trace_line
+    
+    def _trace_line(self, frame, event: str, arg: Any):
+        """Local trace function of the script's frames"""
+        if event == "line":
+            self.check_cancelled()
+        return self._trace_line
+    
+    def print(self, *args, sep: str = " ", end: str = "\n", file=None, flush: bool = False) -> None:
+        """print() replacement for the job's script that streams stdout"""
+        self.check_cancelled()
+        self.write("stdout", sep.join(str(arg) for arg in args) + end)
+    
+    def write(self, stream: str, text: str) -> None:
+        """
+        Record output and pass it to the server loop; safe to call from any thread
+        
+        Args:
+            stream (str): "stdout" or "stderr"
+            text (str): Output text
+        """
+        (self.stdout if stream == "stdout" else self.stderr).append(text)
+        self._emit({"stream": stream, "data": text})
+    
+    def set_status(self, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        """
+        Move the job to a new status and pass the change to the server loop
+        
+        Args:
+            status (str): queued, running, succeeded, failed or cancelled
+            result (Optional[str]): The script's ``result`` variable, on success
+            error (Optional[str]): Error message, on failure
+        """
+        self.status = status
+        if status == "running":
+            self.started_at = datetime.now()
+        elif self.done:
+            self.finished_at = datetime.now()
+            self.result = result
+            self.error = error
+        self._emit({"status": status})
+    
+    def _emit(self, event: Dict[str, Any]) -> None:
+        """Queue an event for the request streaming this job"""
+        try:
+            self.loop.call_soon_threadsafe(self.events.put_nowait, event)
+        except RuntimeError:
+            # The server loop has already shut down
+            pass
+    
+    def to_dict(self, include_output: bool = False) -> Dict[str, Any]:
+        """
+        Describe the job
+        
+        Args:
+            include_output (bool): Include everything written to stdout and stderr
+        
+        Returns:
+            Dict[str, Any]: Id, status, timestamps and result
+        """
+        info = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "result": self.result,
+            "error": self.error
+        }
+        if include_output:
+            info["stdout"] = "".join(self.stdout)
+            info["stderr"] = "".join(self.stderr)
+        return info
+
 # Blender operator for starting the server
 class WEBSOCKET_OT_start_server(bpy.types.Operator):
     bl_idname = "websocket.start_server"
@@ -34,8 +512,9 @@ class WEBSOCKET_OT_start_server(bpy.types.Operator):
             self.report({'INFO'}, "WebSocket server is already running")
             return {'FINISHED'}
         
-        # Create a new server instance
+        # Create a new server instance; bpy work is handed back to this thread by a timer
         _server_instance = BlenderWebSocketServer()
+        _server_instance.main_thread.start()
         
         # Start the server in a background thread
         def run_server():
@@ -62,10 +541,12 @@ class WEBSOCKET_OT_stop_server(bpy.types.Operator):
             self.report({'INFO'}, "WebSocket server is not running")
             return {'FINISHED'}
         
+        _server_instance.main_thread.stop()
+        
         # Stop the server in a background thread
         def stop_server():
-            asyncio.run(_server_instance.stop_server())
             global _server_instance
+            asyncio.run(_server_instance.stop_server())
             _server_instance = None
         
         import threading
@@ -104,8 +585,23 @@ class BlenderWebSocketServer:
         self.port = port or int(os.environ.get("BLENDER_WS_PORT", DEFAULT_WS_PORT))
         self.server = None
         self.connected_clients = set()
+        # Wire encoding negotiated by each client
+        self.client_encodings: Dict[Any, str] = {}
         # Keep a list of command history for logging
         self.command_history: List[Dict[str, Any]] = []
+        # Scene versions for delta introspection; the instance id tells clients
+        # when versions from an earlier server run no longer apply
+        self.instance_id = uuid.uuid4().hex
+        self.scene_version = 0
+        self._scene_snapshots: "OrderedDict[int, Dict[str, Dict[str, Any]]]" = OrderedDict()
+        # All bpy access goes through the main thread
+        self.main_thread = MainThreadQueue()
+        # execute_code reuses compiled sources and one prebuilt sandbox namespace
+        self.code_cache = CodeCache()
+        self.sandbox_globals = _build_sandbox_globals()
+        # Execution jobs by id, oldest first
+        self.jobs: "OrderedDict[str, ExecutionJob]" = OrderedDict()
+        self._request_tasks = set()
         logger.info(f"Initialized BlenderWebSocketServer on {self.host}:{self.port}")
 
     async def handle_client(self, websocket):
@@ -116,10 +612,13 @@ class BlenderWebSocketServer:
         
         try:
             async for message in websocket:
+                request_id = None
                 try:
-                    data = json.loads(message)
-                    command = data.get("command")
-                    params = data.get("params", {})
+                    data = _decode_frame(message, self.client_encodings.get(websocket, "json"))
+                    # The backend sends action/data, older clients command/params
+                    command = data.get("action", data.get("command"))
+                    params = data.get("data", data.get("params", {}))
+                    request_id = data.get("id")
                     
                     logger.info(f"Received command: {command} from {client_ip}")
                     
@@ -131,30 +630,146 @@ class BlenderWebSocketServer:
                         "timestamp": datetime.now().isoformat()
                     })
                     
-                    if command == "introspect_scene":
-                        response = self.introspect_scene()
-                    elif command == "describe_function":
-                        function_path = params.get("function_path")
-                        response = self.describe_function(function_path)
-                    elif command == "execute_code":
-                        code = params.get("code")
-                        logger.debug(f"Executing code: {code[:100]}...")
-                        response = self.execute_code(code)
-                    else:
-                        logger.warning(f"Unknown command: {command}")
-                        response = {"error": f"Unknown command: {command}"}
+                    if command == "hello":
+                        # Answer in JSON, then switch this connection to the chosen encoding
+                        encoding = self.negotiate_encoding(params.get("encodings", []))
+                        await self._reply(websocket, request_id, {"result": {
+                            "encoding": encoding,
+                            "encodings": _available_encodings()
+                        }})
+                        self.client_encodings[websocket] = encoding
+                        continue
                     
-                    await websocket.send(json.dumps(response))
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON received from {client_ip}")
-                    await websocket.send(json.dumps({"error": "Invalid JSON"}))
+                    # Requests run concurrently, so a long script does not hold up
+                    # this connection; the main-thread queue keeps them in order
+                    task = asyncio.create_task(self._handle_request(websocket, command, params, request_id))
+                    self._request_tasks.add(task)
+                    task.add_done_callback(self._request_tasks.discard)
+                except ValueError:
+                    logger.warning(f"Invalid message received from {client_ip}")
+                    await self._reply(websocket, None, {"error": "Invalid message"})
                 except Exception as e:
                     logger.error(f"Error handling message: {str(e)}")
-                    await websocket.send(json.dumps({"error": str(e)}))
+                    await self._reply(websocket, request_id, {"error": str(e)})
         except websockets.exceptions.ConnectionClosed:
             logger.info(f"Client {client_ip} disconnected")
         finally:
             self.connected_clients.remove(websocket)
+            self.client_encodings.pop(websocket, None)
+    
+    async def _handle_request(self, websocket, command: str, params: Dict[str, Any], request_id: Any) -> None:
+        """
+        Run a request and send its response
+        
+        Args:
+            websocket: WebSocket connection the request came in on
+            command (str): Name of the command
+            params (Dict[str, Any]): Parameters of the command
+            request_id (Any): The ``id`` of the request
+        """
+        try:
+            if command == "get_mesh_data":
+                await self.send_mesh_data(websocket, request_id, params)
+            elif command == "run_job":
+                await self.run_job(websocket, request_id, params)
+            elif command == "introspect_scene" and params.get("stream"):
+                await self.stream_scene(websocket, request_id, params.get("query") or {}, params.get("chunk_size"))
+            elif command in LOOP_COMMANDS:
+                await self._reply(websocket, request_id, self._dispatch(command, params))
+            else:
+                response = await self.main_thread.run(self._dispatch, command, params)
+                await self._reply(websocket, request_id, response)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:
+            logger.error(f"Error handling message: {str(e)}")
+            try:
+                await self._reply(websocket, request_id, {"error": str(e)})
+            except websockets.exceptions.ConnectionClosed:
+                pass
+    
+    def _dispatch(self, command: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a single command and build its response
+        
+        Args:
+            command (str): Name of the command
+            params (Dict[str, Any]): Parameters of the command
+            
+        Returns:
+            Dict[str, Any]: Response for the command
+        """
+        if command == "introspect_scene":
+            if params.get("query"):
+                return self.query_scene(params["query"])
+            return self.introspect_scene(params.get("since_version"), params.get("instance"))
+        elif command == "describe_function":
+            function_path = params.get("function_path")
+            return self.describe_function(function_path)
+        elif command == "execute_code":
+            code = params.get("code")
+            logger.debug(f"Executing code: {code[:100]}...")
+            return self.execute_code(
+                code,
+                params.get("profile", False),
+                params.get("profile_top", PROFILE_TOP_N),
+                params.get("batch_mode", False)
+            )
+        elif command == "render":
+            return self.render(params)
+        elif command == "execute_batch":
+            return self.execute_batch(params.get("actions", []), params.get("stop_on_error", False))
+        elif command == "ping":
+            return {"action": "pong"}
+        elif command == "job_status":
+            job = self.jobs.get(params.get("job_id"))
+            if job is None:
+                return {"error": f"Unknown job: {params.get('job_id')}"}
+            return {"result": job.to_dict(include_output=True)}
+        elif command == "cancel_job":
+            job = self.jobs.get(params.get("job_id"))
+            if job is None:
+                return {"error": f"Unknown job: {params.get('job_id')}"}
+            if not job.done:
+                job.cancel()
+            return {"result": {**job.to_dict(), "cancel_requested": not job.done}}
+        elif command == "get_stats":
+            return {"result": {
+                "main_thread": self.main_thread.get_stats(),
+                "code_cache": self.code_cache.get_stats()
+            }}
+        else:
+            logger.warning(f"Unknown command: {command}")
+            return {"error": f"Unknown command: {command}"}
+    
+    async def _reply(self, websocket, request_id: Any, response: Dict[str, Any]) -> None:
+        """
+        Send a response, echoing the request's correlation id if it had one
+        
+        Args:
+            websocket: WebSocket connection to answer on
+            request_id (Any): The ``id`` of the request being answered
+            response (Dict[str, Any]): Response to send
+        """
+        if request_id is not None:
+            response = {**response, "id": request_id}
+        await websocket.send(_encode_frame(response, self.client_encodings.get(websocket, "json")))
+    
+    def negotiate_encoding(self, offered: List[str]) -> str:
+        """
+        Pick the wire encoding for a connection
+        
+        Args:
+            offered (List[str]): Encodings offered by the client, in order of preference
+            
+        Returns:
+            str: The first offered encoding available here, or "json"
+        """
+        available = _available_encodings()
+        for encoding in offered:
+            if encoding in available:
+                return encoding
+        return "json"
     
     async def start_server(self):
         """Start the WebSocket server"""
@@ -192,10 +807,19 @@ class BlenderWebSocketServer:
         """
         return self.command_history
     
-    def introspect_scene(self) -> Dict[str, Any]:
+    def introspect_scene(self, since_version: Optional[int] = None, instance: Optional[str] = None) -> Dict[str, Any]:
         """
         Introspect the current Blender scene
         
+        Every call compares the objects with the latest snapshot and bumps
+        ``version`` when anything changed. If the caller passes the version it
+        already holds, only the objects added, removed or changed since then
+        are returned; otherwise the full object list is returned.
+        
+        Args:
+            since_version (Optional[int]): Scene version the caller already holds
+            instance (Optional[str]): Server instance id the version belongs to
+        
         Returns:
             Dict[str, Any]: Scene information
         """
@@ -203,16 +827,21 @@ class BlenderWebSocketServer:
             # Get the active scene
             scene = bpy.context.scene
             
-            # Collect information about scene objects
-            objects_info = []
+            # Collect information about scene objects, reusing unchanged entries
+            # from the previous snapshot so snapshots share memory
+            previous = next(reversed(self._scene_snapshots.values()), {})
+            objects = {}
+            getters = [(field, OBJECT_FIELDS[field]) for field in DEFAULT_OBJECT_FIELDS]
             for obj in scene.objects:
-                obj_info = {
-                    "name": obj.name,
-                    "type": obj.type,
-                    "location": [obj.location.x, obj.location.y, obj.location.z],
-                    "visible": obj.visible_get()
-                }
-                objects_info.append(obj_info)
+                obj_info = {field: getter(obj) for field, getter in getters}
+                old_info = previous.get(obj.name)
+                objects[obj.name] = old_info if old_info == obj_info else obj_info
+            
+            if not self._scene_snapshots or objects != previous:
+                self.scene_version += 1
+                self._scene_snapshots[self.scene_version] = objects
+                while len(self._scene_snapshots) > MAX_SCENE_SNAPSHOTS:
+                    self._scene_snapshots.popitem(last=False)
             
             # Collect information about scene settings
             scene_info = {
@@ -221,9 +850,27 @@ class BlenderWebSocketServer:
                 "frame_start": scene.frame_start,
                 "frame_end": scene.frame_end,
                 "objects_count": len(scene.objects),
-                "objects": objects_info
+                "version": self.scene_version,
+                "instance": self.instance_id
             }
             
+            base = None
+            if since_version is not None and instance == self.instance_id:
+                base = self._scene_snapshots.get(since_version)
+            
+            if base is None:
+                scene_info["objects"] = list(objects.values())
+            else:
+                scene_info["since_version"] = since_version
+                scene_info["delta"] = {
+                    "added": [info for name, info in objects.items() if name not in base],
+                    "removed": [name for name in base if name not in objects],
+                    "changed": [
+                        info for name, info in objects.items()
+                        if name in base and base[name] is not info and base[name] != info
+                    ]
+                }
+            
             return {
                 "result": scene_info
             }
@@ -231,6 +878,403 @@ class BlenderWebSocketServer:
             logger.error(f"Error introspecting scene: {str(e)}")
             return {"error": f"Scene introspection error: {str(e)}"}
     
+    def query_scene(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Introspect a filtered, projected subset of the scene objects
+        
+        Filters run before any object is serialized, so objects and fields
+        nobody asked for are never built.
+        
+        Args:
+            query (Dict[str, Any]): Any of ``fields`` (list of OBJECT_FIELDS names),
+                ``types`` (e.g. ["MESH", "LIGHT"]), ``collection`` (collection name),
+                ``name`` (glob pattern), ``limit`` and ``offset``
+        
+        Returns:
+            Dict[str, Any]: Scene information with the matching objects
+        """
+        try:
+            getters = self._field_getters(query.get("fields"))
+            scene = bpy.context.scene
+            offset = max(0, int(query.get("offset", 0)))
+            limit = query.get("limit")
+            
+            objects_info = []
+            has_more = False
+            for index, obj in enumerate(self._iter_scene_objects(query)):
+                if index < offset:
+                    continue
+                if limit is not None and len(objects_info) >= int(limit):
+                    has_more = True
+                    break
+                objects_info.append({field: getter(obj) for field, getter in getters})
+            
+            return {
+                "result": {
+                    "name": scene.name,
+                    "frame_current": scene.frame_current,
+                    "frame_start": scene.frame_start,
+                    "frame_end": scene.frame_end,
+                    "objects_count": len(scene.objects),
+                    "query": query,
+                    "has_more": has_more,
+                    "objects": objects_info
+                }
+            }
+        except Exception as e:
+            logger.error(f"Error querying scene: {str(e)}")
+            return {"error": f"Scene query error: {str(e)}"}
+    
+    async def stream_scene(self, websocket, request_id: Any, query: Dict[str, Any], chunk_size: Optional[int] = None) -> None:
+        """
+        Stream the scene objects matching a query in fixed-size chunks
+        
+        Each chunk goes out in its own frame as ``{"chunk": seq, "objects": [...]}``
+        as soon as it is built, so neither side holds the whole object list.
+        Matching names are collected first; each chunk is then built in its
+        own main-thread job, skipping objects deleted in between.
+        The stream ends with ``{"end": True, "result": {...}}`` carrying the
+        scene settings and counts, or with an ``error`` frame.
+        
+        Args:
+            websocket: WebSocket connection to stream on
+            request_id (Any): The ``id`` of the request, echoed on every frame
+            query (Dict[str, Any]): Filters and fields, as for ``query_scene``
+            chunk_size (Optional[int]): Objects per chunk, SCENE_CHUNK_SIZE by default
+        """
+        try:
+            getters = self._field_getters(query.get("fields"))
+            chunk_size = max(1, int(chunk_size or SCENE_CHUNK_SIZE))
+            offset = max(0, int(query.get("offset", 0)))
+            limit = query.get("limit")
+            stop = offset + int(limit) if limit is not None else None
+            
+            names = await self.main_thread.run(
+                lambda: [obj.name for obj in itertools.islice(self._iter_scene_objects(query), offset, stop)]
+            )
+            
+            def build_chunk(chunk_names: List[str]) -> List[Dict[str, Any]]:
+                objects = bpy.context.scene.objects
+                return [
+                    {field: getter(obj) for field, getter in getters}
+                    for obj in (objects.get(name) for name in chunk_names) if obj is not None
+                ]
+            
+            seq = 0
+            streamed = 0
+            for start in range(0, len(names), chunk_size):
+                chunk = await self.main_thread.run(build_chunk, names[start:start + chunk_size])
+                await self._reply(websocket, request_id, {"chunk": seq, "objects": chunk})
+                seq += 1
+                streamed += len(chunk)
+            
+            scene_info = await self.main_thread.run(self._scene_settings)
+            await self._reply(websocket, request_id, {
+                "end": True,
+                "result": {
+                    **scene_info,
+                    "query": query,
+                    "chunks": seq,
+                    "streamed_objects": streamed
+                }
+            })
+        except websockets.exceptions.ConnectionClosed:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming scene: {str(e)}")
+            await self._reply(websocket, request_id, {"error": f"Scene query error: {str(e)}"})
+    
+    def _scene_settings(self) -> Dict[str, Any]:
+        """Get the name, frame range and object count of the active scene"""
+        scene = bpy.context.scene
+        return {
+            "name": scene.name,
+            "frame_current": scene.frame_current,
+            "frame_start": scene.frame_start,
+            "frame_end": scene.frame_end,
+            "objects_count": len(scene.objects)
+        }
+    
+    def _field_getters(self, fields: Optional[List[str]]) -> List[tuple]:
+        """
+        Resolve requested field names to their OBJECT_FIELDS getters
+        
+        Args:
+            fields (Optional[List[str]]): Requested fields, DEFAULT_OBJECT_FIELDS if empty
+        
+        Returns:
+            List[tuple]: (field, getter) pairs, always starting with "name"
+        
+        Raises:
+            ValueError: If a field is unknown
+        """
+        fields = list(fields or DEFAULT_OBJECT_FIELDS)
+        unknown = [field for field in fields if field not in OBJECT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. "
+                             f"Available fields: {', '.join(OBJECT_FIELDS)}")
+        if "name" not in fields:
+            fields = ["name"] + fields
+        return [(field, OBJECT_FIELDS[field]) for field in fields]
+    
+    def _iter_scene_objects(self, query: Dict[str, Any]):
+        """
+        Yield the scene objects that pass the type, collection and name filters of a query
+        
+        Args:
+            query (Dict[str, Any]): Query with optional ``types``, ``collection`` and ``name``
+        """
+        scene = bpy.context.scene
+        types = {object_type.upper() for object_type in query.get("types") or []}
+        pattern = query.get("name")
+        
+        objects = scene.objects
+        collection_name = query.get("collection")
+        if collection_name:
+            collection = bpy.data.collections.get(collection_name)
+            if collection is None:
+                return
+            objects = collection.all_objects
+        
+        for obj in objects:
+            if types and obj.type not in types:
+                continue
+            if pattern and not fnmatch.fnmatchcase(obj.name, pattern):
+                continue
+            yield obj
+    
+    async def send_mesh_data(self, websocket, request_id: Any, params: Dict[str, Any]) -> None:
+        """
+        Stream triangulated mesh geometry as raw binary buffers
+        
+        Every distinct mesh is announced in a ``{"chunk": seq, "mesh": {...}}``
+        frame naming the sequence numbers of its buffers, which follow as
+        binary frames (BUFFER_HEADER + little-endian float32/uint32 data).
+        Objects whose geometry hashes the same share one mesh. The stream ends
+        with ``{"end": True, "result": {...}}`` listing every object with its
+        mesh hash and world matrix.
+        
+        Args:
+            websocket: WebSocket connection to stream on
+            request_id (Any): The ``id`` of the request; must be an integer
+            params (Dict[str, Any]): ``objects`` (names, all meshes by default),
+                ``evaluated`` (apply modifiers), ``normals`` and ``uvs`` (default True)
+        """
+        if not isinstance(request_id, int) or isinstance(request_id, bool):
+            await self._reply(websocket, request_id, {"error": "get_mesh_data needs an integer request id"})
+            return
+        
+        try:
+            names = params.get("objects")
+            if not names:
+                names = await self.main_thread.run(
+                    lambda: [obj.name for obj in bpy.context.scene.objects if obj.type == 'MESH']
+                )
+            evaluated = bool(params.get("evaluated", False))
+            normals = params.get("normals", True)
+            uvs = params.get("uvs", True)
+            
+            def read_object(name: str):
+                obj = bpy.context.scene.objects.get(name)
+                if obj is None or obj.type != 'MESH':
+                    return None
+                info = {"name": obj.name, "matrix_world": [list(row) for row in obj.matrix_world]}
+                # Unevaluated objects sharing a mesh datablock are read once
+                if not evaluated and obj.data.name in data_hashes:
+                    return info, obj.data.name, None
+                depsgraph = bpy.context.evaluated_depsgraph_get() if evaluated else None
+                return info, obj.data.name, self._read_mesh(obj, depsgraph, normals, uvs)
+            
+            seq = 0
+            sent = set()
+            data_hashes: Dict[str, str] = {}
+            objects_info = []
+            total_bytes = 0
+            for name in names:
+                # Geometry is read on the main thread, hashed and sent from here
+                entry = await self.main_thread.run(read_object, name)
+                if entry is None:
+                    continue
+                info, data_name, buffers = entry
+                if buffers is None:
+                    content_hash = data_hashes[data_name]
+                else:
+                    digest = hashlib.blake2b(digest_size=16)
+                    for buffer in buffers.values():
+                        digest.update(buffer)
+                    content_hash = digest.hexdigest()
+                    if not evaluated:
+                        data_hashes[data_name] = content_hash
+                info["mesh"] = content_hash
+                objects_info.append(info)
+                
+                if content_hash in sent:
+                    continue
+                sent.add(content_hash)
+                layout = {name: seq + 1 + index for index, name in enumerate(buffers)}
+                await self._reply(websocket, request_id, {"chunk": seq, "mesh": {
+                    "hash": content_hash,
+                    "vertex_count": len(buffers["vertices"]) // 3,
+                    "triangle_count": len(buffers["faces"]) // 3,
+                    "buffers": layout
+                }})
+                seq += 1
+                for buffer in buffers.values():
+                    await websocket.send(BUFFER_HEADER.pack(BUFFER_MAGIC, request_id, seq) + buffer.tobytes())
+                    total_bytes += len(buffer) * buffer.itemsize
+                    seq += 1
+            
+            await self._reply(websocket, request_id, {
+                "end": True,
+                "result": {
+                    "objects": objects_info,
+                    "meshes": len(sent),
+                    "evaluated": evaluated,
+                    "dtypes": {"vertices": "float32", "faces": "uint32", "normals": "float32", "uvs": "float32"},
+                    "buffer_bytes": total_bytes,
+                    "frames": seq
+                }
+            })
+        except websockets.exceptions.ConnectionClosed:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading mesh data: {str(e)}")
+            await self._reply(websocket, request_id, {"error": f"Mesh data error: {str(e)}"})
+    
+    async def run_job(self, websocket, request_id: Any, params: Dict[str, Any]) -> None:
+        """
+        Run a script as an execution job, streaming its progress
+        
+        The stream starts with ``{"chunk": 0, "job": {...}}``. While the job
+        runs, status changes arrive as ``{"chunk": seq, "status": ...}`` and
+        printed output as ``{"chunk": seq, "stream": "stdout", "data": ...}``.
+        It ends with ``{"end": True, "result": {...}}`` describing the job.
+        
+        Args:
+            websocket: WebSocket connection to stream on
+            request_id (Any): The ``id`` of the request, echoed on every frame
+            params (Dict[str, Any]): ``code`` and optionally ``job_id``
+        """
+        job_id = params.get("job_id") or uuid.uuid4().hex
+        if job_id in self.jobs:
+            await self._reply(websocket, request_id, {"error": f"Job {job_id} already exists"})
+            return
+        
+        job = ExecutionJob(job_id, params.get("code", ""), asyncio.get_running_loop())
+        self.jobs[job_id] = job
+        finished = [old_id for old_id, old_job in self.jobs.items() if old_job.done]
+        for old_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[old_id]
+        
+        await self._reply(websocket, request_id, {"chunk": 0, "job": job.to_dict()})
+        runner = asyncio.ensure_future(self.main_thread.run(self._execute_job, job))
+        runner.add_done_callback(lambda _: job.events.put_nowait(None))
+        
+        seq = 1
+        try:
+            while True:
+                event = await job.events.get()
+                if event is None:
+                    break
+                await self._reply(websocket, request_id, {"chunk": seq, **event})
+                seq += 1
+        except websockets.exceptions.ConnectionClosed:
+            # Nobody is listening any more; let the job finish on its own
+            return
+        
+        await self._reply(websocket, request_id, {"end": True, "result": job.to_dict()})
+    
+    def _execute_job(self, job: ExecutionJob) -> None:
+        """
+        Execute a job's script on the main thread
+        
+        Args:
+            job (ExecutionJob): The job to run
+        """
+        if job._cancel.is_set():
+            job.set_status("cancelled")
+            return
+        job.set_status("running")
+        try:
+            # Same sandbox as execute_code, with print and a cancellation point bound to the job
+            safe_globals = dict(self.sandbox_globals)
+            safe_globals['__builtins__'] = {**self.sandbox_globals['__builtins__'], 'print': job.print}
+            safe_globals['check_cancelled'] = job.check_cancelled
+            locals_dict = {}
+            previous_trace = sys.gettrace()
+            sys.settrace(job.trace)
+            try:
+                exec(self.code_cache.get(job.code), safe_globals, locals_dict)
+            finally:
+                sys.settrace(previous_trace)
+            job.set_status("succeeded", result=str(locals_dict.get("result", "")))
+        except JobCancelled:
+            job.set_status("cancelled")
+        except Exception as e:
+            job.write("stderr", traceback.format_exc())
+            job.set_status("failed", error=f"Execution error: {str(e)}")
+    
+    def _read_mesh(self, obj, depsgraph, normals: bool = True, uvs: bool = True) -> Dict[str, array.array]:
+        """
+        Read an object's triangulated geometry into flat typed arrays with foreach_get
+        
+        Args:
+            obj: Mesh object to read
+            depsgraph: Evaluated depsgraph to read the post-modifier mesh from, or None
+            normals (bool): Include per-vertex normals
+            uvs (bool): Include per-vertex UVs of the active UV map
+        
+        UVs are stored per loop, but the viewer indexes geometry per vertex, so
+        a vertex on a UV seam (one vertex, several UVs) gets the UV of its
+        lowest-numbered loop; faces on the other side of the seam show a
+        stretched texture there. Vertices in no face get (0, 0).
+        
+        Returns:
+            Dict[str, array.array]: ``vertices`` and ``faces``, plus ``normals``/``uvs`` when requested
+        """
+        source = obj.evaluated_get(depsgraph) if depsgraph is not None else obj
+        mesh = source.to_mesh() if depsgraph is not None else obj.data
+        try:
+            mesh.calc_loop_triangles()
+            vertex_count = len(mesh.vertices)
+            
+            vertices = array.array('f', bytes(4 * 3 * vertex_count))
+            mesh.vertices.foreach_get("co", vertices)
+            # foreach_get fills int properties through signed 32-bit buffers;
+            # the indices are never negative, so the bytes are valid uint32
+            faces = array.array('i', bytes(4 * 3 * len(mesh.loop_triangles)))
+            mesh.loop_triangles.foreach_get("vertices", faces)
+            buffers = {"vertices": vertices, "faces": faces}
+            
+            if normals:
+                vertex_normals = array.array('f', bytes(4 * 3 * vertex_count))
+                if hasattr(mesh, "vertex_normals"):
+                    mesh.vertex_normals.foreach_get("vector", vertex_normals)
+                else:
+                    mesh.vertices.foreach_get("normal", vertex_normals)
+                buffers["normals"] = vertex_normals
+            
+            uv_layer = mesh.uv_layers.active if uvs else None
+            if uv_layer is not None:
+                loop_count = len(mesh.loops)
+                loop_vertices = array.array('i', bytes(4 * loop_count))
+                mesh.loops.foreach_get("vertex_index", loop_vertices)
+                loop_uvs = array.array('f', bytes(4 * 2 * loop_count))
+                uv_layer.data.foreach_get("uv", loop_uvs)
+                # Scatter the first loop's UV of each vertex in numpy, writing through
+                # to the array so it is sent like the other buffers
+                vertex_uvs = array.array('f', bytes(4 * 2 * vertex_count))
+                used_vertices, first_loops = np.unique(np.frombuffer(loop_vertices, dtype=np.int32), return_index=True)
+                np.frombuffer(vertex_uvs, dtype=np.float32).reshape(-1, 2)[used_vertices] = (
+                    np.frombuffer(loop_uvs, dtype=np.float32).reshape(-1, 2)[first_loops]
+                )
+                buffers["uvs"] = vertex_uvs
+            
+            return buffers
+        finally:
+            if depsgraph is not None:
+                source.to_mesh_clear()
+    
     def describe_function(self, function_path: str) -> Dict[str, Any]:
         """
         Get documentation for a Blender Python function
@@ -285,44 +1329,310 @@ class BlenderWebSocketServer:
             logger.error(traceback.format_exc())
             return {"error": f"Function description error: {str(e)}"}
 
-    def execute_code(self, code: str) -> Dict[str, Any]:
+    def render(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Execute Python code in Blender
+        Render a still image of the active scene to a file
         
         Args:
-            code (str): Python code to execute
-            
+            params (Dict[str, Any]): ``filepath`` (required), and optionally ``frame``,
+                ``engine`` (e.g. "CYCLES"), ``resolution_x``, ``resolution_y`` and ``samples``
+        
         Returns:
-            dict: Result of execution
+            Dict[str, Any]: Path of the written image and the render time
         """
+        filepath = params.get("filepath")
+        if not filepath:
+            return {"error": "render needs a filepath"}
         try:
-            # Create a restricted globals dict with only safe Blender modules
-            safe_globals = {
-                'bpy': bpy,
-                'mathutils': __import__('mathutils'),
-                '__builtins__': {
-                    k: __builtins__[k] for k in [
-                        'abs', 'all', 'any', 'bool', 'dict', 'dir', 'enumerate', 
-                        'filter', 'float', 'format', 'frozenset', 'getattr', 'hasattr',
-                        'hash', 'id', 'int', 'isinstance', 'issubclass', 'iter', 'len',
-                        'list', 'map', 'max', 'min', 'next', 'object', 'pow', 'print',
-                        'property', 'range', 'repr', 'reversed', 'round', 'set', 'slice',
-                        'sorted', 'str', 'sum', 'tuple', 'type', 'zip'
-                    ]
-                }
-            }
-            
-            # Create a locals dict to capture output
-            locals_dict = {}
-            
-            # Execute the code with restricted globals
-            exec(code, safe_globals, locals_dict)
+            scene = bpy.context.scene
+            if params.get("frame") is not None:
+                scene.frame_set(int(params["frame"]))
+            if params.get("engine"):
+                scene.render.engine = params["engine"]
+            if params.get("resolution_x"):
+                scene.render.resolution_x = int(params["resolution_x"])
+            if params.get("resolution_y"):
+                scene.render.resolution_y = int(params["resolution_y"])
+            if params.get("samples") and scene.render.engine == "CYCLES":
+                scene.cycles.samples = int(params["samples"])
+            scene.render.filepath = filepath
             
+            start = time.perf_counter()
+            bpy.ops.render.render(write_still=True)
             return {
                 "result": {
-                    "message": "Code executed successfully",
-                    "output": str(locals_dict.get("result", ""))
+                    "filepath": bpy.path.abspath(scene.render.filepath),
+                    "frame": scene.frame_current,
+                    "engine": scene.render.engine,
+                    "render_time_ms": round((time.perf_counter() - start) * 1000, 3)
                 }
             }
         except Exception as e:
-            return {"error": f"Execution error: {str(e)}"}
\ No newline at end of file
+            logger.error(f"Error rendering: {str(e)}")
+            return {"error": f"Render error: {str(e)}"}
+
+    def execute_batch(self, actions: List[Dict[str, Any]], stop_on_error: bool = False) -> Dict[str, Any]:
+        """
+        Run an ordered list of commands and return all their results in one response
+        
+        Args:
+            actions (List[Dict[str, Any]]): Commands as {"action": ..., "data": {...}}
+            stop_on_error (bool): Skip the remaining commands after the first error
+            
+        Returns:
+            Dict[str, Any]: The result of every command that ran, in order
+        """
+        results = []
+        stopped = False
+        for index, item in enumerate(actions):
+            command = item.get("action", item.get("command"))
+            params = item.get("data", item.get("params", {}))
+            
+            if command == "execute_batch":
+                response = {"error": "Nested batches are not supported"}
+            else:
+                response = self._dispatch(command, params)
+            results.append({**response, "index": index, "action": command})
+            
+            if stop_on_error and "error" in response:
+                stopped = True
+                break
+        
+        return {
+            "result": {
+                "results": results,
+                "completed": len(results),
+                "total": len(actions),
+                "stopped": stopped
+            }
+        }
+
+    def execute_code(
+        self,
+        code: str,
+        profile: bool = False,
+        profile_top: int = PROFILE_TOP_N,
+        batch_mode: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Execute Python code in Blender
+        
+        Args:
+            code (str): Python code to execute
+            profile (bool): Run the code under cProfile and add a ``profile`` report
+            profile_top (int): Number of hot functions in the report
+            batch_mode (bool): Defer undo pushes, depsgraph handlers and redraws to the
+                end of the script and add a ``batch`` report
+            
+        Returns:
+            dict: Result of execution
+        """
+        profiler = None
+        depsgraph_updates = [0]
+        batch = self._begin_batch() if batch_mode else None
+        
+        def count_depsgraph_update(*args):
+            depsgraph_updates[0] += 1
+        
+        try:
+            try:
+                # Copy the prebuilt restricted globals with only safe Blender modules;
+                # the import statement needs __builtins__ to be a real dict
+                safe_globals = dict(self.sandbox_globals)
+                safe_globals['__builtins__'] = dict(self.sandbox_globals['__builtins__'])
+                
+                # Create a locals dict to capture output
+                locals_dict = {}
+                
+                compiled = self.code_cache.get(code)
+                if profile:
+                    profiler = cProfile.Profile()
+                    bpy.app.handlers.depsgraph_update_post.append(count_depsgraph_update)
+                    wall_start = time.perf_counter()
+                    cpu_start = time.process_time()
+                    profiler.enable()
+                
+                # Execute the cached compiled code with restricted globals
+                try:
+                    exec(compiled, safe_globals, locals_dict)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+                        wall_time = time.perf_counter() - wall_start
+                        cpu_time = time.process_time() - cpu_start
+                        bpy.app.handlers.depsgraph_update_post.remove(count_depsgraph_update)
+                
+                response = {
+                    "result": {
+                        "message": "Code executed successfully",
+                        "output": str(locals_dict.get("result", ""))
+                    }
+                }
+            except Exception as e:
+                response = {"error": f"Execution error: {str(e)}"}
+        finally:
+            # Handlers and the undo preference come back even if the script was interrupted
+            if batch is not None:
+                self._restore_batch(batch)
+        
+        if batch is not None:
+            report = self._finish_batch(batch)
+            if "result" in response:
+                response["result"]["batch"] = report
+            else:
+                response["batch"] = report
+        
+        if profiler is not None:
+            report = self._profile_report(profiler, profile_top)
+            report.update({
+                "wall_time_ms": round(wall_time * 1000, 3),
+                "cpu_time_ms": round(cpu_time * 1000, 3),
+                "depsgraph_updates": depsgraph_updates[0]
+            })
+            if "result" in response:
+                response["result"]["profile"] = report
+            else:
+                response["profile"] = report
+        return response
+    
+    def _begin_batch(self) -> Dict[str, Any]:
+        """
+        Suspend per-operation updates for an execute_code run in batch mode
+        
+        Global undo is switched off, so operators called by the script push no
+        undo steps, and the depsgraph handlers are detached, so the updates the
+        script causes do not run them. A counting handler takes their place.
+        Blender does not redraw while the script holds the main thread; the
+        redraws it queues are collapsed into one at the end.
+        
+        Returns:
+            Dict[str, Any]: State for ``_restore_batch`` and ``_finish_batch``
+        """
+        handlers = bpy.app.handlers
+        batch = {
+            "started": time.perf_counter(),
+            "use_global_undo": bpy.context.preferences.edit.use_global_undo,
+            "pre_handlers": list(handlers.depsgraph_update_pre),
+            "post_handlers": list(handlers.depsgraph_update_post),
+            "updates": [0]
+        }
+        
+        def count_deferred_update(*args):
+            batch["updates"][0] += 1
+        
+        batch["counter"] = count_deferred_update
+        bpy.context.preferences.edit.use_global_undo = False
+        handlers.depsgraph_update_pre.clear()
+        handlers.depsgraph_update_post.clear()
+        handlers.depsgraph_update_post.append(count_deferred_update)
+        return batch
+    
+    def _restore_batch(self, batch: Dict[str, Any]) -> None:
+        """
+        Reattach the depsgraph handlers and restore global undo after a batch mode run
+        
+        ``use_global_undo`` is a user preference, so this must run however the
+        script ended.
+        
+        Args:
+            batch (Dict[str, Any]): State returned by ``_begin_batch``
+        """
+        handlers = bpy.app.handlers
+        batch["script_time"] = time.perf_counter() - batch["started"]
+        if batch["counter"] in handlers.depsgraph_update_post:
+            handlers.depsgraph_update_post.remove(batch["counter"])
+        # Handlers the script itself registered stay, after the restored ones
+        added_pre = list(handlers.depsgraph_update_pre)
+        added_post = list(handlers.depsgraph_update_post)
+        handlers.depsgraph_update_pre.clear()
+        handlers.depsgraph_update_post.clear()
+        for handler in batch["pre_handlers"] + added_pre:
+            handlers.depsgraph_update_pre.append(handler)
+        for handler in batch["post_handlers"] + added_post:
+            handlers.depsgraph_update_post.append(handler)
+        bpy.context.preferences.edit.use_global_undo = batch["use_global_undo"]
+    
+    def _finish_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply the deferred updates of a batch mode run once, after ``_restore_batch``
+        
+        Evaluates the depsgraph once, which runs the restored depsgraph handlers
+        for everything the script changed, pushes a single undo step for the
+        whole script and tags the UI for one redraw.
+        
+        ``estimated_update_time_saved_ms`` multiplies the time of that final
+        update (evaluation and handlers) by the number of further updates the
+        script caused. It is an estimate of the depsgraph work avoided only;
+        the skipped undo pushes and redraws are not included, and per-operation
+        updates may be cheaper than the final one.
+        
+        Args:
+            batch (Dict[str, Any]): State returned by ``_begin_batch``
+            
+        Returns:
+            Dict[str, Any]: Script time, deferred update count, final update and
+            finalization times, whether an undo step was pushed and the estimate
+        """
+        deferred_updates = batch["updates"][0]
+        finalize_start = time.perf_counter()
+        
+        # The single depsgraph update of the batch; evaluating runs the handlers
+        bpy.context.evaluated_depsgraph_get()
+        update_time = time.perf_counter() - finalize_start
+        
+        # One undo step for the whole script; there is no undo stack in background mode
+        undo_pushed = False
+        if not bpy.app.background and batch["use_global_undo"]:
+            try:
+                bpy.ops.ed.undo_push(message=BATCH_UNDO_MESSAGE)
+                undo_pushed = True
+            except RuntimeError as e:
+                logger.warning(f"Could not push the batch undo step: {str(e)}")
+        
+        # One redraw of every area instead of one per operation
+        window_manager = bpy.context.window_manager
+        for window in (window_manager.windows if window_manager else []):
+            for area in window.screen.areas:
+                area.tag_redraw()
+        
+        finalize_time = time.perf_counter() - finalize_start
+        return {
+            "script_time_ms": round(batch["script_time"] * 1000, 3),
+            "deferred_updates": deferred_updates,
+            "final_update_ms": round(update_time * 1000, 3),
+            "finalize_time_ms": round(finalize_time * 1000, 3),
+            "undo_pushed": undo_pushed,
+            "estimated_update_time_saved_ms": round(max(0, deferred_updates - 1) * update_time * 1000, 3)
+        }
+    
+    def _profile_report(self, profiler: cProfile.Profile, top: int) -> Dict[str, Any]:
+        """
+        Summarize a profiled execute_code run
+        
+        Args:
+            profiler (cProfile.Profile): Profiler that ran the code
+            top (int): Number of hot functions to list
+        
+        Returns:
+            Dict[str, Any]: Operator call count and the functions with the most own time
+        """
+        stats = pstats.Stats(profiler).stats
+        operator_calls = 0
+        functions = []
+        for (filename, line, name), (_, calls, own_time, cumulative_time, _) in stats.items():
+            # Every bpy.ops.<module>.<op>(...) call goes through this method in bpy/ops.py
+            if name == "__call__" and filename.replace("\\", "/").endswith("bpy/ops.py"):
+                operator_calls += calls
+            if name == "<method 'disable' of '_lsprof.Profiler' objects>":
+                continue
+            functions.append({
+                "function": f"{filename}:{line}({name})" if line else name,
+                "calls": calls,
+                "own_time_ms": round(own_time * 1000, 3),
+                "cumulative_time_ms": round(cumulative_time * 1000, 3)
+            })
+        functions.sort(key=lambda entry: entry["own_time_ms"], reverse=True)
+        return {
+            "operator_calls": operator_calls,
+            "top_functions": functions[:max(0, int(top))]
+        }
\ No newline at end of file
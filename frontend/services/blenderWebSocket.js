@@ -19,6 +19,8 @@ class BlenderWebSocketService {
 
     try {
       this.socket = new WebSocket(url);
+      // Mesh geometry arrives as raw binary frames
+      this.socket.binaryType = 'arraybuffer';
 
       this.socket.onopen = () => {
         console.log('Connected to Blender WebSocket server');
@@ -28,6 +30,12 @@ class BlenderWebSocketService {
       };
 
       this.socket.onmessage = (event) => {
+        if (event.data instanceof ArrayBuffer) {
+          // Header: 4-byte magic, uint32 request id, uint32 sequence number
+          const seq = new DataView(event.data).getUint32(8, true);
+          this._notifyMessageCallbacks({ type: 'mesh_buffer', seq, buffer: event.data });
+          return;
+        }
         try {
           const data = JSON.parse(event.data);
           this._notifyMessageCallbacks(data);
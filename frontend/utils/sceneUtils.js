@@ -34,7 +34,10 @@ export function createGeometryFromBlenderMesh(meshData) {
   
   // Add faces/indices
   if (meshData.faces && meshData.faces.length > 0) {
-    geometry.setIndex(meshData.faces);
+    const faces = ArrayBuffer.isView(meshData.faces)
+      ? new THREE.BufferAttribute(meshData.faces, 1)
+      : meshData.faces;
+    geometry.setIndex(faces);
   }
   
   // Add normals if available
@@ -47,13 +50,36 @@ export function createGeometryFromBlenderMesh(meshData) {
   
   // Add UVs if available
   if (meshData.uvs && meshData.uvs.length > 0) {
-    const uvs = new Float32Array(meshData.uvs);
+    const uvs = meshData.uvs instanceof Float32Array ? meshData.uvs : new Float32Array(meshData.uvs);
     geometry.setAttribute('uv', new THREE.BufferAttribute(uvs, 2));
   }
   
   return geometry;
 }
 
+// Size of the header in front of the data of a mesh buffer frame
+export const MESH_BUFFER_HEADER_SIZE = 12;
+
+/**
+ * Builds mesh data from the binary buffers sent by get_mesh_data
+ * @param {Object} mesh - Mesh description from a mesh_data message
+ * @param {Map<number, ArrayBuffer>} buffers - Binary frames received so far, by sequence number
+ * @returns {Object|null} - Mesh data for createGeometryFromBlenderMesh, or null if a buffer is missing
+ */
+export function meshDataFromBuffers(mesh, buffers) {
+  const meshData = {};
+  for (const [name, seq] of Object.entries(mesh.buffers)) {
+    const buffer = buffers.get(seq);
+    if (!buffer) {
+      return null;
+    }
+    meshData[name] = name === 'faces'
+      ? new Uint32Array(buffer, MESH_BUFFER_HEADER_SIZE)
+      : new Float32Array(buffer, MESH_BUFFER_HEADER_SIZE);
+  }
+  return meshData;
+}
+
 /**
  * Creates a Three.js material from Blender material data
  * @param {Object} materialData - Material data from Blender
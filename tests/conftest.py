@@ -0,0 +1,9 @@
+"""
+Shared test setup: the backend modules import each other from the backend directory.
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend"))
+sys.path.insert(0, ROOT_DIR)
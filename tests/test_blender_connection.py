@@ -0,0 +1,127 @@
+"""
+Tests for correlation-id multiplexing of requests over one Blender connection.
+"""
+import json
+import asyncio
+
+import pytest
+
+from utils.websocket_utils import BlenderConnection, BlenderConnectionLost
+
+class FakeWebSocket:
+    """In-memory WebSocket: records sent frames and yields the replies queued with ``reply``"""
+    def __init__(self):
+        self.sent = []
+        self.incoming = asyncio.Queue()
+        self.closed = False
+
+    async def send(self, frame):
+        self.sent.append(json.loads(frame))
+
+    def reply(self, message):
+        self.incoming.put_nowait(json.dumps(message))
+
+    async def close(self):
+        self.closed = True
+        self.incoming.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self.incoming.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+async def wait_for_frames(websocket, count):
+    """Let pending requests write their frames"""
+    while len(websocket.sent) < count:
+        await asyncio.sleep(0)
+
+def test_replies_out_of_order_reach_their_requests():
+    async def scenario():
+        websocket = FakeWebSocket()
+        conn = BlenderConnection(websocket)
+        first = asyncio.create_task(conn.request({"action": "render"}))
+        second = asyncio.create_task(conn.request({"action": "ping"}))
+        await wait_for_frames(websocket, 2)
+        assert conn.in_flight == 2
+
+        ids = {frame["action"]: frame["id"] for frame in websocket.sent}
+        websocket.reply({"id": ids["ping"], "action": "pong"})
+        websocket.reply({"id": ids["render"], "result": "done"})
+        results = await asyncio.gather(first, second)
+        await conn.close()
+        return results, conn.in_flight
+
+    results, in_flight = asyncio.run(scenario())
+    assert results == [{"result": "done"}, {"action": "pong"}]
+    assert in_flight == 0
+
+def test_replies_without_ids_are_matched_in_order():
+    async def scenario():
+        websocket = FakeWebSocket()
+        conn = BlenderConnection(websocket)
+        first = asyncio.create_task(conn.request({"action": "a"}))
+        second = asyncio.create_task(conn.request({"action": "b"}))
+        await wait_for_frames(websocket, 2)
+        websocket.reply({"result": 1})
+        websocket.reply({"result": 2})
+        results = await asyncio.gather(first, second)
+        await conn.close()
+        return results
+
+    assert asyncio.run(scenario()) == [{"result": 1}, {"result": 2}]
+
+def test_stream_collects_chunks_until_the_end_marker():
+    async def scenario():
+        websocket = FakeWebSocket()
+        conn = BlenderConnection(websocket)
+        frames = []
+
+        async def consume():
+            async for frame in conn.stream({"action": "introspect_scene"}):
+                frames.append(frame)
+
+        consumer = asyncio.create_task(consume())
+        other = asyncio.create_task(conn.request({"action": "ping"}))
+        await wait_for_frames(websocket, 2)
+        stream_id, ping_id = websocket.sent[0]["id"], websocket.sent[1]["id"]
+        websocket.reply({"id": stream_id, "chunk": 0, "objects": ["Cube"]})
+        websocket.reply({"id": ping_id, "action": "pong"})
+        websocket.reply({"id": stream_id, "chunk": 1, "objects": ["Light"]})
+        websocket.reply({"id": stream_id, "end": True})
+        await consumer
+        pong = await other
+        await conn.close()
+        return frames, pong
+
+    frames, pong = asyncio.run(scenario())
+    assert frames == [{"chunk": 0, "objects": ["Cube"]}, {"chunk": 1, "objects": ["Light"]}, {"end": True}]
+    assert pong == {"action": "pong"}
+
+def test_pending_requests_fail_when_the_connection_closes():
+    async def scenario():
+        websocket = FakeWebSocket()
+        conn = BlenderConnection(websocket)
+        pending = asyncio.create_task(conn.request({"action": "render"}))
+        await wait_for_frames(websocket, 1)
+        await websocket.close()
+        with pytest.raises(BlenderConnectionLost):
+            await pending
+        return conn.closed
+
+    assert asyncio.run(scenario())
+
+def test_unanswered_request_times_out_and_is_forgotten():
+    async def scenario():
+        websocket = FakeWebSocket()
+        conn = BlenderConnection(websocket)
+        with pytest.raises(asyncio.TimeoutError):
+            await conn.request({"action": "render"}, timeout=0.01)
+        in_flight = conn.in_flight
+        await conn.close()
+        return in_flight
+
+    assert asyncio.run(scenario()) == 0
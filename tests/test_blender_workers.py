@@ -0,0 +1,158 @@
+"""
+Tests for routing requests across several Blender agent instances.
+"""
+import asyncio
+
+import pytest
+
+from utils import blender_workers
+from utils.blender_workers import BlenderWorker, BlenderWorkerPool
+from utils.circuit_breaker import CircuitBreaker
+
+class FakeConnectionPool:
+    """Stands in for BlenderConnectionPool: answers once ``release`` is set"""
+    def __init__(self, ws_url):
+        self.ws_url = ws_url
+        self.breaker = CircuitBreaker()
+        self.release = asyncio.Event()
+        self.release.set()
+        self.sent = []
+
+    async def send(self, action, data):
+        self.sent.append(action)
+        await self.release.wait()
+        return {"status": "success", "url": self.ws_url}
+
+    def get_link_state(self):
+        return {"url": self.ws_url, "state": "up"}
+
+    def get_stats(self):
+        return {"url": self.ws_url, "requests": len(self.sent)}
+
+class FakeProcess:
+    """Stands in for HeadlessBlenderProcess without launching Blender"""
+    alive = True
+    process = None
+
+    def __init__(self):
+        self.jobs_run = 0
+        self.baseline_rss = None
+        self.restarts = 0
+
+    def rss_bytes(self):
+        return None
+
+def make_pool(ui=2, headless=0, **options):
+    """Worker pool over ``ui`` running Blender instances and ``headless`` managed ones"""
+    workers = [BlenderWorker(f"blender-{i}", FakeConnectionPool(f"ws://ui-{i}")) for i in range(ui)]
+    workers += [
+        BlenderWorker(f"headless-{i}", FakeConnectionPool(f"ws://headless-{i}"), FakeProcess())
+        for i in range(headless)
+    ]
+    return BlenderWorkerPool(workers, **options)
+
+def test_session_stays_on_its_worker():
+    pool = make_pool(ui=3)
+    first = pool.route("alice")
+    # Busier than the others now, but the session keeps its Blender
+    first.queue_depth = 5
+    assert pool.route("alice") is first
+    assert pool.route("bob") is not first
+
+def test_sessionless_calls_go_to_the_primary():
+    pool = make_pool(ui=3)
+    pool.workers[0].queue_depth = 5
+    assert pool.route() is pool.workers[0]
+    assert pool.route(None) is pool.workers[0]
+    assert pool.route(blender_workers.DEFAULT_SESSION) is pool.workers[0]
+
+def test_sessionless_calls_move_off_an_unhealthy_primary():
+    pool = make_pool(ui=2)
+    pool.workers[0].pool.breaker.trip("connection refused")
+    assert pool.route() is pool.workers[1]
+
+def test_new_session_goes_to_the_least_loaded_worker():
+    pool = make_pool(ui=3)
+    pool.workers[0].queue_depth = 2
+    pool.workers[1].queue_depth = 1
+    pool.workers[2].queue_depth = 1
+    pool.workers[1].requests = 10
+    # Fewest queued requests first, then fewest served
+    assert pool.route("alice") is pool.workers[2]
+
+def test_unhealthy_workers_are_skipped():
+    pool = make_pool(ui=2)
+    pool.workers[1].queue_depth = 3
+    pool.workers[0].pool.breaker.trip("connection refused")
+    assert pool.route("alice") is pool.workers[1]
+    # Every worker down: still pick one, so the request fails with the link error
+    pool.workers[1].pool.breaker.trip("connection refused")
+    assert pool.route("bob") in pool.workers
+
+def test_session_on_an_unhealthy_worker_moves():
+    pool = make_pool(ui=2)
+    first = pool.route("alice")
+    first.pool.breaker.trip("connection refused")
+    moved = pool.route("alice")
+    assert moved is not first
+    first.pool.breaker.record_success()
+    assert pool.route("alice") is moved
+
+def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(blender_workers.time, "monotonic", lambda: now[0])
+    pool = make_pool(ui=2, session_ttl=60)
+    first = pool.route("alice")
+    first.queue_depth = 1
+    now[0] += 59
+    assert pool.route("alice") is first
+    now[0] += 61
+    assert pool.route("alice") is not first
+    assert pool.get_stats()["sessions"] == 1
+
+def test_sessions_avoid_managed_headless_workers():
+    pool = make_pool(ui=1, headless=2)
+    pool.workers[0].queue_depth = 5
+    assert all(pool.route(session).process is None for session in ("alice", "bob", None))
+    # Headless workers still take sessions when they are all there is
+    headless_only = make_pool(ui=0, headless=2)
+    assert headless_only.route("alice").process is not None
+
+@pytest.mark.parametrize("pinned", [True, False])
+def test_worker_with_a_pinned_session_is_not_recycled(pinned):
+    async def scenario():
+        pool = make_pool(ui=0, headless=1, max_jobs_per_worker=1)
+        if pinned:
+            pool.route("alice")
+        await pool.dispatch("execute_code", {"code": "pass"})
+        # Checked before asyncio.run cancels the recycle
+        return pool.workers[0].process.jobs_run, len(pool._recycle_tasks)
+
+    assert asyncio.run(scenario()) == (1, 0 if pinned else 1)
+
+def test_stats_report_queue_depth_per_worker():
+    async def scenario():
+        pool = make_pool(ui=2)
+        busy = pool.workers[1]
+        busy.pool.release.clear()
+        requests = [asyncio.create_task(pool.send("get_scene_info", {}, worker=busy)) for _ in range(3)]
+        await pool.send("ping", {}, session_id=None)
+        while len(busy.pool.sent) < 3:
+            await asyncio.sleep(0)
+        during = pool.get_stats()
+        busy.pool.release.set()
+        await asyncio.gather(*requests)
+        return during, pool.get_stats()
+
+    during, after = asyncio.run(scenario())
+    primary, busy = during["workers"]
+    assert (primary["queue_depth"], primary["requests"]) == (0, 1)
+    assert (busy["queue_depth"], busy["max_queue_depth"], busy["requests"]) == (3, 3, 0)
+    assert busy["pool"]["requests"] == 3
+    busy = after["workers"][1]
+    assert (busy["queue_depth"], busy["max_queue_depth"], busy["requests"]) == (0, 3, 3)
+    assert during["sessions"] == 1
+
+def test_pool_needs_a_worker():
+    with pytest.raises(ValueError):
+        BlenderWorkerPool([])
@@ -0,0 +1,68 @@
+"""
+Tests for the circuit breaker guarding the link to Blender.
+"""
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure("refused")
+    breaker.record_failure("refused")
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure("refused")
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.get_stats()["rejected_requests"] == 1
+    assert breaker.last_error == "refused"
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_failed_probe_reopens_with_doubled_delay(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=0.5, max_delay=30.0)
+
+    breaker.record_failure()
+    assert breaker.retry_delay == 0.5
+    assert breaker.seconds_until_retry() == 0.5
+    now[0] += 0.5
+    assert breaker.seconds_until_retry() == 0.0
+
+    breaker.begin_probe()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_delay == 1.0
+    assert breaker.seconds_until_retry() == 1.0
+
+def test_delay_is_capped():
+    breaker = CircuitBreaker(base_delay=1.0, max_delay=4.0)
+    for _ in range(10):
+        breaker.trip("down")
+    assert breaker.retry_delay == 4.0
+
+def test_successful_probe_closes_and_resets_the_delay():
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=0.5)
+    breaker.trip()
+    breaker.trip()
+    breaker.begin_probe()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.retry_delay == 0.5
+    assert breaker.get_stats()["consecutive_failures"] == 1
+
+def test_trip_opens_regardless_of_the_threshold():
+    breaker = CircuitBreaker(failure_threshold=5)
+    breaker.trip("handshake failed")
+    assert breaker.state == OPEN
+    assert breaker.get_stats()["last_error"] == "handshake failed"
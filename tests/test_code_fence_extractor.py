@@ -0,0 +1,63 @@
+"""
+Tests for extracting the code block from a streamed LLM reply.
+"""
+import pytest
+
+from services.ai_agent import BlenderAIAgent, CodeFenceExtractor
+
+REPLY = (
+    "Here is the code:\n"
+    "```python\n"
+    "import bpy\n"
+    "bpy.ops.mesh.primitive_cube_add(size=2)\n"
+    "```\n"
+    "This adds a cube."
+)
+
+def feed_all(pieces):
+    """Feed pieces of a reply and collect what the extractor emits"""
+    extractor = CodeFenceExtractor()
+    emitted = [extractor.feed(piece) for piece in pieces]
+    return extractor, "".join(emitted)
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(REPLY)])
+def test_streamed_code_matches_the_whole_reply_extraction(size):
+    extractor, emitted = feed_all([REPLY[i:i + size] for i in range(0, len(REPLY), size)])
+    # _extract_code does not use the agent, which would open the response cache
+    expected = BlenderAIAgent._extract_code(None, REPLY)
+    assert extractor.done
+    assert extractor.code == expected
+    assert emitted.strip() == expected
+
+def test_backticks_that_may_close_the_fence_are_held_back():
+    extractor = CodeFenceExtractor()
+    assert extractor.feed("```python\nx = 1\n`") == "x = 1\n"
+    assert extractor.feed("`") == ""
+    assert extractor.feed("`") == ""
+    assert extractor.done
+
+def test_backticks_inside_the_code_are_released():
+    extractor = CodeFenceExtractor()
+    assert extractor.feed("```python\ns = '`") == "s = '"
+    assert extractor.feed("a'\n") == "`a'\n"
+    assert not extractor.done
+
+def test_fence_split_across_pieces_is_found():
+    extractor = CodeFenceExtractor()
+    assert extractor.feed("Sure! ``") == ""
+    assert extractor.feed("`pyt") == ""
+    assert extractor.feed("hon") == ""
+    assert extractor.feed("\nprint(1)\n") == "print(1)\n"
+    assert extractor.found
+
+def test_text_after_the_closing_fence_is_ignored():
+    extractor = CodeFenceExtractor()
+    extractor.feed("```python\na = 1\n```")
+    assert extractor.feed("\n```python\nb = 2\n```") == ""
+    assert extractor.code == "a = 1"
+
+def test_reply_without_a_code_block_yields_nothing():
+    extractor, emitted = feed_all(["No code ", "needed ", "here."])
+    assert emitted == ""
+    assert not extractor.found
+    assert extractor.code == ""
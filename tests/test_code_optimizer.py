@@ -0,0 +1,148 @@
+"""
+Tests for the rewrites of bpy.ops calls to data API calls.
+"""
+import sys
+import types
+import textwrap
+import contextlib
+
+from services.code_optimizer import CodeOptimizer, OPTIMIZER_HELPERS
+
+def optimize(code: str):
+    return CodeOptimizer().optimize(textwrap.dedent(code))
+
+def rewritten_operators(result):
+    return [(rewrite["line"], rewrite["operator"]) for rewrite in result["rewrites"]]
+
+def test_per_object_loop_after_deselect_is_rewritten():
+    result = optimize("""
+        import bpy
+        objects = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+        bpy.ops.object.select_all(action='DESELECT')
+        for obj in objects:
+            obj.select_set(True)
+            obj.scale = (2.0, 2.0, 2.0)
+            bpy.context.view_layer.objects.active = obj
+            bpy.ops.object.transform_apply(location=False, rotation=True, scale=True)
+            obj.select_set(False)
+    """)
+    assert rewritten_operators(result) == [(4, "bpy.ops.object.select_all"), (9, "bpy.ops.object.transform_apply")]
+    assert "_opt_apply_transforms(location=False, rotation=True, scale=True, objects=[obj])" in result["code"]
+    assert "_opt_select_all('DESELECT')" in result["code"]
+    assert result["code"].count("def _opt_apply_transforms") == 1
+
+def test_apply_after_making_an_object_active_is_kept():
+    # The operator applies to every selected object, not to the active one
+    result = optimize("""
+        import bpy
+        for curve in imported_curves:
+            bpy.context.view_layer.objects.active = curve
+            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
+    """)
+    assert result["rewrites"] == []
+    assert not result["changed"]
+    assert result["kept"] == [{"line": 5, "operator": "bpy.ops.object.transform_apply"}]
+
+def test_apply_with_several_selected_objects_is_kept():
+    result = optimize("""
+        import bpy
+        bpy.ops.object.select_all(action='DESELECT')
+        a.select_set(True)
+        b.select_set(True)
+        bpy.ops.object.transform_apply(scale=True)
+    """)
+    assert rewritten_operators(result) == [(3, "bpy.ops.object.select_all")]
+
+def test_loop_that_leaves_objects_selected_is_kept():
+    # From the second iteration on, the previous object is still selected
+    result = optimize("""
+        import bpy
+        bpy.ops.object.select_all(action='DESELECT')
+        for obj in objects:
+            obj.select_set(True)
+            bpy.ops.object.transform_apply(scale=True)
+    """)
+    assert rewritten_operators(result) == [(3, "bpy.ops.object.select_all")]
+
+def test_calls_and_hiding_make_the_selection_unknown():
+    for statement in ("refresh()", "obj.hide_viewport = True", "x = make_object()", "obj = other"):
+        result = optimize(f"""
+            import bpy
+            bpy.ops.object.select_all(action='DESELECT')
+            obj.select_set(True)
+            {statement}
+            bpy.ops.object.transform_apply(scale=True)
+        """)
+        assert rewritten_operators(result) == [(3, "bpy.ops.object.select_all")], statement
+
+def test_selection_must_agree_across_branches():
+    result = optimize("""
+        import bpy
+        bpy.ops.object.select_all(action='DESELECT')
+        if flag:
+            a.select_set(True)
+        else:
+            b.select_set(True)
+        bpy.ops.object.transform_apply(scale=True)
+    """)
+    assert rewritten_operators(result) == [(3, "bpy.ops.object.select_all")]
+
+def test_selection_at_script_start_is_unknown():
+    result = optimize("""
+        import bpy
+        obj.select_set(True)
+        bpy.ops.object.transform_apply(scale=True)
+    """)
+    assert result["rewrites"] == []
+
+def test_function_bodies_and_unknown_operators_are_left_alone():
+    result = optimize("""
+        import bpy
+        def apply(obj):
+            bpy.ops.object.select_all(action='DESELECT')
+        for obj in objects:
+            bpy.ops.object.join()
+    """)
+    assert result["rewrites"] == []
+    assert result["kept"] == [{"line": 6, "operator": "bpy.ops.object.join"}]
+
+def test_helpers_go_after_docstring_and_imports():
+    result = optimize('''
+        """Doc"""
+        import bpy
+        # comment kept
+        bpy.ops.object.select_all(action='SELECT')
+    ''')
+    code = result["code"]
+    assert code.index("import bpy") < code.index("def _opt_select_all") < code.index("# comment kept")
+    compile(code, "<optimized>", "exec")
+
+def test_invalid_code_is_returned_unchanged():
+    result = optimize("for\\n")
+    assert result == {"code": "for\\n", "changed": False, "rewrites": [], "kept": [], "duration_ms": 0.0}
+
+def test_helper_falls_back_to_the_operator_for_skewed_rotation(monkeypatch):
+    # Rotation kept apart from a non-uniform scale is applied by the operator itself
+    calls = []
+
+    class Context:
+        def temp_override(self, **override):
+            calls.append(("override", override["object"].name))
+            return contextlib.nullcontext()
+
+    ops = types.SimpleNamespace(object=types.SimpleNamespace(
+        transform_apply=lambda **options: calls.append(("transform_apply", options))
+    ))
+    monkeypatch.setitem(sys.modules, "bpy", types.SimpleNamespace(context=Context(), ops=ops))
+    monkeypatch.setitem(sys.modules, "mathutils", types.SimpleNamespace(Matrix=None, Vector=None))
+    obj = types.SimpleNamespace(
+        name="Skewed", type="MESH", data=types.SimpleNamespace(users=1), children=(),
+        scale=(1.0, 2.0, 1.0), delta_location=(0, 0, 0), delta_rotation_euler=(0, 0, 0), delta_scale=(1, 1, 1)
+    )
+    namespace = {}
+    exec(OPTIMIZER_HELPERS, namespace)
+    namespace["_opt_apply_transforms"](location=False, rotation=True, scale=False, objects=[obj])
+    assert calls == [
+        ("override", "Skewed"),
+        ("transform_apply", {"location": False, "rotation": True, "scale": False, "properties": True}),
+    ]
@@ -0,0 +1,82 @@
+"""
+Tests for the static validation of generated code against the API catalog.
+"""
+from knowledge_kernel.api_catalog import ApiCatalog
+from services.code_validator import CodeValidator
+
+def make_validator(complete_modules=()):
+    """Validator over a catalog that only knows mesh.primitive_cube_add"""
+    catalog = ApiCatalog(
+        {"mesh.primitive_cube_add": frozenset({"size", "location"})},
+        complete_modules=complete_modules
+    )
+    return CodeValidator(catalog)
+
+def test_operators_missing_from_a_partial_catalog_are_only_warnings():
+    validation = make_validator().validate(
+        "import bpy\n"
+        "bpy.ops.object.delete()\n"
+        "bpy.ops.mesh.primitive_uv_sphere_add(radius=2)\n"
+    )
+    assert validation["valid"]
+    assert validation["errors"] == []
+    assert [warning["kind"] for warning in validation["warnings"]] == ["unknown_operator_module", "unknown_operator"]
+
+def test_unknown_keywords_of_a_partial_module_are_only_warnings():
+    validation = make_validator().validate("import bpy\nbpy.ops.mesh.primitive_cube_add(sise=2)\n")
+    assert validation["valid"]
+    assert validation["warnings"][0]["kind"] == "unknown_keyword"
+
+def test_unknown_operator_of_a_complete_module_is_rejected():
+    validation = make_validator(complete_modules=["mesh"]).validate(
+        "import bpy\nbpy.ops.mesh.primitive_cube_ad(size=2)\n"
+    )
+    assert not validation["valid"]
+    error = validation["errors"][0]
+    assert error["kind"] == "unknown_operator"
+    assert error["line"] == 2
+    assert error["suggestion"] == "bpy.ops.mesh.primitive_cube_add"
+
+def test_unknown_keyword_of_a_complete_module_is_rejected():
+    validation = make_validator(complete_modules=["mesh"]).validate(
+        "import bpy\nbpy.ops.mesh.primitive_cube_add(sise=2, location=(0, 0, 0))\n"
+    )
+    assert [error["kind"] for error in validation["errors"]] == ["unknown_keyword"]
+
+def test_aliases_are_resolved():
+    validation = make_validator(complete_modules=["mesh"]).validate(
+        "from bpy import ops as O\nimport bpy as b\nD = b.data\n"
+        "O.mesh.primitive_cube_add(size=1)\nD.meshs.new('m')\n"
+    )
+    assert [(error["kind"], error["line"]) for error in validation["errors"]] == [("unknown_data_attribute", 5)]
+    assert validation["errors"][0]["suggestion"] == "bpy.data.meshes"
+
+def test_syntax_errors_are_reported():
+    validation = make_validator().validate("import bpy\nfor\n")
+    assert not validation["valid"]
+    assert validation["errors"][0]["kind"] == "syntax_error"
+
+def test_empty_catalog_checks_only_data_attributes():
+    validation = CodeValidator(ApiCatalog()).validate("import bpy\nbpy.ops.anything.at_all()\nbpy.data.objects\n")
+    assert validation["valid"]
+    assert validation["warnings"] == []
+
+def test_catalog_marks_modules_with_an_indexed_reference_page_complete():
+    catalog = ApiCatalog.from_documents([
+        {
+            "url": "https://docs.blender.org/api/current/bpy.ops.object.html",
+            "content": "bpy.ops.object.delete(use_global=False, confirm=True)\nbpy.ops.object.join()",
+        },
+        {"url": "https://example.com/tutorial", "content": "bpy.ops.mesh.primitive_cube_add(size=2)"},
+    ])
+    assert catalog.complete_modules == frozenset({"object"})
+    assert catalog.operators["object.delete"] == frozenset({"use_global", "confirm"})
+
+def test_catalog_round_trips_through_a_file(tmp_path):
+    catalog = ApiCatalog({"object.join": None}, ["extra"], complete_modules=["object"])
+    path = str(tmp_path / "catalog.json")
+    catalog.save(path)
+    loaded = ApiCatalog.load(path)
+    assert loaded.operators == {"object.join": None}
+    assert loaded.complete_modules == frozenset({"object"})
+    assert "extra" in loaded.data_attributes
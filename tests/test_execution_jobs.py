@@ -0,0 +1,191 @@
+"""
+Tests for following scripts that run in Blender as jobs.
+
+The worker pool is replaced by one whose run_job streams are fed by the
+test, frame by frame, in the shape the Blender agent sends them.
+"""
+import asyncio
+
+from utils.execution_jobs import JobManager
+
+class FakeWorker:
+    def __init__(self, name):
+        self.name = name
+
+class FakeWorkerPool:
+    """Stands in for BlenderWorkerPool: each run_job stream yields the frames fed to it"""
+    def __init__(self):
+        self.workers = {"alice": FakeWorker("blender-1")}
+        self.streams = {}
+        self.sent = []
+
+    def route(self, session_id=None):
+        return self.workers.get(session_id, FakeWorker("blender-0"))
+
+    def feed(self, job_id, *frames):
+        for frame in frames:
+            self.streams[job_id].put_nowait(frame)
+
+    async def stream(self, action, data, session_id=None, worker=None, timeout=None):
+        frames = self.streams.setdefault(data["job_id"], asyncio.Queue())
+        while True:
+            frame = await frames.get()
+            yield frame
+            if frame.get("end") or "error" in frame:
+                return
+
+    async def send(self, action, data, session_id=None, worker=None):
+        self.sent.append((action, data, worker.name))
+        # Blender stops the job at its next cancellation point
+        self.feed(data["job_id"], {"chunk": 9, "status": "cancelled"}, {"end": True, "result": {"status": "cancelled"}})
+        return {"status": "success"}
+
+async def started(pool, job):
+    """Let the job's task open its stream"""
+    while job.job_id not in pool.streams:
+        await asyncio.sleep(0)
+
+def test_submit_follows_the_job_to_its_result():
+    async def scenario():
+        pool = FakeWorkerPool()
+        finished_jobs = []
+        manager = JobManager(pool, on_finish=finished_jobs.append)
+        job = manager.submit("print('hi')\nresult = 2", session_id="alice")
+        submitted = job.status
+        await started(pool, job)
+        pool.feed(
+            job.job_id,
+            {"chunk": 0, "status": "running"},
+            {"chunk": 1, "stream": "stdout", "data": "hi\n"},
+            {"chunk": 2, "stream": "stderr", "data": "warning\n"},
+            {"end": True, "result": {"status": "succeeded", "result": "2"}}
+        )
+        await job.task
+        return submitted, job, manager, finished_jobs
+
+    submitted, job, manager, finished_jobs = asyncio.run(scenario())
+    assert submitted == "submitted"
+    assert job.worker.name == "blender-1"
+    info = manager.get(job.job_id).to_dict(include_output=True)
+    assert (info["status"], info["result"], info["error"]) == ("succeeded", "2", None)
+    assert (info["stdout"], info["stderr"]) == ("hi\n", "warning\n")
+    assert info["finished_at"] is not None
+    assert finished_jobs == [job]
+    assert manager.list_jobs() == [job.to_dict()]
+
+def test_watchers_receive_status_output_and_the_end():
+    async def scenario():
+        pool = FakeWorkerPool()
+        manager = JobManager(pool)
+        events, late_events = [], []
+
+        async def listener(event):
+            events.append(event)
+
+        async def late_listener(event):
+            late_events.append(event)
+
+        job = manager.submit("print('hi')", listener=listener)
+        await started(pool, job)
+        pool.feed(job.job_id, {"chunk": 0, "status": "running"})
+        while not events:
+            await asyncio.sleep(0)
+        assert manager.subscribe(job.job_id, late_listener) is job
+        pool.feed(
+            job.job_id,
+            {"chunk": 1, "stream": "stdout", "data": "hi\n"},
+            {"end": True, "result": {"status": "succeeded", "result": ""}}
+        )
+        await job.task
+        return job, events, late_events
+
+    job, events, late_events = asyncio.run(scenario())
+    assert [event["type"] for event in events] == ["job_status", "job_output", "job_finished"]
+    assert events[1] == {"type": "job_output", "job_id": job.job_id, "stream": "stdout", "data": "hi\n"}
+    assert events[2]["job"]["status"] == "succeeded"
+    assert late_events == events[1:]
+    assert not job.listeners
+
+def test_failing_listener_is_dropped_without_failing_the_job():
+    async def scenario():
+        pool = FakeWorkerPool()
+        manager = JobManager(pool)
+
+        async def broken(event):
+            raise ConnectionError("client went away")
+
+        job = manager.submit("pass", listener=broken)
+        await started(pool, job)
+        pool.feed(job.job_id, {"chunk": 0, "status": "running"})
+        while job.status != "running":
+            await asyncio.sleep(0)
+        listeners = set(job.listeners)
+        pool.feed(job.job_id, {"end": True, "result": {"status": "succeeded", "result": ""}})
+        await job.task
+        return job, listeners
+
+    job, listeners = asyncio.run(scenario())
+    assert job.status == "succeeded"
+    assert not listeners
+
+def test_cancel_asks_the_jobs_worker_to_stop_it():
+    async def scenario():
+        pool = FakeWorkerPool()
+        manager = JobManager(pool)
+        job = manager.submit("while True: check_cancelled()", session_id="alice")
+        await started(pool, job)
+        pool.feed(job.job_id, {"chunk": 0, "status": "running"})
+        response = await manager.cancel(job.job_id)
+        await job.task
+        again = await manager.cancel(job.job_id)
+        return job, pool, response, again, await manager.cancel("missing")
+
+    job, pool, response, again, missing = asyncio.run(scenario())
+    assert pool.sent == [("cancel_job", {"job_id": job.job_id}, "blender-1")]
+    assert response == {"status": "success"}
+    assert job.status == "cancelled"
+    assert again == {"error": f"Job {job.job_id} has already cancelled"}
+    assert missing == {"error": "Unknown job: missing"}
+
+def test_lost_stream_or_error_fails_the_job():
+    async def scenario():
+        pool = FakeWorkerPool()
+        manager = JobManager(pool)
+        errored = manager.submit("pass")
+        await started(pool, errored)
+        pool.feed(errored.job_id, {"error": "Blender link is down"})
+        await errored.task
+
+        async def cut_off(action, data, session_id=None, worker=None, timeout=None):
+            yield {"chunk": 0, "status": "running"}
+
+        pool.stream = cut_off
+        lost = manager.submit("pass")
+        await lost.task
+        return errored, lost
+
+    errored, lost = asyncio.run(scenario())
+    assert (errored.status, errored.error) == ("failed", "Blender link is down")
+    assert (lost.status, lost.error) == ("failed", "Lost track of the job")
+
+def test_only_the_newest_finished_jobs_are_kept():
+    async def scenario():
+        pool = FakeWorkerPool()
+        manager = JobManager(pool, max_finished=2)
+        jobs = []
+        for _ in range(4):
+            job = manager.submit("pass")
+            await started(pool, job)
+            pool.feed(job.job_id, {"end": True, "result": {"status": "succeeded", "result": ""}})
+            await job.task
+            jobs.append(job)
+        running = manager.submit("pass")
+        await started(pool, running)
+        kept = set(manager.jobs)
+        await manager.close()
+        return jobs, running, kept
+
+    jobs, running, kept = asyncio.run(scenario())
+    # Pruned when a job is submitted; the running job is never pruned
+    assert kept == {jobs[2].job_id, jobs[3].job_id, running.job_id}
+    assert running.task.cancelled()
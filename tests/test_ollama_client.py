@@ -0,0 +1,141 @@
+"""
+Tests for the pooled Ollama client against a mocked HTTP transport.
+"""
+import json
+import asyncio
+
+import httpx
+import pytest
+
+from utils.ollama_client import OllamaClient
+
+API_URL = "http://ollama.test/api/chat"
+MESSAGES = [{"role": "user", "content": "add a cube"}]
+
+def make_client(handler):
+    """Client whose requests are answered by ``handler`` instead of Ollama"""
+    client = OllamaClient(API_URL)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=client.timeout)
+    return client
+
+def ndjson(*chunks):
+    return "".join(json.dumps(chunk) + "\n" for chunk in chunks)
+
+def reply(content, done=False):
+    return {"message": {"role": "assistant", "content": content}, "done": done}
+
+async def collect(client):
+    return [piece async for piece in client.stream_chat("mistral", MESSAGES)]
+
+def test_chat_returns_the_reply_content():
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json=reply("import bpy", done=True))
+
+    async def scenario():
+        client = make_client(handler)
+        content = await client.chat("mistral", MESSAGES)
+        await client.close()
+        return content, client.get_stats()
+
+    content, stats = asyncio.run(scenario())
+    assert content == "import bpy"
+    assert requests == [{"model": "mistral", "messages": MESSAGES, "stream": False}]
+    assert (stats["requests"], stats["failures"], stats["in_flight"]) == (1, 0, 0)
+
+def test_stream_yields_pieces_until_done():
+    body = ndjson(reply("import "), reply(""), reply("bpy"), reply("", done=True), reply("ignored")) + "\n"
+
+    async def body_pieces():
+        # Sent in pieces that split lines, as Ollama's output arrives
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7].encode()
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=body_pieces())
+
+    async def scenario():
+        client = make_client(handler)
+        return await collect(client), client.get_stats()
+
+    pieces, stats = asyncio.run(scenario())
+    assert pieces == ["import ", "bpy"]
+    assert (stats["streams"], stats["failures"], stats["aborted_streams"], stats["in_flight"]) == (1, 0, 0, 0)
+
+def test_stream_closed_early_is_counted_as_aborted():
+    def handler(request):
+        return httpx.Response(200, text=ndjson(reply("import "), reply("bpy"), reply("", done=True)))
+
+    async def scenario():
+        client = make_client(handler)
+        stream = client.stream_chat("mistral", MESSAGES)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first, client.get_stats()
+
+    first, stats = asyncio.run(scenario())
+    assert first == "import "
+    assert (stats["aborted_streams"], stats["failures"], stats["in_flight"]) == (1, 0, 0)
+
+def test_timeout_is_raised_and_counted():
+    def handler(request):
+        raise httpx.ReadTimeout("Ollama took too long", request=request)
+
+    async def scenario():
+        client = make_client(handler)
+        with pytest.raises(httpx.TimeoutException):
+            await client.chat("mistral", MESSAGES, timeout=1)
+        with pytest.raises(httpx.TimeoutException):
+            await collect(client)
+        return client.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["requests"], stats["failures"], stats["in_flight"]) == (2, 2, 0)
+
+@pytest.mark.parametrize("status", [404, 500])
+def test_error_status_is_raised(status):
+    def handler(request):
+        return httpx.Response(status, json={"error": "model 'mistral' not found"})
+
+    async def scenario():
+        client = make_client(handler)
+        with pytest.raises(httpx.HTTPStatusError) as chat_error:
+            await client.chat("mistral", MESSAGES)
+        with pytest.raises(httpx.HTTPStatusError) as stream_error:
+            await collect(client)
+        return chat_error.value, stream_error.value, client.get_stats()
+
+    chat_error, stream_error, stats = asyncio.run(scenario())
+    assert chat_error.response.status_code == stream_error.response.status_code == status
+    assert stats["failures"] == 2
+
+def test_malformed_line_fails_the_stream():
+    def handler(request):
+        return httpx.Response(200, text=ndjson(reply("import ")) + '{"message": {"content": "bp\n')
+
+    async def scenario():
+        client = make_client(handler)
+        pieces = []
+        with pytest.raises(json.JSONDecodeError):
+            async for piece in client.stream_chat("mistral", MESSAGES):
+                pieces.append(piece)
+        return pieces, client.get_stats()
+
+    pieces, stats = asyncio.run(scenario())
+    assert pieces == ["import "]
+    assert (stats["failures"], stats["in_flight"]) == (1, 0)
+
+def test_error_reported_mid_stream_is_raised():
+    def handler(request):
+        return httpx.Response(200, text=ndjson(reply("import "), {"error": "out of memory"}))
+
+    async def scenario():
+        client = make_client(handler)
+        with pytest.raises(RuntimeError, match="out of memory"):
+            await collect(client)
+        return client.get_stats()
+
+    assert asyncio.run(scenario())["failures"] == 1
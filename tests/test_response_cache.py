@@ -0,0 +1,72 @@
+"""
+Tests for the two-tier cache of generated code.
+"""
+from utils import response_cache
+from utils.response_cache import ResponseCache, normalize_prompt, scene_fingerprint
+
+def test_prompts_are_normalized():
+    assert normalize_prompt("  Add a  red\ncube!  ") == "add a red cube"
+    key = ResponseCache.make_key("Add a red cube.", "mistral", "1", "f")
+    assert key == ResponseCache.make_key("add a red cube", "mistral", "1", "f")
+    assert key != ResponseCache.make_key("add a red cube", "llama3", "1", "f")
+    assert key != ResponseCache.make_key("add a red cube", "mistral", "2", "f")
+
+def test_fingerprint_ignores_object_order_and_versions():
+    scene = {"name": "Scene", "version": 1, "objects": [{"name": "A"}, {"name": "B"}]}
+    same = {"name": "Scene", "version": 7, "instance": "x", "objects": [{"name": "B"}, {"name": "A"}]}
+    changed = {"name": "Scene", "version": 1, "objects": [{"name": "A"}]}
+    assert scene_fingerprint(scene) == scene_fingerprint(same)
+    assert scene_fingerprint(scene) != scene_fingerprint(changed)
+    assert scene_fingerprint(None) == ""
+
+def test_memory_tier_evicts_the_least_recently_used():
+    cache = ResponseCache(None, max_memory_entries=2)
+    cache.put("a", "code a")
+    cache.put("b", "code b")
+    assert cache.get("a") == "code a"
+    cache.put("c", "code c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "code a"
+    stats = cache.get_stats()
+    assert (stats["memory_hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    cache = ResponseCache(path)
+    cache.put("key", "import bpy")
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert reopened.get("key") == "import bpy"
+    assert reopened.get_stats()["disk_hits"] == 1
+    # Promoted to memory by the disk hit
+    assert reopened.get("key") == "import bpy"
+    assert reopened.get_stats()["memory_hits"] == 1
+    reopened.close()
+
+def test_disk_tier_keeps_its_size_limit(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_memory_entries=1, max_disk_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+    assert cache.get_stats()["disk_entries"] == 2
+    cache.close()
+
+def test_expired_entries_are_not_served(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), ttl=60)
+    cache.put("key", "code")
+    now[0] += 30
+    assert cache.get("key") == "code"
+    now[0] += 31
+    assert cache.get("key") is None
+    assert cache.get_stats()["expirations"] >= 1
+    cache.close()
+
+def test_unwritable_path_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = ResponseCache(str(blocker / "responses.sqlite3"))
+    cache.put("key", "code")
+    assert cache.get("key") == "code"
+    assert cache.get_stats()["disk_entries"] is None
@@ -0,0 +1,133 @@
+"""
+Tests for the time-limited cache of each Blender instance's scene.
+
+Fetches are counted instead of asking Blender, and the clock only moves
+when a test moves it.
+"""
+import asyncio
+
+import pytest
+
+from utils import scene_cache
+from utils.scene_cache import SceneCache
+
+class FakeFetch:
+    """Stands in for the introspect_scene round trip: returns a new scene per call"""
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, snapshot):
+        self.calls += 1
+        await self.release.wait()
+        return {"name": "Scene", "objects": [], "fetch": self.calls}
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scene_cache.time, "monotonic", lambda: now[0])
+    return now
+
+def test_scene_is_served_from_memory_until_the_ttl_ends(clock):
+    async def scenario():
+        cache = SceneCache(ttl=5)
+        fetch = FakeFetch()
+        first = await cache.get(fetch)
+        clock[0] += 4.9
+        cached = await cache.get(fetch)
+        clock[0] += 0.1
+        expired = await cache.get(fetch)
+        return first, cached, expired, cache.get_stats()
+
+    first, cached, expired, stats = asyncio.run(scenario())
+    assert cached is first
+    assert expired["fetch"] == 2
+    assert (stats["hits"], stats["misses"], stats["fresh"], stats["age"]) == (1, 2, True, 0.0)
+
+def test_invalidation_forces_a_fetch(clock):
+    async def scenario():
+        cache = SceneCache(ttl=60)
+        fetch = FakeFetch()
+        await cache.get(fetch)
+        cache.invalidate()
+        stale = cache.fresh
+        return stale, await cache.get(fetch), cache.get_stats()
+
+    stale, scene, stats = asyncio.run(scenario())
+    assert not stale
+    assert scene["fetch"] == 2
+    assert (stats["invalidations"], stats["hits"]) == (1, 0)
+
+def test_failed_fetch_is_not_cached(clock):
+    async def scenario():
+        cache = SceneCache(ttl=60)
+
+        async def unreachable(snapshot):
+            return None
+
+        missing = await cache.get(unreachable)
+        return missing, cache.fresh, await cache.get(FakeFetch())
+
+    missing, fresh, scene = asyncio.run(scenario())
+    assert missing is None
+    assert not fresh
+    assert scene["fetch"] == 1
+
+def test_readers_of_a_stale_scene_share_the_fetch_in_flight(clock):
+    async def scenario():
+        cache = SceneCache(ttl=5)
+        fetch = FakeFetch()
+        fetch.release.clear()
+        readers = [asyncio.create_task(cache.get(fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        return await asyncio.gather(*readers), fetch.calls, cache.get_stats()
+
+    scenes, calls, stats = asyncio.run(scenario())
+    assert calls == 1
+    assert all(scene is scenes[0] for scene in scenes)
+    assert (stats["misses"], stats["shared_fetches"], stats["hit_rate"]) == (1, 4, 0.8)
+
+def test_scene_mutation_invalidates_the_workers_cache(monkeypatch, clock):
+    import app
+
+    sent = []
+
+    async def send(action, data, session_id=None, worker=None):
+        sent.append((action, worker.name))
+        return {"status": "success"}
+
+    monkeypatch.setattr(app.blender_pool, "send", send)
+    worker = app.blender_pool.route(None)
+    cache = SceneCache(ttl=60)
+    monkeypatch.setitem(app.scene_caches, worker.name, cache)
+
+    async def scenario():
+        fetch = FakeFetch()
+        await cache.get(fetch)
+        await app.send_scene_mutation("execute_code", {"code": "pass"})
+        return await cache.get(fetch)
+
+    scene = asyncio.run(scenario())
+    assert sent == [("execute_code", worker.name)]
+    assert scene["fetch"] == 2
+    assert cache.invalidations == 1
+
+def test_failed_scene_mutation_still_invalidates(monkeypatch, clock):
+    import app
+
+    async def send(action, data, session_id=None, worker=None):
+        raise ConnectionError("Blender went away mid-script")
+
+    monkeypatch.setattr(app.blender_pool, "send", send)
+    cache = SceneCache(ttl=60)
+    monkeypatch.setitem(app.scene_caches, app.blender_pool.route(None).name, cache)
+
+    async def scenario():
+        await cache.get(FakeFetch())
+        with pytest.raises(ConnectionError):
+            await app.send_scene_mutation("execute_code", {"code": "pass"})
+
+    asyncio.run(scenario())
+    assert not cache.fresh
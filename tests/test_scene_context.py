@@ -0,0 +1,67 @@
+"""
+Tests for the compact, token-budgeted scene description in prompts.
+"""
+import json
+
+from services.scene_context import SceneContextBuilder, estimate_tokens
+
+def make_scene(count):
+    """Scene with ``count`` cubes, a light and a camera"""
+    objects = [
+        {"name": f"Cube.{i:03d}", "type": "MESH", "location": [i * 1.23456, 0.0, 2.5], "visible": True}
+        for i in range(count)
+    ]
+    objects.append({"name": "Key Light", "type": "LIGHT", "location": [4.0, -4.0, 6.0], "visible": True})
+    objects.append({"name": "Camera", "type": "CAMERA", "location": [7.0, -7.0, 5.0], "visible": False})
+    return {"name": "Scene", "frame_current": 1, "version": 3, "objects": objects}
+
+def test_estimate_counts_letters_in_fours_and_ignores_whitespace():
+    assert estimate_tokens("location") == 2
+    assert estimate_tokens("x = 1.25") == 6
+    assert estimate_tokens("a  b\n") == estimate_tokens("a b")
+
+def test_small_scene_is_listed_in_full():
+    context = SceneContextBuilder(token_budget=1500).build(make_scene(3))
+    lines = context["text"].splitlines()
+    assert lines[0] == "Scene Scene: frame_current=1, objects_count=5"
+    assert lines[1] == "Objects (5 of 5):"
+    assert lines[2] == "name|type|location|visible"
+    assert "Cube.001|MESH|1.23,0,2.5|1" in lines
+    assert context["summarized"] == 0
+    assert context["tokens_after"] < context["tokens_before"]
+
+def test_large_scene_stays_within_the_budget():
+    scene = make_scene(500)
+    context = SceneContextBuilder(token_budget=300).build(scene, "move the camera up")
+    assert context["tokens_after"] <= 300
+    assert 0 < context["listed"] < 502
+    assert context["listed"] + context["summarized"] == 502
+    assert context["tokens_before"] == estimate_tokens(json.dumps(scene, indent=2))
+    summary = context["text"].splitlines()[-1]
+    assert summary.startswith(f"Not listed: {context['summarized']} objects")
+    assert "Cube* " in summary
+
+def test_objects_the_prompt_refers_to_come_first():
+    context = SceneContextBuilder(token_budget=300).build(make_scene(500), "point the camera at Cube.250")
+    rows = context["text"].splitlines()[3:]
+    # Both are named in full; the camera first, as its name is the rarer word
+    assert [row.split("|")[0] for row in rows[:2]] == ["Camera", "Cube.250"]
+    # Every other cube shares the word "cube" with the prompt
+    assert context["relevant"] == 501
+
+def test_named_objects_are_listed_beyond_the_budget():
+    scene = make_scene(50)
+    prompt = "align " + " ".join(f"Cube.{i:03d}" for i in range(40))
+    context = SceneContextBuilder(token_budget=50).build(scene, prompt)
+    assert context["listed"] >= 40
+
+def test_type_words_select_objects_by_type():
+    context = SceneContextBuilder(token_budget=1500).build(make_scene(5), "make the lamp brighter")
+    assert context["text"].splitlines()[3].startswith("Key Light|")
+
+def test_scene_updated_in_place_is_measured_again():
+    builder = SceneContextBuilder()
+    scene = make_scene(3)
+    before = builder.build(scene)["tokens_before"]
+    scene["objects"].extend(make_scene(20)["objects"][3:20])
+    assert builder.build(scene)["tokens_before"] > before
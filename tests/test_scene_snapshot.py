@@ -0,0 +1,62 @@
+"""
+Tests for merging delta introspection responses into the backend's scene copy.
+"""
+from utils.scene_cache import SceneSnapshot
+
+def full_result(version, objects, instance="a"):
+    """introspect_scene result with the full object list"""
+    return {"name": "Scene", "version": version, "instance": instance, "objects": objects}
+
+def delta_result(since_version, version, added=(), removed=(), changed=(), instance="a"):
+    """introspect_scene result with only the changes since ``since_version``"""
+    return {
+        "name": "Scene", "version": version, "instance": instance, "since_version": since_version,
+        "delta": {"added": list(added), "removed": list(removed), "changed": list(changed)}
+    }
+
+def cube(name, x=0.0):
+    return {"name": name, "type": "MESH", "location": [x, 0.0, 0.0]}
+
+def test_empty_snapshot_asks_for_the_full_scene():
+    assert SceneSnapshot().request_params() == {}
+
+def test_full_result_replaces_the_snapshot():
+    snapshot = SceneSnapshot()
+    scene = snapshot.apply(full_result(3, [cube("Cube"), cube("Light")]))
+    assert [info["name"] for info in scene["objects"]] == ["Cube", "Light"]
+    assert scene["version"] == 3
+    assert "instance" not in scene
+    assert snapshot.request_params() == {"since_version": 3, "instance": "a"}
+
+def test_delta_adds_removes_and_changes_objects():
+    snapshot = SceneSnapshot()
+    snapshot.apply(full_result(1, [cube("Cube"), cube("Light"), cube("Camera")]))
+    scene = snapshot.apply(delta_result(
+        1, 2, added=[cube("Sphere")], removed=["Light"], changed=[cube("Cube", x=2.0)]
+    ))
+    objects = {info["name"]: info for info in scene["objects"]}
+    assert set(objects) == {"Cube", "Camera", "Sphere"}
+    assert objects["Cube"]["location"] == [2.0, 0.0, 0.0]
+    assert scene["version"] == 2
+    assert "delta" not in scene and "since_version" not in scene
+    assert (snapshot.full_updates, snapshot.delta_updates) == (1, 1)
+
+def test_delta_against_another_version_is_refused():
+    snapshot = SceneSnapshot()
+    snapshot.apply(full_result(5, [cube("Cube")]))
+    assert snapshot.apply(delta_result(4, 6, added=[cube("Sphere")])) is None
+    assert snapshot.version == 5
+    assert list(snapshot.objects) == ["Cube"]
+
+def test_delta_from_a_restarted_blender_is_refused():
+    snapshot = SceneSnapshot()
+    snapshot.apply(full_result(5, [cube("Cube")]))
+    assert snapshot.apply(delta_result(5, 6, removed=["Cube"], instance="b")) is None
+    assert list(snapshot.objects) == ["Cube"]
+
+def test_merged_scenes_are_new_dicts():
+    snapshot = SceneSnapshot()
+    first = snapshot.apply(full_result(1, [cube("Cube")]))
+    second = snapshot.apply(delta_result(1, 2, added=[cube("Sphere")]))
+    assert [info["name"] for info in first["objects"]] == ["Cube"]
+    assert first is not second
@@ -0,0 +1,116 @@
+"""
+Tests for reusing generated code for reworded prompts.
+
+The embedding model is replaced by a bag-of-words encoder in which "create"
+and "make" mean "add", so similarities are known exactly.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from utils import semantic_cache
+from utils.semantic_cache import SemanticCache
+
+VOCABULARY = ["add", "a", "red", "blue", "cube", "sphere", "light"]
+SYNONYMS = {"create": "add", "make": "add"}
+
+class BagOfWordsEncoder:
+    """Stands in for SentenceTransformer: unit vectors of word counts"""
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def encode(self, text, convert_to_numpy=True, normalize_embeddings=True):
+        words = [SYNONYMS.get(word, word) for word in text.split()]
+        vector = np.array([words.count(word) for word in VOCABULARY], dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+class BrokenEncoder:
+    def __init__(self, model_name):
+        raise OSError("model not found")
+
+@pytest.fixture
+def encoder(monkeypatch):
+    monkeypatch.setattr(semantic_cache, "SentenceTransformer", BagOfWordsEncoder)
+
+def test_reworded_prompt_is_a_hit(encoder):
+    async def scenario():
+        cache = SemanticCache(threshold=0.95)
+        await cache.add("add a red cube", "mistral", "scene", "code")
+        return await cache.lookup("create a red cube", "mistral", "scene"), cache.get_stats()
+
+    match, stats = asyncio.run(scenario())
+    assert match == {"code": "code", "prompt": "add a red cube", "similarity": 1.0}
+    assert (stats["lookups"], stats["hits"]) == (1, 1)
+
+def test_different_request_is_a_miss(encoder):
+    async def scenario():
+        cache = SemanticCache(threshold=0.95)
+        await cache.add("add a red cube", "mistral", "scene", "code")
+        return await cache.lookup("add a blue cube", "mistral", "scene")
+
+    assert asyncio.run(scenario()) is None
+
+def test_other_scene_or_model_is_a_miss(encoder):
+    async def scenario():
+        cache = SemanticCache()
+        await cache.add("add a red cube", "mistral", "scene", "code")
+        return (
+            await cache.lookup("add a red cube", "mistral", "other scene"),
+            await cache.lookup("add a red cube", "llama3", "scene")
+        )
+
+    assert asyncio.run(scenario()) == (None, None)
+
+def test_reworded_prompt_replaces_its_entry(encoder):
+    async def scenario():
+        cache = SemanticCache()
+        await cache.add("add a red cube", "mistral", "scene", "old")
+        await cache.add("make a red cube", "mistral", "scene", "new")
+        return cache.count, await cache.lookup("add a red cube", "mistral", "scene")
+
+    count, match = asyncio.run(scenario())
+    assert count == 1
+    assert match["code"] == "new"
+
+def test_full_cache_replaces_the_least_recently_used(encoder):
+    async def scenario():
+        cache = SemanticCache(max_entries=2)
+        await cache.add("add a red cube", "mistral", "scene", "cube")
+        await cache.add("add a sphere", "mistral", "scene", "sphere")
+        await cache.lookup("add a red cube", "mistral", "scene")
+        await cache.add("add a light", "mistral", "scene", "light")
+        return (
+            await cache.lookup("add a red cube", "mistral", "scene"),
+            await cache.lookup("add a sphere", "mistral", "scene"),
+            cache.get_stats()["evictions"]
+        )
+
+    cube, sphere, evictions = asyncio.run(scenario())
+    assert cube["code"] == "cube"
+    assert sphere is None
+    assert evictions == 1
+
+def test_disabled_without_sentence_transformers(monkeypatch):
+    monkeypatch.setattr(semantic_cache, "SentenceTransformer", None)
+
+    async def scenario():
+        cache = SemanticCache()
+        await cache.add("add a red cube", "mistral", "scene", "code")
+        return cache, await cache.lookup("add a red cube", "mistral", "scene")
+
+    cache, match = asyncio.run(scenario())
+    assert match is None
+    assert not cache.get_stats()["enabled"]
+
+def test_model_that_cannot_load_disables_the_cache(monkeypatch):
+    monkeypatch.setattr(semantic_cache, "SentenceTransformer", BrokenEncoder)
+
+    async def scenario():
+        cache = SemanticCache()
+        await cache.add("add a red cube", "mistral", "scene", "code")
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert not cache.enabled
+    assert cache.count == 0
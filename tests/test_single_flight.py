@@ -0,0 +1,128 @@
+"""
+Tests for coalescing identical concurrent calls.
+"""
+import asyncio
+
+import pytest
+
+from utils.scene_cache import SceneCache
+from utils.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_run():
+    async def scenario():
+        flights = SingleFlight()
+        started = []
+        release = asyncio.Event()
+
+        async def call():
+            started.append(1)
+            await release.wait()
+            return "scene"
+
+        callers = [asyncio.create_task(flights.run("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*callers), started, flights.get_stats()
+
+    results, started, stats = asyncio.run(scenario())
+    assert results == ["scene"] * 3
+    assert len(started) == 1
+    assert stats == {"calls": 1, "saved_calls": 2, "in_flight": 0, "saved_rate": 0.667}
+
+def test_different_keys_and_later_calls_run_separately():
+    async def scenario():
+        flights = SingleFlight()
+        counter = iter(range(10))
+
+        async def call():
+            return next(counter)
+
+        together = await asyncio.gather(flights.run("a", call), flights.run("b", call))
+        later = await flights.run("a", call)
+        return sorted(together), later
+
+    assert asyncio.run(scenario()) == ([0, 1], 2)
+
+def test_exception_reaches_every_caller_and_is_not_kept():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("Blender link is down")
+
+        results = await asyncio.gather(
+            flights.run("key", failing), flights.run("key", failing), return_exceptions=True
+        )
+
+        async def working():
+            return "ok"
+
+        return results, await flights.run("key", working)
+
+    results, retry = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retry == "ok"
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "code"
+
+        first = asyncio.create_task(flights.run("key", call))
+        second = asyncio.create_task(flights.run("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "code"
+
+def test_stale_scene_readers_share_one_fetch():
+    async def scenario():
+        cache = SceneCache(ttl=60)
+        fetches = []
+
+        async def fetch(snapshot):
+            fetches.append(1)
+            await asyncio.sleep(0)
+            return {"name": "Scene", "objects": []}
+
+        readers = await asyncio.gather(*[cache.get(fetch) for _ in range(4)])
+        cached = await cache.get(fetch)
+        return readers, cached, fetches, cache.get_stats()
+
+    readers, cached, fetches, stats = asyncio.run(scenario())
+    assert len(fetches) == 1
+    assert all(scene is readers[0] for scene in readers + [cached])
+    assert (stats["hits"], stats["misses"], stats["shared_fetches"]) == (1, 1, 3)
+
+def test_fetch_straddling_an_invalidation_is_not_cached():
+    async def scenario():
+        cache = SceneCache(ttl=60)
+        release = asyncio.Event()
+
+        async def slow_fetch(snapshot):
+            await release.wait()
+            return {"name": "Before"}
+
+        async def fetch(snapshot):
+            return {"name": "After"}
+
+        reader = asyncio.create_task(cache.get(slow_fetch))
+        await asyncio.sleep(0)
+        cache.invalidate()
+        release.set()
+        stale = await reader
+        return stale, await cache.get(fetch)
+
+    stale, fresh = asyncio.run(scenario())
+    assert stale == {"name": "Before"}
+    assert fresh == {"name": "After"}
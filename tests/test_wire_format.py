@@ -0,0 +1,75 @@
+"""
+Tests for the encodings of messages exchanged with the Blender agent.
+"""
+import json
+
+import pytest
+
+from utils import wire_format
+from utils.wire_format import (
+    BUFFER_HEADER,
+    BUFFER_MAGIC,
+    CBOR,
+    JSON,
+    MSGPACK,
+    available_encodings,
+    choose_encoding,
+    decode,
+    encode,
+    parse_buffer_header
+)
+
+MESSAGE = {"id": 7, "type": "execute_code", "params": {"code": "import bpy", "scale": [1.5, 2, 3]}, "ok": True}
+
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_every_available_encoding_round_trips(encoding):
+    frame = encode(MESSAGE, encoding)
+    # JSON goes in text frames, the binary codecs in binary frames
+    assert isinstance(frame, str) == (encoding == JSON)
+    assert decode(frame, encoding) == MESSAGE
+
+def test_json_is_always_available_and_last():
+    assert available_encodings()[-1] == JSON
+
+def test_first_preferred_encoding_the_peer_offers_is_chosen():
+    assert choose_encoding([JSON, CBOR, MSGPACK], [MSGPACK, CBOR, JSON]) == MSGPACK
+    assert choose_encoding([JSON, CBOR], [MSGPACK, CBOR, JSON]) == CBOR
+
+def test_peer_declining_every_binary_codec_gets_json():
+    assert choose_encoding([JSON], [MSGPACK, CBOR, JSON]) == JSON
+    # An old agent that offers nothing at all
+    assert choose_encoding([], [MSGPACK, CBOR, JSON]) == JSON
+
+@pytest.mark.parametrize("encoding, module", [(MSGPACK, "msgpack"), (CBOR, "cbor2")])
+def test_missing_codec_falls_back_to_json(monkeypatch, encoding, module):
+    monkeypatch.setattr(wire_format, module, None)
+    assert encoding not in available_encodings()
+    frame = encode(MESSAGE, encoding)
+    assert frame == json.dumps(MESSAGE)
+    assert decode(frame, encoding) == MESSAGE
+    # A binary frame is read as JSON when the codec is missing
+    assert decode(frame.encode(), encoding) == MESSAGE
+
+def test_text_frames_are_json_whatever_was_negotiated():
+    assert decode(json.dumps(MESSAGE), MSGPACK) == MESSAGE
+
+def test_buffer_header_is_parsed():
+    frame = BUFFER_HEADER.pack(BUFFER_MAGIC, 42, 3) + b"\x00" * 12
+    assert parse_buffer_header(frame) == (42, 3)
+    # A buffer with no payload is still a buffer frame
+    assert parse_buffer_header(BUFFER_HEADER.pack(BUFFER_MAGIC, 1, 0)) == (1, 0)
+
+@pytest.mark.parametrize("frame", [
+    BUFFER_MAGIC,
+    BUFFER_HEADER.pack(BUFFER_MAGIC, 42, 3)[:-1],
+    BUFFER_HEADER.pack(b"BUF2", 42, 3),
+    b"\x83\xa2id\x07" + b"\x00" * 12,
+    json.dumps(MESSAGE),
+    BUFFER_HEADER.pack(BUFFER_MAGIC, 42, 3).decode("latin-1")
+])
+def test_short_or_foreign_frames_are_not_buffers(frame):
+    assert parse_buffer_header(frame) is None
+
+@pytest.mark.parametrize("encoding", [e for e in available_encodings() if e != JSON])
+def test_encoded_messages_never_look_like_buffers(encoding):
+    assert parse_buffer_header(encode(MESSAGE, encoding)) is None
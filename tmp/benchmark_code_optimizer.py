@@ -0,0 +1,103 @@
+"""
+Benchmark the bpy.ops rewrites of the backend's code optimizer.
+
+Runs a typical generated per-object script (scale, make active,
+transform_apply, select_all) as written and as rewritten by CodeOptimizer
+on scenes of 100, 1k and 10k mesh objects, and checks that both leave the
+same geometry behind. Needs bpy, so run it inside Blender from the
+repository root:
+
+    blender -b --python tmp/benchmark_code_optimizer.py
+
+Pass a smaller list of object counts after ``--`` to skip the slow runs:
+
+    blender -b --python tmp/benchmark_code_optimizer.py -- 100 1000
+"""
+import os
+import sys
+import time
+
+# Add the backend directory to sys.path
+current_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), "backend"))
+
+import bpy
+from services.code_optimizer import CodeOptimizer
+
+OBJECT_COUNTS = [100, 1_000, 10_000]
+
+SCRIPT = """
+import bpy
+
+objects = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+bpy.ops.object.select_all(action='DESELECT')
+
+for obj in objects:
+    obj.select_set(True)
+    obj.scale = (2.0, 2.0, 2.0)
+    bpy.context.view_layer.objects.active = obj
+    bpy.ops.object.transform_apply(location=False, rotation=True, scale=True)
+    obj.select_set(False)
+
+bpy.ops.object.select_all(action='SELECT')
+"""
+
+def build_scene(count: int) -> None:
+    """Replace the scene with `count` cubes, each with its own mesh"""
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    template = bpy.data.meshes.new("Cube")
+    template.from_pydata(
+        [(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)],
+        [],
+        [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    )
+    collection = bpy.context.scene.collection
+    for i in range(count):
+        obj = bpy.data.objects.new(f"Cube.{i:05d}", template.copy())
+        obj.location = (i % 100 * 3.0, i // 100 * 3.0, 0.0)
+        obj.rotation_euler = (0.0, 0.0, i * 0.01)
+        collection.objects.link(obj)
+    bpy.data.meshes.remove(template)
+    bpy.context.view_layer.update()
+
+def geometry_checksum() -> float:
+    """Sum of all world-space vertex coordinates, to compare the two runs"""
+    total = 0.0
+    for obj in bpy.data.objects:
+        matrix = obj.matrix_world
+        for vertex in obj.data.vertices:
+            world = matrix @ vertex.co
+            total += world.x + world.y + world.z
+    return round(total, 3)
+
+def run(code: str, count: int) -> tuple:
+    """Build a fresh scene, run `code` in it and return the time in seconds and the checksum"""
+    build_scene(count)
+    start = time.perf_counter()
+    exec(compile(code, "<benchmark>", "exec"), {"__builtins__": __builtins__}, {})
+    bpy.context.view_layer.update()
+    elapsed = time.perf_counter() - start
+    return elapsed, geometry_checksum()
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    counts = [int(arg) for arg in argv] or OBJECT_COUNTS
+
+    optimization = CodeOptimizer().optimize(SCRIPT)
+    print(f"Optimizer: {len(optimization['rewrites'])} rewrites in {optimization['duration_ms']:.2f} ms")
+    for rewrite in optimization["rewrites"]:
+        print(f"  line {rewrite['line']}: {rewrite['operator']} -> {rewrite['replacement']}")
+    print()
+
+    print(f"{'objects':>8} {'bpy.ops s':>10} {'data API s':>11} {'speedup':>8} {'same result':>12}")
+    print("-" * 53)
+    for count in counts:
+        ops_time, ops_checksum = run(SCRIPT, count)
+        data_time, data_checksum = run(optimization["code"], count)
+        print(
+            f"{count:>8} {ops_time:>10.3f} {data_time:>11.3f} {ops_time / data_time:>7.1f}x "
+            f"{str(ops_checksum == data_checksum):>12}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark the per-call overhead of execute_code in the Blender agent.
+
+Compares building the sandbox globals and compiling the source on every
+call with the prebuilt sandbox namespace and the compiled-code cache.
+Needs bpy, so run it inside Blender from the repository root:
+
+    blender -b --python tmp/benchmark_execute_code.py
+"""
+import os
+import sys
+import time
+import builtins
+
+# Add the repository root to sys.path
+current_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+import bpy
+from blender_agent.websocket_server import BlenderWebSocketServer, SANDBOX_BUILTIN_NAMES
+
+SNIPPETS = {
+    "one-liner": "result = len(bpy.data.objects)",
+    "agent snippet": """
+import bpy
+total = 0.0
+for obj in bpy.data.objects:
+    if obj.type == 'MESH':
+        total += obj.location.x
+result = round(total, 3)
+""",
+    "200-line snippet": "\n".join(
+        f"value_{i} = [x * {i} for x in range(3)]" for i in range(200)
+    ) + "\nresult = value_199",
+}
+CALLS = 2_000
+
+def execute_uncached(code: str) -> dict:
+    """execute_code as it ran before: fresh globals and a fresh compile per call"""
+    try:
+        safe_globals = {
+            'bpy': bpy,
+            'mathutils': __import__('mathutils'),
+            '__builtins__': {
+                **{k: getattr(builtins, k) for k in SANDBOX_BUILTIN_NAMES},
+                '__import__': builtins.__import__
+            }
+        }
+        locals_dict = {}
+        exec(code, safe_globals, locals_dict)
+        return {"result": {"output": str(locals_dict.get("result", ""))}}
+    except Exception as e:
+        return {"error": f"Execution error: {str(e)}"}
+
+def time_calls(func, code: str) -> float:
+    """Return the mean time per call in microseconds"""
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        func(code)
+    return (time.perf_counter() - start) / CALLS * 1_000_000
+
+def main():
+    server = BlenderWebSocketServer()
+    print(f"{'snippet':>16} {'uncached us':>12} {'cached us':>10} {'saved us':>9} {'speedup':>8}")
+    print("-" * 59)
+    for name, code in SNIPPETS.items():
+        uncached = time_calls(execute_uncached, code)
+        cached = time_calls(server.execute_code, code)
+        print(f"{name:>16} {uncached:>12.1f} {cached:>10.1f} {uncached - cached:>9.1f} {uncached / cached:>7.1f}x")
+    print()
+    print(f"Code cache: {server.code_cache.get_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the wire formats used between the backend and the Blender agent.
+
+Compares encode/decode time and bytes on the wire for synthetic
+introspect_scene responses. Run from the repository root:
+
+    python tmp/benchmark_wire_format.py
+"""
+import os
+import sys
+import time
+import random
+
+# Add the backend directory to sys.path
+current_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), "backend"))
+
+from utils import wire_format
+
+OBJECT_COUNTS = [1_000, 10_000, 100_000]
+OBJECT_TYPES = ["MESH", "CURVE", "LIGHT", "CAMERA", "EMPTY"]
+
+def make_scene_response(count: int) -> dict:
+    """Build an introspect_scene response with `count` objects"""
+    rng = random.Random(count)
+    objects = [
+        {
+            "name": f"Object.{i:06d}",
+            "type": rng.choice(OBJECT_TYPES),
+            "location": [rng.uniform(-100, 100) for _ in range(3)],
+            "visible": rng.random() > 0.1
+        }
+        for i in range(count)
+    ]
+    return {
+        "id": 1,
+        "result": {
+            "name": "Scene",
+            "frame_current": 1,
+            "frame_start": 1,
+            "frame_end": 250,
+            "objects_count": count,
+            "objects": objects
+        }
+    }
+
+def time_call(func, repeat: int) -> float:
+    """Return the best time in milliseconds out of `repeat` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    encodings = wire_format.available_encodings()
+    print(f"Available encodings: {', '.join(encodings)}")
+    print(f"{'objects':>8} {'encoding':>8} {'bytes':>12} {'ratio':>6} {'encode ms':>10} {'decode ms':>10}")
+    print("-" * 60)
+
+    for count in OBJECT_COUNTS:
+        message = make_scene_response(count)
+        repeat = 5 if count < 100_000 else 2
+        json_size = None
+
+        for encoding in [wire_format.JSON] + [e for e in encodings if e != wire_format.JSON]:
+            frame = wire_format.encode(message, encoding)
+            wire = frame.encode("utf-8") if isinstance(frame, str) else frame
+            size = len(wire)
+            if json_size is None:
+                json_size = size
+
+            encode_ms = time_call(lambda: wire_format.encode(message, encoding), repeat)
+            decode_ms = time_call(lambda: wire_format.decode(frame, encoding), repeat)
+            print(
+                f"{count:>8} {encoding:>8} {size:>12,} {size / json_size:>6.2f} "
+                f"{encode_ms:>10.2f} {decode_ms:>10.2f}"
+            )
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,45 @@ DEFAULT_WS_PORT = 9876
 # Reference to the websocket server instance
 _server_instance = None
 
+# Optional binary wire formats, negotiated per connection with the "hello" action
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+def _available_encodings() -> List[str]:
+    """Get the wire encodings this Blender can speak, most compact first"""
+    encodings = []
+    if msgpack is not None:
+        encodings.append("msgpack")
+    if cbor2 is not None:
+        encodings.append("cbor")
+    encodings.append("json")
+    return encodings
+
+def _encode_frame(message: Dict[str, Any], encoding: str = "json"):
+    """Encode a message as a text frame (JSON) or a binary frame (MessagePack/CBOR)"""
+    if encoding == "msgpack" and msgpack is not None:
+        return msgpack.packb(message, use_bin_type=True)
+    if encoding == "cbor" and cbor2 is not None:
+        return cbor2.dumps(message)
+    return json.dumps(message)
+
+def _decode_frame(frame, encoding: str = "json") -> Any:
+    """Decode a frame; text frames are always JSON, binary frames use the negotiated encoding"""
+    if isinstance(frame, str):
+        return json.loads(frame)
+    if encoding == "msgpack" and msgpack is not None:
+        return msgpack.unpackb(frame, raw=False)
+    if encoding == "cbor" and cbor2 is not None:
+        return cbor2.loads(frame)
+    return json.loads(frame)
+
 # Import websockets with compatibility wrappers
 import websockets
 
@@ -137,6 +176,8 @@ class BlenderWebSocketServer:
         self.port = port or int(os.environ.get("BLENDER_WS_PORT", DEFAULT_WS_PORT))
         self.server = None
         self.connected_clients = set()
+        # Wire encoding negotiated by each client
+        self.client_encodings: Dict[Any, str] = {}
         # Keep a list of command history for logging
         self.command_history: List[Dict[str, Any]] = []
         logger.info(f"Initialized BlenderWebSocketServer on {self.host}:{self.port}")
@@ -156,9 +197,11 @@ class BlenderWebSocketServer:
         try:
             # Process messages from the client
             async for message in websocket:
+                request_id = None
                 try:
                     # Parse the message
-                    data = json.loads(message)
+                    data = _decode_frame(message, self.client_encodings.get(websocket, "json"))
+                    request_id = data.get("id")
                     
                     # Log command for history
                     self.command_history.append({
@@ -173,41 +216,80 @@ class BlenderWebSocketServer:
                     
                     if action == "ping":
                         # Simple ping-pong
-                        await websocket.send(json.dumps({"action": "pong"}))
+                        await self._reply(websocket, request_id, {"action": "pong"})
+                    
+                    elif action == "hello":
+                        # Answer in JSON, then switch this connection to the chosen encoding
+                        encoding = self.negotiate_encoding(request_data.get("encodings", []))
+                        await self._reply(websocket, request_id, {"result": {
+                            "encoding": encoding,
+                            "encodings": _available_encodings()
+                        }})
+                        self.client_encodings[websocket] = encoding
                     
                     elif action == "execute_code":
                         # Execute Python code
                         code = request_data.get("code", "")
                         result = self.execute_code(code)
-                        await websocket.send(json.dumps(result))
+                        await self._reply(websocket, request_id, result)
                     
                     elif action == "introspect_scene":
                         # Get scene information
                         result = self.introspect_scene()
-                        await websocket.send(json.dumps(result))
+                        await self._reply(websocket, request_id, result)
                     
                     elif action == "describe_function":
                         # Get function documentation
                         function_path = request_data.get("function_path", "")
                         result = self.describe_function(function_path)
-                        await websocket.send(json.dumps(result))
+                        await self._reply(websocket, request_id, result)
                     
                     else:
                         # Unknown command
-                        await websocket.send(json.dumps({"error": f"Unknown action: {action}"}))
+                        await self._reply(websocket, request_id, {"error": f"Unknown action: {action}"})
                 
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON received from {client_ip}")
-                    await websocket.send(json.dumps({"error": "Invalid JSON"}))
+                except ValueError:
+                    logger.error(f"Invalid message received from {client_ip}")
+                    await self._reply(websocket, None, {"error": "Invalid message"})
                 except Exception as e:
                     logger.error(f"Error handling message: {str(e)}")
-                    await websocket.send(json.dumps({"error": str(e)}))
+                    await self._reply(websocket, request_id, {"error": str(e)})
         except Exception as e:
             # Algemene exception handler voor alle verbindingsproblemen
             logger.info(f"Client {client_ip} disconnected: {str(e)}")
         finally:
             if websocket in self.connected_clients:
                 self.connected_clients.remove(websocket)
+            self.client_encodings.pop(websocket, None)
+    
+    async def _reply(self, websocket, request_id: Any, response: Dict[str, Any]) -> None:
+        """
+        Send a response, echoing the request's correlation id if it had one
+        
+        Args:
+            websocket: WebSocket connection
+            request_id (Any): The ``id`` of the request being answered
+            response (Dict[str, Any]): Response to send
+        """
+        if request_id is not None:
+            response = {**response, "id": request_id}
+        await websocket.send(_encode_frame(response, self.client_encodings.get(websocket, "json")))
+    
+    def negotiate_encoding(self, offered: List[str]) -> str:
+        """
+        Pick the wire encoding for a connection
+        
+        Args:
+            offered (List[str]): Encodings offered by the client, in order of preference
+            
+        Returns:
+            str: The first offered encoding available here, or "json"
+        """
+        available = _available_encodings()
+        for encoding in offered:
+            if encoding in available:
+                return encoding
+        return "json"
     
     async def start_server(self):
         """Start the WebSocket server"""
@@ -10,12 +10,32 @@ sys.path.append(parent_dir)
 sys.path.append(blender_agent_dir)
 
 # Import the WebSocket server module
-from blender_agent.websocket_server import register_websocket_server
+from blender_agent.websocket_server import register_websocket_server, BlenderWebSocketServer
 
-# Register the WebSocket server
-register_websocket_server()
+if bpy.app.background:
+    # Headless worker (blender -b): the server runs in a thread while the main thread runs
+    # the bpy work it queues, until the process is stopped; otherwise Blender exits as soon
+    # as this script returns
+    import asyncio
+    import threading
+    server = BlenderWebSocketServer()
+    server.main_thread.start()
+    stopped = threading.Event()
 
-# Start the WebSocket server
-bpy.ops.websocket.start_server()
+    def run_server():
+        try:
+            asyncio.run(server.start_server())
+        finally:
+            stopped.set()
 
-print("WebSocket server started at ws://localhost:9876")
\ No newline at end of file
+    threading.Thread(target=run_server, daemon=True).start()
+    print(f"WebSocket server starting at ws://{server.host}:{server.port}")
+    server.main_thread.serve(stopped)
+else:
+    # Register the WebSocket server
+    register_websocket_server()
+
+    # Start the WebSocket server
+    bpy.ops.websocket.start_server()
+
+    print("WebSocket server started at ws://localhost:9876")
\ No newline at end of file